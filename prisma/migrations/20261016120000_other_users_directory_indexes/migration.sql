@@ -0,0 +1,5 @@
+-- CreateIndex
+CREATE INDEX "CV_Experience_experience_id_idx" ON "CV_Experience"("experience_id");
+
+-- CreateIndex
+CREATE INDEX "CV_user_id_idx" ON "CV"("user_id");
@@ -0,0 +1,11 @@
+-- CreateTable
+CREATE TABLE "Blob" (
+    "bucket" TEXT NOT NULL,
+    "path" TEXT NOT NULL,
+    "ref_count" INTEGER NOT NULL DEFAULT 0,
+    "stored" BOOLEAN NOT NULL DEFAULT false,
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "Blob_pkey" PRIMARY KEY ("bucket","path")
+);
@@ -0,0 +1,76 @@
+import hashlib
+from logging import getLogger
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from src.ai.constants import GEMINI_RESUME_PROMPT
+from src.ai.schemas import ResumeAnalysisResponse
+from src.config import settings
+from src.database import redis_client
+
+logger = getLogger(__name__)
+
+REDIS_ANALYSIS_FILE_PREFIX = "ai:analysis:file:"
+REDIS_ANALYSIS_TEXT_PREFIX = "ai:analysis:text:"
+
+# Part of every key, so editing the prompt retires all cached analyses.
+PROMPT_VERSION = hashlib.sha256(GEMINI_RESUME_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+
+def file_fingerprint(contents: bytes, job_family: str) -> str:
+    digest = hashlib.sha256(f"{PROMPT_VERSION}\0{job_family}\0".encode("utf-8"))
+    digest.update(contents)
+    return digest.hexdigest()
+
+
+def text_fingerprint(text: str, job_family: str) -> str:
+    """Hash of the whitespace-normalized text, so re-exports of a resume match."""
+    digest = hashlib.sha256(f"{PROMPT_VERSION}\0{job_family}\0".encode("utf-8"))
+    digest.update(" ".join(text.split()).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """
+    Resume analyses in Redis, keyed by both the uploaded file and its text.
+
+    A re-upload of the same file is answered from the file key before any
+    extraction; a different file with the same text is answered from the
+    text key after extraction. Redis errors are logged and treated as misses.
+    """
+
+    def __init__(self, redis: Redis, ttl: int) -> None:
+        self.redis = redis
+        self.ttl = ttl
+
+    async def _get(self, key: str) -> Optional[ResumeAnalysisResponse]:
+        try:
+            raw = await self.redis.get(key)
+        except Exception as e:
+            logger.warning(f"Resume analysis cache lookup failed: {e}")
+            return None
+        return ResumeAnalysisResponse.model_validate_json(raw) if raw else None
+
+    async def get_by_file(self, file_hash: str) -> Optional[ResumeAnalysisResponse]:
+        return await self._get(f"{REDIS_ANALYSIS_FILE_PREFIX}{file_hash}")
+
+    async def get_by_text(self, text_hash: str) -> Optional[ResumeAnalysisResponse]:
+        return await self._get(f"{REDIS_ANALYSIS_TEXT_PREFIX}{text_hash}")
+
+    async def set(
+        self, file_hash: str, text_hash: str, analysis: ResumeAnalysisResponse
+    ) -> None:
+        value = analysis.model_dump_json()
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.set(f"{REDIS_ANALYSIS_FILE_PREFIX}{file_hash}", value, ex=self.ttl)
+                pipe.set(f"{REDIS_ANALYSIS_TEXT_PREFIX}{text_hash}", value, ex=self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Resume analysis cache write failed: {e}")
+
+
+analysis_cache = AnalysisCache(
+    redis_client, ttl=settings.RESUME_ANALYSIS_CACHE_TTL_SECONDS
+)
@@ -48,6 +48,7 @@ Developed a full-stack e-commerce web application using React, Node.js, and MySQ
 Remember: You are a focused tool for resume enhancement only. Stay within these boundaries at all times.
 """
 AI_USAGE_LIMIT_EXCEEDED_MESSAGE = "You have reached your monthly AI request quota."
+AI_SERVICE_BUSY_MESSAGE = "The AI service is busy. Please try again shortly."
 REQUEST_LENGTH_LIMIT = 1000
 REQUEST_LENGTH_LIMIT_EXCEEDED_MESSAGE = (
     "Request length exceeded the limit of 1000 characters."
@@ -71,9 +72,88 @@ Resume:
 
 UNSUPPORTED_FILE_TYPE_ERROR = "Unsupported file type. Please upload PDF or DOCX."
 ANALYSIS_FAILED_ERROR = "Failed to analyze resume."
+RESUME_EXTRACTION_FAILED_ERROR = "Could not read text from the uploaded resume."
+RESUME_EXTRACTION_BUSY_ERROR = "Resume reading is busy. Please try again shortly."
 FILE_TOO_LARGE_ERROR = "Uploaded file is too large. Maximum allowed size is 8MB."
 
 UPLOAD_USAGE_LIMIT = 20
 UPLOAD_USAGE_LIMIT_EXCEEDED_MESSAGE = (
     "You have reached your monthly resume upload quota (10 per month)."
 )
+
+UNKNOWN_JOB_FAMILY_ERROR = "Unknown job family."
+
+# Resume sections an ATS looks for, and content it cannot parse
+ATS_SECTION_TERMS = ["experience", "education", "skills", "project", "certification"]
+ATS_PENALTY_TERMS = ["table", "image"]
+
+DEFAULT_JOB_FAMILY = "general"
+JOB_FAMILY_KEYWORDS = {
+    "general": [
+        "python",
+        "java",
+        "sql",
+        "leadership",
+        "communication",
+        "team",
+        "analysis",
+        "management",
+        "cloud",
+        "aws",
+        "azure",
+        "react",
+        "node",
+        "machine learning",
+    ],
+    "software_engineering": [
+        "python",
+        "java",
+        "javascript",
+        "typescript",
+        "c++",
+        "go",
+        "sql",
+        "rest",
+        "api",
+        "microservices",
+        "docker",
+        "kubernetes",
+        "ci/cd",
+        "git",
+        "testing",
+        "aws",
+        "cloud",
+        "system design",
+    ],
+    "data_science": [
+        "python",
+        "r",
+        "sql",
+        "statistics",
+        "machine learning",
+        "deep learning",
+        "pandas",
+        "numpy",
+        "scikit-learn",
+        "tensorflow",
+        "pytorch",
+        "data visualization",
+        "a/b testing",
+        "spark",
+    ],
+    "product_management": [
+        "roadmap",
+        "stakeholder",
+        "strategy",
+        "user research",
+        "metrics",
+        "kpi",
+        "agile",
+        "scrum",
+        "prioritization",
+        "go-to-market",
+        "analysis",
+        "communication",
+        "leadership",
+    ],
+}
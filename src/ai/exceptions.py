@@ -1,8 +1,12 @@
 from pydantic import BaseModel
 
 from src.ai.constants import (
+    AI_SERVICE_BUSY_MESSAGE,
     AI_USAGE_LIMIT_EXCEEDED_MESSAGE,
     REQUEST_LENGTH_LIMIT_EXCEEDED_MESSAGE,
+    RESUME_EXTRACTION_BUSY_ERROR,
+    RESUME_EXTRACTION_FAILED_ERROR,
+    UNKNOWN_JOB_FAMILY_ERROR,
     UPLOAD_USAGE_LIMIT_EXCEEDED_MESSAGE,
 )
 
@@ -14,6 +18,13 @@ class RequestLimitExceeded(Exception):
         super().__init__(self.message)
 
 
+class AIServiceBusy(Exception):
+    def __init__(self, message: str = AI_SERVICE_BUSY_MESSAGE) -> None:
+        self.message = message
+        self.status_code = 503
+        super().__init__(self.message)
+
+
 class RequestLengthExceeded(Exception):
     def __init__(self, message: str = REQUEST_LENGTH_LIMIT_EXCEEDED_MESSAGE) -> None:
         self.message = message
@@ -35,6 +46,27 @@ class FileTooLarge(Exception):
         super().__init__(self.message)
 
 
+class ResumeExtractionFailed(Exception):
+    def __init__(self, message: str = RESUME_EXTRACTION_FAILED_ERROR) -> None:
+        self.message = message
+        self.status_code = 422
+        super().__init__(self.message)
+
+
+class ResumeExtractionBusy(Exception):
+    def __init__(self, message: str = RESUME_EXTRACTION_BUSY_ERROR) -> None:
+        self.message = message
+        self.status_code = 503
+        super().__init__(self.message)
+
+
+class UnknownJobFamily(Exception):
+    def __init__(self, message: str = UNKNOWN_JOB_FAMILY_ERROR) -> None:
+        self.message = message
+        self.status_code = 400
+        super().__init__(self.message)
+
+
 class UploadLimitExceeded(Exception):
     def __init__(self, message: str = UPLOAD_USAGE_LIMIT_EXCEEDED_MESSAGE) -> None:
         self.message = message
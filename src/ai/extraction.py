@@ -0,0 +1,211 @@
+import asyncio
+import multiprocessing
+import signal
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from io import BytesIO
+from logging import getLogger
+from typing import Any, Iterator, Optional, Tuple
+
+from src.ai.exceptions import ResumeExtractionBusy, ResumeExtractionFailed
+from src.ai.schemas import ResumeText
+from src.config import settings
+from src.util import kill_pool
+
+logger = getLogger(__name__)
+
+# (text, page_count, pages_extracted, seconds spent in the worker)
+ExtractedText = Tuple[str, int, int, float]
+
+
+class PageTimeout(Exception):
+    pass
+
+
+def _on_page_timeout(signum: int, frame: Any) -> None:
+    raise PageTimeout()
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """
+    Raise PageTimeout in the block if it runs longer than `seconds`.
+
+    Pool workers run tasks on their main thread, so SIGALRM can interrupt a
+    page that takes too long. Elsewhere (no SIGALRM, or another thread) the
+    block is not bounded and only the caller's overall timeout applies.
+    """
+    if (
+        not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _on_page_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def extract_pdf_text(data: bytes, max_pages: int, page_timeout: float) -> ExtractedText:
+    """
+    Extract the text of at most `max_pages` pages of a PDF.
+
+    Pages that exceed `page_timeout` seconds are skipped.
+    """
+    import pdfplumber
+
+    started = time.perf_counter()
+    parts = []
+    pages_extracted = 0
+    with pdfplumber.open(BytesIO(data)) as pdf:
+        page_count = len(pdf.pages)
+        for page in pdf.pages[:max_pages]:
+            try:
+                with deadline(page_timeout):
+                    page_text: Optional[str] = page.extract_text()
+            except PageTimeout:
+                logger.warning(f"Skipped PDF page {page.page_number}: timed out")
+                continue
+            finally:
+                page.close()
+            pages_extracted += 1
+            if page_text:
+                parts.append(page_text)
+    return "\n".join(parts).strip(), page_count, pages_extracted, _since(started)
+
+
+def extract_docx_text(data: bytes) -> ExtractedText:
+    from docx import Document
+
+    started = time.perf_counter()
+    doc = Document(BytesIO(data))
+    text = "\n".join(para.text for para in doc.paragraphs).strip()
+    # DOCX files carry no page layout; report the whole document as one page
+    return text, 1, 1, _since(started)
+
+
+def _since(started: float) -> float:
+    return time.perf_counter() - started
+
+
+class TextExtractor:
+    """
+    Runs resume text extraction in a pool of worker processes.
+
+    Parsing is CPU bound, so it is kept off the event loop and out of the
+    GIL. The pool is started on first use. Extractions wait for a free
+    worker before they are submitted, so `timeout` bounds the time one runs,
+    not the time it waits behind others; PDF pages are bounded by
+    `page_timeout` each. A pool whose worker timed out or died is killed and
+    the next call starts a new one. Extractions that were running in a pool
+    killed over another's timeout are retried once on the new pool.
+    """
+
+    def __init__(
+        self, workers: int, max_pages: int, page_timeout: float, timeout: float
+    ) -> None:
+        self.workers = workers
+        self.max_pages = max_pages
+        self.page_timeout = page_timeout
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._workers = asyncio.Semaphore(workers)
+        # Pools killed because one of their extractions timed out
+        self._timed_out: weakref.WeakSet[ProcessPoolExecutor] = weakref.WeakSet()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    async def extract_pdf(self, data: bytes) -> ResumeText:
+        return await self._run(
+            extract_pdf_text, data, self.max_pages, self.page_timeout
+        )
+
+    async def extract_docx(self, data: bytes) -> ResumeText:
+        return await self._run(extract_docx_text, data)
+
+    async def _run(self, func: Any, *args: Any) -> ResumeText:
+        started = time.perf_counter()
+        async with self._workers:
+            try:
+                extracted = await self._submit(func, *args)
+            except BrokenProcessPool:
+                # Killed over another extraction's timeout; nothing says this
+                # file is at fault
+                logger.warning("Resume text extraction pool was killed, retrying")
+                try:
+                    extracted = await self._submit(func, *args)
+                except BrokenProcessPool:
+                    raise ResumeExtractionBusy()
+        text, page_count, pages_extracted, worker_seconds = extracted
+        return ResumeText(
+            text=text,
+            page_count=page_count,
+            pages_extracted=pages_extracted,
+            extraction_ms=round(worker_seconds * 1000, 1),
+            total_ms=round(_since(started) * 1000, 1),
+        )
+
+    async def _submit(self, func: Any, *args: Any) -> ExtractedText:
+        """
+        Run one extraction on the pool.
+
+        Raises:
+            ResumeExtractionFailed: If the file cannot be read, takes too
+                long or kills its worker
+            BrokenProcessPool: If the pool was killed because another
+                extraction timed out
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(pool, func, *args), self.timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Resume text extraction timed out after {self.timeout}s")
+            # The worker is still busy with it; cancelling does not stop it
+            self._timed_out.add(pool)
+            self._discard_pool(pool)
+            raise ResumeExtractionFailed()
+        except BrokenProcessPool as e:
+            if pool in self._timed_out:
+                raise
+            logger.warning(f"Resume text extraction worker died: {e}")
+            self._discard_pool(pool)
+            raise ResumeExtractionFailed()
+        except Exception as e:
+            logger.warning(f"Resume text extraction failed: {e}")
+            raise ResumeExtractionFailed()
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        # Concurrent failures may already have replaced it
+        if self._pool is pool:
+            self._pool = None
+        kill_pool(pool)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+text_extractor = TextExtractor(
+    workers=settings.RESUME_EXTRACTION_WORKERS,
+    max_pages=settings.RESUME_EXTRACTION_MAX_PAGES,
+    page_timeout=settings.RESUME_EXTRACTION_PAGE_TIMEOUT_SECONDS,
+    timeout=settings.RESUME_EXTRACTION_TIMEOUT_SECONDS,
+)
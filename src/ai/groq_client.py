@@ -0,0 +1,137 @@
+import asyncio
+from logging import getLogger
+from typing import Any, AsyncGenerator, List, Optional
+
+import httpx
+from groq import AsyncGroq, AsyncStream, DefaultAsyncHttpxClient
+from groq.types.chat import ChatCompletionChunk, ChatCompletionMessageParam
+
+from src.ai.exceptions import AIServiceBusy
+from src.config import settings
+
+logger = getLogger(__name__)
+
+
+class GroqChat:
+    """
+    Shared Groq chat client.
+
+    One `AsyncGroq` client, and so one pooled HTTP connection set, serves every
+    request. Transient failures (connection errors, 408/409/429/5xx) are
+    retried by the SDK with exponential backoff and jitter, and at most
+    `max_concurrency` completions run at once so a burst of AI calls cannot
+    hold every connection and worker. Callers that wait longer than
+    `queue_timeout` for a slot get `AIServiceBusy`.
+    """
+
+    def __init__(
+        self,
+        client: AsyncGroq,
+        max_concurrency: int,
+        queue_timeout: float,
+    ) -> None:
+        self.client = client
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def _acquire(self) -> None:
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Groq concurrency limit reached, rejecting request")
+            raise AIServiceBusy()
+
+    async def complete(
+        self,
+        model: str,
+        messages: List[ChatCompletionMessageParam],
+        temperature: float = 1,
+        max_completion_tokens: int = 1024,
+        top_p: float = 1,
+    ) -> str:
+        await self._acquire()
+        try:
+            completion = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_completion_tokens=max_completion_tokens,
+                top_p=top_p,
+                stream=False,
+            )
+        finally:
+            self._slots.release()
+        return completion.choices[0].message.content or ""
+
+    async def stream(
+        self,
+        model: str,
+        messages: List[ChatCompletionMessageParam],
+        temperature: float = 1,
+        max_completion_tokens: int = 1024,
+        top_p: float = 1,
+    ) -> AsyncGenerator[str, None]:
+        """
+        Start a streamed completion and return an iterator over its tokens.
+
+        The slot and the request are taken before this returns, so a busy or
+        failing API raises here rather than part-way through a response. The
+        slot is held until the iterator is exhausted, closed or dropped.
+        """
+        tokens = self._relay(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_completion_tokens=max_completion_tokens,
+            top_p=top_p,
+            stream=True,
+        )
+        # Runs the generator up to its first yield, so the slot is only ever
+        # held inside its frame and is released when the generator is closed
+        # or garbage collected, even if nothing iterates it afterwards
+        await tokens.__anext__()
+        return tokens
+
+    async def _relay(self, **kwargs: Any) -> AsyncGenerator[str, None]:
+        await self._acquire()
+        try:
+            chunks: AsyncStream[ChatCompletionChunk] = (
+                await self.client.chat.completions.create(**kwargs)
+            )
+            try:
+                # Tells `stream` the completion has started
+                yield ""
+                async for chunk in chunks:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await chunks.close()
+        finally:
+            self._slots.release()
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+def create_groq_client(api_key: Optional[str] = None) -> AsyncGroq:
+    return AsyncGroq(
+        api_key=api_key or settings.GROQ_API_KEY,
+        timeout=httpx.Timeout(
+            settings.GROQ_TIMEOUT_SECONDS,
+            connect=settings.GROQ_CONNECT_TIMEOUT_SECONDS,
+        ),
+        max_retries=settings.GROQ_MAX_RETRIES,
+        http_client=DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=settings.GROQ_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.GROQ_MAX_CONNECTIONS,
+            )
+        ),
+    )
+
+
+groq_chat = GroqChat(
+    create_groq_client(),
+    max_concurrency=settings.GROQ_MAX_CONCURRENCY,
+    queue_timeout=settings.GROQ_QUEUE_TIMEOUT_SECONDS,
+)
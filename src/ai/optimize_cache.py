@@ -0,0 +1,82 @@
+import hashlib
+import time
+from logging import getLogger
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from src.ai.constants import MODEL, SYSTEM_PROMPT
+from src.config import settings
+from src.database import redis_client
+
+logger = getLogger(__name__)
+
+REDIS_OPTIMIZE_PREFIX = "ai:optimize:"
+# Sorted set of cached keys by last use, used to keep the cache bounded
+REDIS_OPTIMIZE_INDEX = "ai:optimize:index"
+
+# Changing the prompt changes every key, so stale results are never served.
+PROMPT_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+
+def normalize_description(description: str) -> str:
+    """Collapse whitespace so re-pasted or re-indented text shares a key."""
+    return " ".join(description.split())
+
+
+def optimize_cache_key(description: str) -> str:
+    digest = hashlib.sha256(f"{MODEL}\0{PROMPT_VERSION}\0".encode("utf-8"))
+    digest.update(normalize_description(description).encode("utf-8"))
+    return f"{REDIS_OPTIMIZE_PREFIX}{digest.hexdigest()}"
+
+
+class OptimizeCache:
+    """
+    Optimized texts in Redis, keyed by model, prompt version and description.
+
+    Entries expire after `ttl` seconds, and once there are more than
+    `max_entries` the least recently used are evicted. Redis errors are
+    logged and treated as misses.
+    """
+
+    def __init__(self, redis: Redis, ttl: int, max_entries: int) -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    async def get(self, description: str) -> Optional[str]:
+        key = optimize_cache_key(description)
+        try:
+            text = await self.redis.get(key)
+            if text is not None:
+                await self.redis.zadd(REDIS_OPTIMIZE_INDEX, {key: time.time()})
+        except Exception as e:
+            logger.warning(f"AI optimize cache lookup failed: {e}")
+            return None
+        return str(text) if text is not None else None
+
+    async def set(self, description: str, text: str) -> None:
+        key = optimize_cache_key(description)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.set(key, text, ex=self.ttl)
+                pipe.zadd(REDIS_OPTIMIZE_INDEX, {key: time.time()})
+                pipe.zcard(REDIS_OPTIMIZE_INDEX)
+                *_, size = await pipe.execute()
+            if size > self.max_entries:
+                await self._evict(size - self.max_entries)
+        except Exception as e:
+            logger.warning(f"AI optimize cache write failed: {e}")
+
+    async def _evict(self, count: int) -> None:
+        evicted = await self.redis.zpopmin(REDIS_OPTIMIZE_INDEX, count)
+        keys = [str(entry[0]) for entry in evicted]
+        if keys:
+            await self.redis.delete(*keys)
+
+
+optimize_cache = OptimizeCache(
+    redis_client,
+    ttl=settings.AI_OPTIMIZE_CACHE_TTL_SECONDS,
+    max_entries=settings.AI_OPTIMIZE_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,227 @@
+import asyncio
+from datetime import datetime
+from enum import Enum
+from logging import getLogger
+from typing import Any, Coroutine, Dict, Set, Tuple
+
+from redis.asyncio import Redis
+
+from src.ai.constants import AI_USAGE_LIMIT, UPLOAD_USAGE_LIMIT
+from src.ai.exceptions import RequestLimitExceeded, UploadLimitExceeded
+from src.database import get_db, redis_client
+
+logger = getLogger(__name__)
+
+REDIS_QUOTA_PREFIX = "ai:quota:"
+
+# Increments the counter unless it is already at the limit. Returns the new
+# count, -1 when the limit is reached, or -2 when the counter does not exist
+# yet and has to be seeded from Postgres first.
+INCREMENT_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    return -2
+end
+if tonumber(current) >= tonumber(ARGV[1]) then
+    return -1
+end
+return redis.call('INCR', KEYS[1])
+"""
+
+# Gives one use back, never going below zero or creating the counter
+DECREMENT_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current or tonumber(current) <= 0 then
+    return -1
+end
+return redis.call('DECR', KEYS[1])
+"""
+
+
+class QuotaKind(str, Enum):
+    request = "request"
+    upload = "upload"
+
+
+# AI_Request columns holding the count, the start of the counted month and
+# the time of the last use, per quota kind.
+QUOTA_FIELDS: Dict[QuotaKind, Tuple[str, str, str]] = {
+    QuotaKind.request: ("request_count", "init_request_at", "last_request_at"),
+    QuotaKind.upload: ("upload_count", "init_upload_at", "last_upload_at"),
+}
+
+QUOTA_LIMITS: Dict[QuotaKind, int] = {
+    QuotaKind.request: AI_USAGE_LIMIT,
+    QuotaKind.upload: UPLOAD_USAGE_LIMIT,
+}
+
+
+def month_start(now: datetime) -> datetime:
+    return datetime(now.year, now.month, 1)
+
+
+def next_month_start(now: datetime) -> datetime:
+    return datetime(now.year + now.month // 12, now.month % 12 + 1, 1)
+
+
+class QuotaCounter:
+    """
+    Monthly per-user AI quotas counted atomically in Redis.
+
+    Each user has one counter per quota kind and month, incremented by a Lua
+    script that refuses to go past the limit, so concurrent requests cannot
+    overshoot it. Counters expire at the end of their month. A missing
+    counter is seeded from the AI_Request row, and every accepted use is
+    written back to Postgres in the background. If Redis is unavailable the
+    quota is checked against Postgres directly. Uses whose call failed can
+    be refunded.
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+        self._increment = redis.register_script(INCREMENT_SCRIPT)
+        self._decrement = redis.register_script(DECREMENT_SCRIPT)
+        self._pending: Set["asyncio.Task[None]"] = set()
+
+    @staticmethod
+    def _key(kind: QuotaKind, user_id: str, now: datetime) -> str:
+        return f"{REDIS_QUOTA_PREFIX}{kind.value}:{user_id}:{now:%Y-%m}"
+
+    async def consume(self, kind: QuotaKind, user_id: str) -> int:
+        """
+        Count one use of `kind` for the user and return the month's total.
+
+        Raises:
+            RequestLimitExceeded: If the monthly request quota is used up
+            UploadLimitExceeded: If the monthly upload quota is used up
+        """
+        now = datetime.now()
+        try:
+            count = await self._consume_in_redis(kind, user_id, now)
+        except (RequestLimitExceeded, UploadLimitExceeded):
+            raise
+        except Exception as e:
+            logger.warning(f"AI quota Redis check failed, using Postgres: {e}")
+            count = await self._consume_in_db(kind, user_id, now)
+        else:
+            self._schedule_persist(kind, user_id, count, now)
+        return count
+
+    async def refund(self, kind: QuotaKind, user_id: str) -> None:
+        """Give back one use of `kind`, e.g. when the call it paid for failed."""
+        now = datetime.now()
+        try:
+            await self._decrement(keys=[self._key(kind, user_id, now)])
+        except Exception as e:
+            logger.warning(f"AI quota Redis refund failed: {e}")
+        self._schedule(refund_usage(kind, user_id, now))
+
+    async def _consume_in_redis(
+        self, kind: QuotaKind, user_id: str, now: datetime
+    ) -> int:
+        key = self._key(kind, user_id, now)
+        limit = QUOTA_LIMITS[kind]
+        count = await self._increment(keys=[key], args=[limit])
+        if count == -2:
+            used = await load_usage(kind, user_id, now)
+            # Another worker may have seeded the counter in the meantime
+            await self.redis.set(
+                key, used, nx=True, exat=int(next_month_start(now).timestamp())
+            )
+            count = await self._increment(keys=[key], args=[limit])
+        if count < 0:
+            raise_limit_exceeded(kind)
+        return int(count)
+
+    async def _consume_in_db(self, kind: QuotaKind, user_id: str, now: datetime) -> int:
+        used = await load_usage(kind, user_id, now)
+        if used >= QUOTA_LIMITS[kind]:
+            raise_limit_exceeded(kind)
+        await persist_usage(kind, user_id, used + 1, now)
+        return used + 1
+
+    def _schedule_persist(
+        self, kind: QuotaKind, user_id: str, count: int, now: datetime
+    ) -> None:
+        self._schedule(persist_usage(kind, user_id, count, now))
+
+    def _schedule(self, write: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.create_task(write)
+        self._pending.add(task)
+        task.add_done_callback(self._persisted)
+
+    def _persisted(self, task: "asyncio.Task[None]") -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to persist AI usage: {task.exception()}")
+
+    async def drain(self) -> None:
+        """Wait for pending Postgres writes, e.g. on shutdown."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+
+def raise_limit_exceeded(kind: QuotaKind) -> None:
+    if kind == QuotaKind.upload:
+        raise UploadLimitExceeded()
+    raise RequestLimitExceeded()
+
+
+async def load_usage(kind: QuotaKind, user_id: str, now: datetime) -> int:
+    """The user's recorded `kind` count for the month of `now`."""
+    count_field, init_field, _ = QUOTA_FIELDS[kind]
+    async with get_db() as db:
+        ai_request = await db.ai_request.find_first(where={"user_id": user_id})
+    if not ai_request:
+        return 0
+    init_at: datetime = getattr(ai_request, init_field)
+    if (init_at.year, init_at.month) != (now.year, now.month):
+        return 0
+    return int(getattr(ai_request, count_field))
+
+
+async def persist_usage(
+    kind: QuotaKind, user_id: str, count: int, now: datetime
+) -> None:
+    """
+    Record the user's `kind` count for the month of `now` in AI_Request.
+
+    Writes may arrive out of order, so a row is only updated when it holds a
+    smaller count or one from an earlier month.
+    """
+    count_field, init_field, last_field = QUOTA_FIELDS[kind]
+    data: Dict[str, Any] = {count_field: count, last_field: now}
+
+    async with get_db() as db:
+        # Row still counting an earlier month: start this one
+        updated = await db.ai_request.update_many(
+            where={"user_id": user_id, init_field: {"lt": month_start(now)}},
+            data={**data, init_field: now},
+        )
+        if not updated:
+            updated = await db.ai_request.update_many(
+                where={"user_id": user_id, count_field: {"lt": count}}, data=data
+            )
+        if updated:
+            return
+        if not await db.ai_request.find_first(where={"user_id": user_id}):
+            await db.ai_request.create(
+                data={"user_id": user_id, **data, init_field: now}
+            )
+
+
+async def refund_usage(kind: QuotaKind, user_id: str, now: datetime) -> None:
+    """Take one use of `kind` off the user's count for the month of `now`."""
+    count_field, init_field, _ = QUOTA_FIELDS[kind]
+    async with get_db() as db:
+        await db.ai_request.update_many(
+            where={
+                "user_id": user_id,
+                init_field: {"gte": month_start(now)},
+                count_field: {"gt": 0},
+            },
+            data={count_field: {"decrement": 1}},
+        )
+
+
+quota_counter = QuotaCounter(redis_client)
@@ -1,136 +1,170 @@
+import asyncio
 import json
-import os
-import re
-import tempfile
-from typing import TYPE_CHECKING, Any, Dict, Union
+from logging import getLogger
+from typing import Any, Callable, Coroutine, Dict, Optional, Set
 
 import google.generativeai as genai
-from docx import Document
 
 from src.ai.constants import GEMINI_RESUME_PROMPT
+from src.ai.scoring import scoring_engine
 from src.config import settings
 
-if TYPE_CHECKING:
-    pass
+logger = getLogger(__name__)
+
+# Receives the full analysis when Gemini finishes after the deadline
+LateResultHandler = Callable[[Dict[str, Any]], Coroutine[Any, Any, None]]
 
 
 class AIResumeAnalyzer:
-    def __init__(self) -> None:
+    """
+    Resume analysis with Gemini plus the local heuristic scores.
+
+    One model instance is shared by every request and asked for JSON output,
+    so the reply is parsed directly. At most `max_concurrency` analyses run at
+    once. If Gemini has not answered within `deadline` seconds (waiting for a
+    slot included) the heuristic scores are returned on their own, marked as
+    pending, while the Gemini call carries on in the background and its
+    result is handed to the caller's `on_late_result`. Calls are cut off
+    after `timeout` seconds, and concurrent analyses of the same `key` share
+    one call.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        deadline: float,
+        timeout: float,
+        max_concurrency: int,
+        drain_timeout: float,
+    ) -> None:
         self.google_api_key: str = settings.GOOGLE_API_KEY
+        self.deadline = deadline
+        self.timeout = timeout
+        self.drain_timeout = drain_timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._background: Set["asyncio.Task[Any]"] = set()
+        self._in_flight: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
         if self.google_api_key:
             genai.configure(api_key=self.google_api_key)  # type: ignore[attr-defined]
+        self.model = genai.GenerativeModel(  # type: ignore[attr-defined]
+            model_name,
+            generation_config={"response_mime_type": "application/json"},
+        )
 
-    def extract_text_from_pdf(self, pdf_bytes: bytes) -> str:
-        text: str = ""
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-            temp_file.write(pdf_bytes)
-            temp_path: str = temp_file.name
+    async def _generate(self, resume_text: str) -> Dict[str, Any]:
+        prompt: str = GEMINI_RESUME_PROMPT.format(resume_text=resume_text)
+        async with self._slots:
+            # The request timeout does not cover the client's own retries
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(
+                    prompt, request_options={"timeout": self.timeout}
+                ),
+                self.timeout,
+            )
         try:
-            import pdfplumber
+            result = json.loads(response.text)
+        except ValueError:
+            return {"analysis": response.text}
+        return result if isinstance(result, dict) else {"analysis": response.text}
 
-            with pdfplumber.open(temp_path) as pdf:
-                for page in pdf.pages:
-                    page_text: Union[str, None] = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-        except Exception as e:
-            print(f"Error extracting text from PDF: {e}")
-        finally:
-            try:
-                os.unlink(temp_path)
-            except Exception:
-                pass
-        return text.strip()
-
-    def extract_text_from_docx(self, docx_file: Any) -> str:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as temp_file:
-            temp_file.write(docx_file.getbuffer())
-            temp_path: str = temp_file.name
-        text: str = ""
-        try:
-            doc = Document(temp_path)
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-        except Exception as e:
-            print(f"Error extracting text from DOCX: {e}")
-        finally:
-            try:
-                os.unlink(temp_path)
-            except Exception:
-                pass
-        return text.strip()
-
-    def analyze_resume_with_gemini(self, resume_text: str) -> Dict[str, Any]:
+    def in_flight(self, key: str) -> bool:
+        """Whether an analysis of `key` is running, in time or in the background."""
+        return key in self._in_flight
+
+    async def analyze_resume_with_gemini(
+        self,
+        resume_text: str,
+        job_family: Optional[str] = None,
+        on_late_result: Optional[LateResultHandler] = None,
+        key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Analyze a resume. With a `key`, e.g. a fingerprint of the text, a call
+        already running for the same key is joined instead of starting
+        another; only the call that started it gets the late result.
+        """
         if not resume_text or not self.google_api_key:
             return {"error": "Resume text or Google API key missing."}
+        scores = scoring_engine.score(resume_text, job_family).model_dump()
+
+        task = self._in_flight.get(key) if key is not None else None
+        joined = task is not None
+        if task is None:
+            task = asyncio.create_task(self._generate(resume_text))
+            if key is not None:
+                self._track(key, task)
         try:
-            model = genai.GenerativeModel("gemini-1.5-flash")  # type: ignore[attr-defined]
-            prompt: str = GEMINI_RESUME_PROMPT.format(resume_text=resume_text)
-            response = model.generate_content(prompt)
-            try:
-                match = re.search(r"\{.*\}", response.text, re.DOTALL)
-                if match:
-                    result: Dict[str, Any] = json.loads(match.group(0))
-                else:
-                    result = {"analysis": response.text}
-            except Exception:
-                result = {"analysis": response.text}
+            result = await asyncio.wait_for(asyncio.shield(task), self.deadline)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Gemini analysis exceeded {self.deadline}s, returning heuristic scores"
+            )
+            if not joined:
+                self._finish_in_background(task, scores, on_late_result)
+            return {**scores, "analysis_pending": True}
         except Exception as e:
             result = {"error": f"Analysis failed: {str(e)}"}
 
-        result["ats_score"] = self.compute_ats_score(resume_text)
-        result["keyword_match_score"] = self.compute_keyword_match_score(resume_text)
-        result["formatting_score"] = self.compute_formatting_score(resume_text)
-        return result
+        # The result may be shared with callers that joined the call
+        return {**result, **scores}
 
-    def compute_ats_score(self, resume_text: str) -> int:
-        """
-        Simple ATS score: checks for common ATS-friendly features.
-        """
-        keywords = ["experience", "education", "skills", "project", "certification"]
-        score = 0
-        for kw in keywords:
-            if kw in resume_text.lower():
-                score += 20
-        # Check for simple formatting issues (no tables, no images)
-        if "table" not in resume_text.lower() and "image" not in resume_text.lower():
-            score += 10
-        return min(score, 100)
-
-    def compute_keyword_match_score(self, resume_text: str) -> int:
-        """
-        Simple keyword match score: counts presence of common job keywords.
-        """
-        job_keywords = [
-            "python",
-            "java",
-            "sql",
-            "leadership",
-            "communication",
-            "team",
-            "analysis",
-            "management",
-            "cloud",
-            "aws",
-            "azure",
-            "react",
-            "node",
-            "machine learning",
-        ]
-        found = sum(1 for kw in job_keywords if kw in resume_text.lower())
-        score = int((found / len(job_keywords)) * 100)
-        return min(score, 100)
-
-    def compute_formatting_score(self, resume_text: str) -> int:
+    def _track(self, key: str, task: "asyncio.Task[Dict[str, Any]]") -> None:
+        self._in_flight[key] = task
+
+        def done(task: "asyncio.Task[Dict[str, Any]]") -> None:
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+
+        task.add_done_callback(done)
+
+    def _finish_in_background(
+        self,
+        task: "asyncio.Task[Dict[str, Any]]",
+        scores: Dict[str, Any],
+        on_late_result: Optional[LateResultHandler],
+    ) -> None:
+        self._background.add(task)
+
+        def done(task: "asyncio.Task[Dict[str, Any]]") -> None:
+            self._background.discard(task)
+            if task.cancelled():
+                return
+            if task.exception() is not None:
+                logger.error(f"Background Gemini analysis failed: {task.exception()}")
+                return
+            if on_late_result is not None:
+                late = asyncio.create_task(on_late_result({**task.result(), **scores}))
+                self._background.add(late)
+                late.add_done_callback(self._background.discard)
+
+        task.add_done_callback(done)
+
+    async def drain(self) -> None:
         """
-        Simple formatting score: checks for bullet points, section headers, and reasonable length.
+        Wait up to `drain_timeout` seconds for analyses still running in the
+        background, e.g. on shutdown, and cancel the rest.
         """
-        score = 0
-        if "-" in resume_text or "*" in resume_text or "•" in resume_text:
-            score += 30
-        if "education" in resume_text.lower() and "experience" in resume_text.lower():
-            score += 30
-        lines = resume_text.splitlines()
-        if 20 <= len(lines) <= 100:
-            score += 40
-        return min(score, 100)
+        try:
+            await asyncio.wait_for(self._wait_for_background(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Cancelling {len(self._background)} background Gemini analyses"
+            )
+            for task in list(self._background):
+                task.cancel()
+            await asyncio.gather(*self._background, return_exceptions=True)
+
+    async def _wait_for_background(self) -> None:
+        while self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+            # Let finished analyses hand their result to on_late_result
+            await asyncio.sleep(0)
+
+
+resume_analyzer = AIResumeAnalyzer(
+    settings.GEMINI_MODEL,
+    deadline=settings.GEMINI_DEADLINE_SECONDS,
+    timeout=settings.GEMINI_TIMEOUT_SECONDS,
+    max_concurrency=settings.GEMINI_MAX_CONCURRENCY,
+    drain_timeout=settings.GEMINI_DRAIN_TIMEOUT_SECONDS,
+)
@@ -1,15 +1,22 @@
+import json
 from logging import getLogger
+from typing import AsyncGenerator, AsyncIterator, Dict, Optional
 
-from fastapi import APIRouter, File, Request, UploadFile
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, File, Form, Request, Response, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from src.ai.exceptions import (
+    AIServiceBusy,
     RequestLengthExceeded,
     RequestLimitExceeded,
     UploadLimitExceeded,
 )
 from src.ai.schemas import OptimizaitonRequest, ResumeAnalysisResponse
-from src.ai.service import analyze_resume_file, optimize_text
+from src.ai.service import (
+    analyze_resume_file,
+    optimize_text,
+    stream_optimized_text,
+)
 
 router = APIRouter(tags=["AI"], prefix="/ai")
 logger = getLogger(__name__)
@@ -23,12 +30,16 @@ async def optimize_resume(
 ) -> JSONResponse:
     try:
         user_id: str = request.state.user.get("uid", "")
-        optimized_text: str = await optimize_text(user_id, payload.description)
+        optimized_text: str = await optimize_text(
+            user_id, payload.description, payload.regenerate
+        )
         return JSONResponse(status_code=200, content={"optimized_text": optimized_text})
     except RequestLimitExceeded as e:
         return JSONResponse(status_code=e.status_code, content={"detail": e.message})
     except RequestLengthExceeded as e:
         return JSONResponse(status_code=e.status_code, content={"detail": e.message})
+    except AIServiceBusy as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": e.message})
     except Exception as e:
         logger.error(f"Unexpected error during resume optimization: {e}")
         return JSONResponse(
@@ -36,6 +47,61 @@ async def optimize_resume(
         )
 
 
+@router.post(
+    "/optimize/stream",
+    summary="Stream an optimized resume description section",
+    description=(
+        "Same as /ai/optimize, but the optimized text is sent as Server-Sent "
+        "Events while it is generated: `token` events carrying "
+        '`{"token": ...}`, then a `done` event, or an `error` event if '
+        "generation fails part-way."
+    ),
+    status_code=200,
+)
+async def optimize_resume_stream(
+    request: Request, payload: OptimizaitonRequest
+) -> Response:
+    try:
+        user_id: str = request.state.user.get("uid", "")
+        tokens = await stream_optimized_text(
+            user_id, payload.description, payload.regenerate
+        )
+        return StreamingResponse(
+            sse_events(tokens),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    except RequestLimitExceeded as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": e.message})
+    except RequestLengthExceeded as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": e.message})
+    except AIServiceBusy as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": e.message})
+    except Exception as e:
+        logger.error(f"Unexpected error during resume optimization: {e}")
+        return JSONResponse(
+            status_code=500, content={"detail": "Internal server error"}
+        )
+
+
+def sse_event(event: str, data: Dict[str, str]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def sse_events(tokens: AsyncGenerator[str, None]) -> AsyncIterator[str]:
+    try:
+        async for token in tokens:
+            yield sse_event("token", {"token": token})
+    except Exception as e:
+        logger.error(f"Resume optimization stream failed: {e}")
+        yield sse_event("error", {"detail": "Internal server error"})
+        return
+    finally:
+        # Frees the completion slot right away if the client disconnects
+        await tokens.aclose()
+    yield sse_event("done", {})
+
+
 @router.post(
     "/analyze",
     summary="Analyze resume PDF or DOCX using AI",
@@ -43,11 +109,13 @@ async def optimize_resume(
     status_code=200,
 )
 async def analyze_resume(
-    request: Request, file: UploadFile = File(...)
+    request: Request,
+    file: UploadFile = File(...),
+    job_family: Optional[str] = Form(None),
 ) -> JSONResponse:
     user_id = request.state.user.get("uid", "")
     try:
-        result = await analyze_resume_file(user_id, file)
+        result = await analyze_resume_file(user_id, file, job_family)
         return result
     except UploadLimitExceeded as e:
         return JSONResponse(status_code=429, content={"error": e.message})
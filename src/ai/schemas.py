@@ -1,10 +1,12 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 
 
 class OptimizaitonRequest(BaseModel):
     description: str
+    # Skip the cached result and ask the model again
+    regenerate: bool = False
 
 
 class ResumeAnalysisResponse(BaseModel):
@@ -21,3 +23,33 @@ class ResumeAnalysisResponse(BaseModel):
     ats_score: Optional[int] = None
     keyword_match_score: Optional[int] = None
     formatting_score: Optional[int] = None
+    job_family: Optional[str] = None
+    # Offsets in the extracted text of each matched section and keyword
+    matched_terms: Optional[Dict[str, List[int]]] = None
+    page_count: Optional[int] = None
+    pages_extracted: Optional[int] = None
+    extraction_ms: Optional[float] = None
+    # Only the heuristic scores so far; the full analysis is cached when ready
+    analysis_pending: bool = False
+
+
+class ResumeText(BaseModel):
+    """Text extracted from an uploaded resume."""
+
+    text: str
+    page_count: int
+    # Fewer than page_count when the page limit was hit or pages timed out
+    pages_extracted: int
+    # Time spent parsing in the worker, and including the pool round trip
+    extraction_ms: float
+    total_ms: float
+
+
+class ResumeScores(BaseModel):
+    """Heuristic scores of a resume's text."""
+
+    job_family: str
+    ats_score: int
+    keyword_match_score: int
+    formatting_score: int
+    matched_terms: Dict[str, List[int]]
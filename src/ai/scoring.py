@@ -0,0 +1,166 @@
+import json
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Pattern, Set, Tuple
+
+from src.ai.constants import (
+    ATS_PENALTY_TERMS,
+    ATS_SECTION_TERMS,
+    DEFAULT_JOB_FAMILY,
+    JOB_FAMILY_KEYWORDS,
+)
+from src.ai.exceptions import UnknownJobFamily
+from src.ai.schemas import ResumeScores
+from src.config import settings
+
+# Only whether there is one matters, so the search stops at the first
+BULLET = re.compile(r"^[ \t]*[-*•]", re.MULTILINE)
+
+# Scoring weights, unchanged from the original per-score heuristics
+ATS_SECTION_POINTS = 20
+ATS_CLEAN_POINTS = 10
+FORMATTING_BULLET_POINTS = 30
+FORMATTING_SECTION_POINTS = 30
+FORMATTING_LENGTH_POINTS = 40
+FORMATTING_LINE_RANGE = (20, 100)
+
+
+def normalize_term(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
+def trie_alternation(terms: Iterable[str]) -> str:
+    """
+    A regex alternation of `terms` factored by common prefix.
+
+    The regex engine tries alternatives one by one, so "p(?:ython|andas)" is
+    much cheaper to reject than "python|pandas". Spaces in multi-word terms
+    match any run of whitespace, including line breaks.
+    """
+    trie: Dict[str, Any] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # A term ends here, and longer ones continue
+        return f"(?:{pattern})?" if "" in node else pattern
+
+    return build(trie)
+
+
+def compile_terms(terms: Iterable[str], flags: int = 0) -> Pattern[str]:
+    # Group 1 is the term without a plural suffix
+    return re.compile(rf"\b({trie_alternation(terms)})(?:e?s)?(?!\w)", flags)
+
+
+class ScoringEngine:
+    """
+    Heuristic ATS, keyword and formatting scores from one scan of the text.
+
+    For each job family, the ATS section and penalty terms and the family's
+    keywords are compiled into one prefix-factored alternation matched on
+    whole words (plurals included). The text is lowercased once and a single
+    `finditer` finds every term with its offsets; the three scores are
+    derived from those matches and a check for a line-leading bullet.
+    Keyword sets come from JOB_FAMILY_KEYWORDS, or from a JSON file of the
+    same shape.
+    """
+
+    def __init__(self, job_families: Mapping[str, Iterable[str]]) -> None:
+        if DEFAULT_JOB_FAMILY not in job_families:
+            raise ValueError(f"Keyword sets must include '{DEFAULT_JOB_FAMILY}'")
+        self.job_families: Dict[str, Set[str]] = {
+            family: {normalize_term(term) for term in terms}
+            for family, terms in job_families.items()
+        }
+        self.sections = {normalize_term(term) for term in ATS_SECTION_TERMS}
+        self.penalties = {normalize_term(term) for term in ATS_PENALTY_TERMS}
+        self._patterns: Dict[str, Tuple[Pattern[str], Pattern[str]]] = {}
+        for family, keywords in self.job_families.items():
+            terms = self.sections | self.penalties | keywords
+            self._patterns[family] = (
+                compile_terms(terms),
+                compile_terms(terms, re.IGNORECASE),
+            )
+
+    @classmethod
+    def from_json(cls, path: str) -> "ScoringEngine":
+        """Load keyword sets from a JSON object of job family -> terms."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def families(self) -> List[str]:
+        return sorted(self.job_families)
+
+    def find_terms(
+        self, text: str, job_family: str = DEFAULT_JOB_FAMILY
+    ) -> Dict[str, List[int]]:
+        """Offsets of every matched term, keyed by normalized term."""
+        pattern, case_insensitive = self._patterns[job_family]
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Some characters lowercase to several; keep offsets exact
+            lowered, pattern = text, case_insensitive
+
+        matches: Dict[str, List[int]] = {}
+        keys: Dict[str, str] = {}
+        for match in pattern.finditer(lowered):
+            term = match.group(1)
+            key = keys.get(term) or keys.setdefault(term, normalize_term(term))
+            matches.setdefault(key, []).append(match.start())
+        return matches
+
+    def score(self, text: str, job_family: Optional[str] = None) -> ResumeScores:
+        family = job_family or DEFAULT_JOB_FAMILY
+        keywords = self.job_families.get(family)
+        if keywords is None:
+            raise UnknownJobFamily()
+
+        matches = self.find_terms(text, family)
+        found = matches.keys()
+
+        ats = ATS_SECTION_POINTS * len(self.sections & found)
+        if not self.penalties & found:
+            ats += ATS_CLEAN_POINTS
+
+        keyword_match = int(len(keywords & found) / len(keywords) * 100)
+
+        formatting = 0
+        if BULLET.search(text):
+            formatting += FORMATTING_BULLET_POINTS
+        if {"education", "experience"} <= found:
+            formatting += FORMATTING_SECTION_POINTS
+        low, high = FORMATTING_LINE_RANGE
+        if low <= len(text.splitlines()) <= high:
+            formatting += FORMATTING_LENGTH_POINTS
+
+        return ResumeScores(
+            job_family=family,
+            ats_score=min(ats, 100),
+            keyword_match_score=min(keyword_match, 100),
+            formatting_score=min(formatting, 100),
+            matched_terms={
+                term: positions
+                for term, positions in matches.items()
+                if term in keywords or term in self.sections
+            },
+        )
+
+
+def create_scoring_engine() -> ScoringEngine:
+    if settings.RESUME_KEYWORDS_FILE:
+        return ScoringEngine.from_json(settings.RESUME_KEYWORDS_FILE)
+    return ScoringEngine(JOB_FAMILY_KEYWORDS)
+
+
+scoring_engine = create_scoring_engine()
@@ -1,26 +1,31 @@
-from datetime import datetime
 from logging import getLogger
+from typing import Any, AsyncGenerator, Dict, List, Optional
 
 from fastapi import UploadFile
 from fastapi.responses import JSONResponse
-from groq import Groq
+from groq.types.chat import ChatCompletionMessageParam
 
+from src.ai.analysis_cache import analysis_cache, file_fingerprint, text_fingerprint
 from src.ai.constants import (
-    AI_USAGE_LIMIT,
+    DEFAULT_JOB_FAMILY,
     MODEL,
     REQUEST_LENGTH_LIMIT,
     SYSTEM_PROMPT,
-    UPLOAD_USAGE_LIMIT,
 )
 from src.ai.exceptions import (
     RequestLengthExceeded,
-    RequestLimitExceeded,
+    ResumeExtractionBusy,
+    ResumeExtractionFailed,
+    UnknownJobFamily,
     UploadLimitExceeded,
 )
-from src.ai.resume_analyzer import AIResumeAnalyzer
-from src.ai.schemas import ResumeAnalysisResponse
-from src.config import settings
-from src.database import get_db
+from src.ai.extraction import text_extractor
+from src.ai.groq_client import groq_chat
+from src.ai.optimize_cache import optimize_cache
+from src.ai.quota import QuotaKind, quota_counter
+from src.ai.resume_analyzer import resume_analyzer
+from src.ai.schemas import ResumeAnalysisResponse, ResumeText
+from src.ai.scoring import scoring_engine
 
 logger = getLogger(__name__)
 
@@ -28,121 +33,158 @@ MAX_FILE_SIZE: int = 8 * 1024 * 1024  # 8MB
 
 
 async def check_and_update_request_limit(user_id: str) -> None:
-    async with get_db() as db:
-        now: datetime = datetime.now()
-        ai_request = await db.ai_request.find_first(where={"user_id": user_id})
-
-        if not ai_request:
-            # No entry, create and initialize for current month
-            await db.ai_request.create(
-                data={
-                    "user_id": user_id,
-                    "request_count": 1,
-                    "init_request_at": now,
-                    "last_request_at": now,
-                }
-            )
-        else:
-            init_month: int = ai_request.init_request_at.month
-            init_year: int = ai_request.init_request_at.year
-            now_month: int = now.month
-            now_year: int = now.year
-
-            if (init_year != now_year) or (init_month != now_month):
-                # New month, reset count and update init_request_at
-                await db.ai_request.update(
-                    where={"id": ai_request.id},
-                    data={
-                        "request_count": 1,
-                        "init_request_at": now,
-                        "last_request_at": now,
-                    },
-                )
-            elif ai_request.request_count >= AI_USAGE_LIMIT:
-                # Same month, limit exceeded
-                raise RequestLimitExceeded()
-            else:
-                # Same month, increment count
-                await db.ai_request.update(
-                    where={"id": ai_request.id},
-                    data={
-                        "request_count": ai_request.request_count + 1,
-                        "last_request_at": now,
-                    },
-                )
+    await quota_counter.consume(QuotaKind.request, user_id)
 
 
 async def check_and_update_upload_limit(user_id: str) -> None:
-    async with get_db() as db:
-        now: datetime = datetime.now()
-        ai_request = await db.ai_request.find_first(where={"user_id": user_id})
-
-        if not ai_request:
-            # No entry, create and initialize for current month
-            await db.ai_request.create(
-                data={
-                    "user_id": user_id,
-                    "upload_count": 1,
-                    "init_upload_at": now,
-                    "last_upload_at": now,
-                    "request_count": 0,
-                    "init_request_at": now,
-                    "last_request_at": now,
-                }
-            )
-        else:
-            init_month: int = ai_request.init_upload_at.month
-            init_year: int = ai_request.init_upload_at.year
-            now_month: int = now.month
-            now_year: int = now.year
-
-            if (init_year != now_year) or (init_month != now_month):
-                # New month, reset upload count and update init_upload_at
-                await db.ai_request.update(
-                    where={"id": ai_request.id},
-                    data={
-                        "upload_count": 1,
-                        "init_upload_at": now,
-                        "last_upload_at": now,
-                    },
-                )
-            elif ai_request.upload_count >= UPLOAD_USAGE_LIMIT:
-                # Same month, upload limit exceeded
-                raise UploadLimitExceeded()
-            else:
-                # Same month, increment upload count
-                await db.ai_request.update(
-                    where={"id": ai_request.id},
-                    data={
-                        "upload_count": ai_request.upload_count + 1,
-                        "last_upload_at": now,
-                    },
-                )
-
-
-async def optimize_text(user_id: str, description: str) -> str:
+    await quota_counter.consume(QuotaKind.upload, user_id)
+
+
+async def refund_request(user_id: str) -> None:
+    await quota_counter.refund(QuotaKind.request, user_id)
+
+
+def optimization_messages(description: str) -> List[ChatCompletionMessageParam]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": description},
+    ]
+
+
+async def optimize_text(
+    user_id: str, description: str, regenerate: bool = False
+) -> str:
+    """
+    Optimize a resume description.
+
+    Results are cached by description; a cached result is returned without a
+    model call and without using the user's quota unless `regenerate` is set.
+    """
+    if len(description) > REQUEST_LENGTH_LIMIT:
+        raise RequestLengthExceeded()
+    if not regenerate:
+        cached = await optimize_cache.get(description)
+        if cached is not None:
+            return cached
+    await check_and_update_request_limit(user_id)
+
+    try:
+        text = await groq_chat.complete(
+            MODEL,
+            optimization_messages(description),
+            temperature=1,
+            max_completion_tokens=1024,
+            top_p=1,
+        )
+    except Exception:
+        # Busy or failed calls don't use the quota
+        await refund_request(user_id)
+        raise
+    if text:
+        await optimize_cache.set(description, text)
+    return text
+
+
+async def stream_optimized_text(
+    user_id: str, description: str, regenerate: bool = False
+) -> AsyncGenerator[str, None]:
+    """
+    Same checks, caching and quota accounting as `optimize_text`, but returns
+    the optimized text as an iterator of tokens as the model produces them.
+    """
     if len(description) > REQUEST_LENGTH_LIMIT:
         raise RequestLengthExceeded()
+    if not regenerate:
+        cached = await optimize_cache.get(description)
+        if cached is not None:
+            return replay(cached)
     await check_and_update_request_limit(user_id)
 
-    client: Groq = Groq(api_key=settings.GROQ_API_KEY)
-    completion = client.chat.completions.create(
-        model=MODEL,
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": description},
-        ],
-        temperature=1,
-        max_completion_tokens=1024,
-        top_p=1,
-        stream=False,
-        stop=None,
+    try:
+        tokens = await groq_chat.stream(
+            MODEL,
+            optimization_messages(description),
+            temperature=1,
+            max_completion_tokens=1024,
+            top_p=1,
+        )
+    except Exception:
+        await refund_request(user_id)
+        raise
+    return cache_when_complete(description, tokens)
+
+
+async def replay(text: str) -> AsyncGenerator[str, None]:
+    yield text
+
+
+async def cache_when_complete(
+    description: str, tokens: AsyncGenerator[str, None]
+) -> AsyncGenerator[str, None]:
+    """Pass tokens through and cache the text once the stream has finished."""
+    parts: List[str] = []
+    try:
+        async for token in tokens:
+            parts.append(token)
+            yield token
+    finally:
+        await tokens.aclose()
+    if parts:
+        await optimize_cache.set(description, "".join(parts))
+
+
+def resume_file_kind(file: UploadFile) -> Optional[str]:
+    filename = (file.filename or "").lower()
+    # Accept both application/pdf and application/octet-stream for PDF
+    if file.content_type in [
+        "application/pdf",
+        "application/octet-stream",
+    ] or filename.endswith(".pdf"):
+        return "pdf"
+    if file.content_type in [
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "application/msword",
+    ] or filename.endswith(".docx"):
+        return "docx"
+    return None
+
+
+def analysis_response(
+    result: Dict[str, Any], extracted: ResumeText
+) -> ResumeAnalysisResponse:
+    """Map the analyzer's result, including computed scores, to the response."""
+    return ResumeAnalysisResponse(
+        overall_assessment=result.get("overall_assessment"),
+        skills=result.get("skills"),
+        missing_skills=result.get("missing_skills"),
+        experience_summary=result.get("experience_summary"),
+        education_summary=result.get("education_summary"),
+        strengths=result.get("strengths"),
+        weaknesses=result.get("weaknesses"),
+        recommended_courses=result.get("recommendations"),
+        resume_score=result.get("resume_score"),
+        ats_score=result.get("ats_score"),
+        keyword_match_score=result.get("keyword_match_score"),
+        formatting_score=result.get("formatting_score"),
+        job_family=result.get("job_family"),
+        matched_terms=result.get("matched_terms"),
+        page_count=extracted.page_count,
+        pages_extracted=extracted.pages_extracted,
+        extraction_ms=extracted.extraction_ms,
+        analysis_pending=result.get("analysis_pending", False),
     )
 
-    return completion.choices[0].message.content or ""
 
+async def analyze_resume_file(
+    user_id: str, file: UploadFile, job_family: Optional[str] = None
+) -> JSONResponse:
+    """
+    Analyze an uploaded resume, scoring its keywords for `job_family`.
 
-async def analyze_resume_file(user_id: str, file: UploadFile) -> JSONResponse:
+    Analyses are cached by file and by extracted text. A cached analysis is
+    returned without extraction (for the same file), model call or use of the
+    upload quota.
+    """
     contents: bytes = await file.read()
     if len(contents) > MAX_FILE_SIZE:
         return JSONResponse(
@@ -151,46 +193,64 @@ async def analyze_resume_file(user_id: str, file: UploadFile) -> JSONResponse:
                 "error": "Uploaded file is too large. Maximum allowed size is 8MB."
             },
         )
+    kind = resume_file_kind(file)
+    if kind is None:
+        return JSONResponse(
+            status_code=400,
+            content={"error": "Unsupported file type. Please upload PDF or DOCX."},
+        )
+    job_family = job_family or DEFAULT_JOB_FAMILY
+    if job_family not in scoring_engine.job_families:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "error": UnknownJobFamily().message,
+                "job_families": scoring_engine.families(),
+            },
+        )
     try:
-        await check_and_update_upload_limit(user_id)
-        analyzer = AIResumeAnalyzer()
-        resume_text: str = ""
-        # Accept both application/pdf and application/octet-stream for PDF
-        if file.content_type in ["application/pdf", "application/octet-stream"] or (
-            file.filename is not None and file.filename.lower().endswith(".pdf")
-        ):
-            extracted = analyzer.extract_text_from_pdf(contents)
-            resume_text = extracted if isinstance(extracted, str) else ""
-        elif file.content_type in [
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            "application/msword",
-        ] or (file.filename is not None and file.filename.lower().endswith(".docx")):
-            extracted = analyzer.extract_text_from_docx(file)
-            resume_text = extracted if isinstance(extracted, str) else ""
+        file_hash = file_fingerprint(contents, job_family)
+        cached = await analysis_cache.get_by_file(file_hash)
+        if cached is not None:
+            return JSONResponse(status_code=200, content=cached.model_dump())
+
+        if kind == "pdf":
+            extracted = await text_extractor.extract_pdf(contents)
         else:
-            return JSONResponse(
-                status_code=400,
-                content={"error": "Unsupported file type. Please upload PDF or DOCX."},
-            )
-        result = analyzer.analyze_resume_with_gemini(resume_text)
-        # Map result to ResumeAnalysisResponse, including computed scores
-        response = ResumeAnalysisResponse(
-            overall_assessment=result.get("overall_assessment"),
-            skills=result.get("skills"),
-            missing_skills=result.get("missing_skills"),
-            experience_summary=result.get("experience_summary"),
-            education_summary=result.get("education_summary"),
-            strengths=result.get("strengths"),
-            weaknesses=result.get("weaknesses"),
-            recommended_courses=result.get("recommendations"),
-            resume_score=result.get("resume_score"),
-            ats_score=result.get("ats_score"),
-            keyword_match_score=result.get("keyword_match_score"),
-            formatting_score=result.get("formatting_score"),
+            extracted = await text_extractor.extract_docx(contents)
+        logger.info(
+            f"Extracted {extracted.pages_extracted}/{extracted.page_count} pages "
+            f"in {extracted.extraction_ms}ms ({extracted.total_ms}ms total)"
+        )
+        text_hash = text_fingerprint(extracted.text, job_family)
+        cached = await analysis_cache.get_by_text(text_hash)
+        if cached is not None:
+            return JSONResponse(status_code=200, content=cached.model_dump())
+
+        # A re-upload while the first analysis is still running joins it
+        # without using quota
+        if not resume_analyzer.in_flight(text_hash):
+            await check_and_update_upload_limit(user_id)
+
+        async def cache_late_result(result: Dict[str, Any]) -> None:
+            # Gemini missed the deadline; keep its answer for the next upload
+            if "error" not in result:
+                response = analysis_response(result, extracted)
+                await analysis_cache.set(file_hash, text_hash, response)
+
+        result = await resume_analyzer.analyze_resume_with_gemini(
+            extracted.text, job_family, on_late_result=cache_late_result, key=text_hash
         )
+        response = analysis_response(result, extracted)
+        # Failed analyses are not cached so the next upload tries again, and
+        # pending ones are cached by cache_late_result once Gemini answers
+        if "error" not in result and not response.analysis_pending:
+            await analysis_cache.set(file_hash, text_hash, response)
         return JSONResponse(status_code=200, content=response.model_dump())
     except UploadLimitExceeded as e:
         return JSONResponse(status_code=429, content={"error": e.message})
+    except (ResumeExtractionFailed, ResumeExtractionBusy) as e:
+        return JSONResponse(status_code=e.status_code, content={"error": e.message})
     except Exception as e:
         logger.error(f"Unexpected error during resume analysis: {e}")
         return JSONResponse(status_code=500, content={"error": "Internal server error"})
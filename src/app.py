@@ -1,13 +1,22 @@
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 
+from src.ai.extraction import text_extractor
+from src.ai.groq_client import groq_chat
+from src.ai.quota import quota_counter
+from src.ai.resume_analyzer import resume_analyzer
 from src.ai.router import router as ai_router
 from src.auth.router import router as auth_router
 from src.certificate.router import router as certificate_router
 from src.constants import API_PREFIX, VERSION, headers, methods, origins
+from src.cv.generator import template_registry
 from src.cv.router import router as cv_router
+from src.cv.service import compile_queue
 from src.database import lifespan
 from src.education.router import router as education_router
 from src.middlewares import (
@@ -16,6 +25,7 @@ from src.middlewares import (
     validation_exception_handler,
 )
 from src.opeanapi import inject_global_bearer_auth
+from src.portfolio.images import image_optimizer
 from src.portfolio.router import router as portfolio_router
 from src.users.router import router as user_router
 
@@ -70,6 +80,28 @@ def add_exception_handlers(app: FastAPI) -> None:
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
 
 
+@asynccontextmanager
+async def app_lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    """
+    Run the shared lifespan plus CV template loading and compile workers, and
+    finish background resume analyses, flush pending AI usage writes, close
+    the Groq client and stop the text extraction and image workers on
+    shutdown.
+    """
+    async with lifespan(app):
+        template_registry.load_all()
+        compile_queue.start()
+        try:
+            yield
+        finally:
+            await compile_queue.stop()
+            await resume_analyzer.drain()
+            await quota_counter.drain()
+            await groq_chat.close()
+            text_extractor.shutdown()
+            image_optimizer.shutdown()
+
+
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application."""
     app = FastAPI(
@@ -82,7 +114,7 @@ def create_app() -> FastAPI:
         },
         docs_url="/api/v1/docs",
         redoc_url="/api/v1/redoc",
-        lifespan=lifespan,
+        lifespan=app_lifespan,
     )
     add_middlewares(app)
     include_routers(app)
@@ -8,3 +8,4 @@ USER_ALREADY_EXISTS = "User already exists"
 USER_NOT_FOUND = "User not found"
 USERNAME_UNAVAILABLE = "Username is already taken"
 EMAIL_UNAVAILABLE = "Account with this email already exists"
+ADMIN_ONLY = "Only administrators can perform this action."
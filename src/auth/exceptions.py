@@ -1,4 +1,5 @@
 from src.auth.constants import (
+    ADMIN_ONLY,
     EMAIL_UNAVAILABLE,
     USER_ALREADY_EXISTS,
     USER_NOT_FOUND,
@@ -36,3 +37,11 @@ class EmailUnavailableException(Exception):
     def __init__(self) -> None:
         super().__init__(EMAIL_UNAVAILABLE)
         self.status_code = 400
+
+
+class AdminOnlyException(Exception):
+    """Raised when a non-admin calls an admin-only endpoint."""
+
+    def __init__(self) -> None:
+        super().__init__(ADMIN_ONLY)
+        self.status_code = 403
@@ -1,11 +1,17 @@
 from logging import getLogger
+from typing import Any, Dict
 
 from fastapi import APIRouter, HTTPException, Request, status
 from fastapi.security import HTTPBearer
 
-from src.auth.exceptions import UserAlreadyExistsError
+from src.auth.exceptions import AdminOnlyException, UserAlreadyExistsError
 from src.auth.schemas import AuthResponse, SignupResponse, UserCreate
-from src.auth.service import create_user, generate_username, get_user_by_uid
+from src.auth.service import (
+    create_user,
+    generate_username,
+    get_token_cache_stats,
+    get_user_by_uid,
+)
 
 logger = getLogger(__name__)
 
@@ -92,3 +98,16 @@ async def signin(
         return AuthResponse(message="User created and signed in")
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+
+
+@router.get(
+    "/token-cache/stats",
+    summary="Verified-token cache statistics",
+    description="Returns hit/miss counters of the in-process Firebase token cache and the estimated verification time saved. Admin only.",
+    status_code=status.HTTP_200_OK,
+)
+async def token_cache_stats(request: Request) -> Dict[str, Any]:
+    try:
+        return get_token_cache_stats(request.state.user.get("uid", ""))
+    except AdminOnlyException as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
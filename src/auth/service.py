@@ -1,15 +1,19 @@
 import secrets
 from datetime import datetime
 from logging import getLogger
+from typing import Any, Dict
 
 from codename import codename  # type: ignore
 
 from src.auth.exceptions import (
+    AdminOnlyException,
     EmailUnavailableException,
     UserAlreadyExistsError,
     UsernameUnavailableException,
 )
 from src.auth.schemas import SignupResponse, UserCreate
+from src.auth.token_cache import token_cache
+from src.config import settings
 from src.database import get_db
 
 logger = getLogger(__name__)
@@ -95,3 +99,10 @@ async def generate_username() -> str:
         while await db.user.find_unique(where={"username": username}):
             username = f"{codename(separator='_')}_{100 + secrets.randbelow(900)}"
     return username
+
+
+def get_token_cache_stats(uid: str) -> Dict[str, Any]:
+    """Verified-token cache statistics. Restricted to admins."""
+    if uid not in settings.ADMIN_UIDS:
+        raise AdminOnlyException()
+    return token_cache.stats()
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from logging import getLogger
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from redis.asyncio import Redis
+
+from src.config import settings
+from src.database import redis_client
+
+logger = getLogger(__name__)
+
+REDIS_TOKEN_PREFIX = "auth:token:"
+# Entries are dropped slightly before the token's own `exp` so a cached
+# identity is never served for a token Firebase would already reject.
+EXPIRY_MARGIN_SECONDS = 5
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of verified Firebase ID tokens.
+
+    Tokens are keyed by their SHA-256 hash and kept only until their `exp`
+    claim. An optional Redis tier lets all workers share verified identities.
+    """
+
+    def __init__(self, max_size: int, redis: Optional[Redis] = None) -> None:
+        self.max_size = max_size
+        self.redis = redis
+        self._entries: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.verify_seconds = 0.0
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _expires_at(claims: Dict[str, Any]) -> Optional[float]:
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            return None
+        return float(exp) - EXPIRY_MARGIN_SECONDS
+
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return claims
+
+    def _set_local(self, key: str, expires_at: float, claims: Dict[str, Any]) -> None:
+        self._entries[key] = (expires_at, claims)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def _get_shared(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(f"{REDIS_TOKEN_PREFIX}{key}")
+        except Exception as e:
+            logger.warning(f"Token cache Redis lookup failed: {e}")
+            return None
+        if not raw:
+            return None
+        claims: Dict[str, Any] = json.loads(raw)
+        return claims
+
+    async def _set_shared(
+        self, key: str, expires_at: float, claims: Dict[str, Any]
+    ) -> None:
+        if self.redis is None:
+            return
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return
+        try:
+            await self.redis.set(
+                f"{REDIS_TOKEN_PREFIX}{key}", json.dumps(claims), ex=ttl
+            )
+        except Exception as e:
+            logger.warning(f"Token cache Redis write failed: {e}")
+
+    async def verify(
+        self, token: str, verifier: Callable[[str], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Return the decoded claims for a token, calling `verifier` only on a miss.
+
+        Verification errors are propagated and never cached.
+        """
+        key = self._hash(token)
+
+        claims = self._get_local(key)
+        if claims is not None:
+            self.hits += 1
+            return claims
+
+        claims = await self._get_shared(key)
+        if claims is not None:
+            expires_at = self._expires_at(claims)
+            if expires_at is not None and expires_at > time.time():
+                self.redis_hits += 1
+                self._set_local(key, expires_at, claims)
+                return claims
+
+        self.misses += 1
+        started = time.perf_counter()
+        decoded = dict(verifier(token))
+        self.verify_seconds += time.perf_counter() - started
+
+        expires_at = self._expires_at(decoded)
+        if expires_at is not None and expires_at > time.time():
+            self._set_local(key, expires_at, decoded)
+            await self._set_shared(key, expires_at, decoded)
+        return decoded
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and an estimate of the verification time saved."""
+        lookups = self.hits + self.redis_hits + self.misses
+        avg_verify_ms = (
+            (self.verify_seconds / self.misses * 1000) if self.misses else 0.0
+        )
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.redis_hits) / lookups if lookups else 0.0,
+            "avg_verify_ms": round(avg_verify_ms, 3),
+            "estimated_saved_ms": round(
+                (self.hits + self.redis_hits) * avg_verify_ms, 3
+            ),
+        }
+
+
+token_cache = VerifiedTokenCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    redis=redis_client if settings.TOKEN_CACHE_REDIS_ENABLED else None,
+)
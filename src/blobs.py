@@ -0,0 +1,179 @@
+import hashlib
+from collections import Counter
+from datetime import timedelta
+from logging import getLogger
+from typing import Callable, Dict, List, Sequence
+
+from src.database import Storage
+from src.prisma_client import Prisma
+from src.signed_urls import signed_url_cache
+
+logger = getLogger(__name__)
+
+BLOB_PATH_PREFIX = "blobs/"
+# Unreferenced blobs stay locked while their objects are removed
+BLOB_GC_TIMEOUT = timedelta(seconds=30)
+
+# Takes a reference, creating the row on first use; tells whether the
+# content has already been uploaded
+ACQUIRE_BLOB_QUERY = """
+INSERT INTO "Blob" (bucket, path, ref_count, stored, created_at, updated_at)
+VALUES ($1, $2, 1, false, now(), now())
+ON CONFLICT (bucket, path)
+DO UPDATE SET ref_count = "Blob".ref_count + 1, updated_at = now()
+RETURNING stored
+"""
+
+# An upload of the same content waits on the lock and, once the row is gone,
+# creates it afresh and uploads the content again
+LOCK_UNREFERENCED_BLOBS_QUERY = """
+SELECT path FROM "Blob"
+WHERE bucket = $1 AND path IN ({paths}) AND ref_count <= 0
+FOR UPDATE SKIP LOCKED
+"""
+
+# The storage objects a blob path stands for
+ObjectPaths = Callable[[str], List[str]]
+
+
+def single_object(path: str) -> List[str]:
+    return [path]
+
+
+def content_digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def blob_path(digest: str, suffix: str) -> str:
+    return f"{BLOB_PATH_PREFIX}{digest[:2]}/{digest}{suffix}"
+
+
+def is_blob_path(path: str) -> bool:
+    """Objects stored before blobs were introduced are not reference counted."""
+    return path.startswith(BLOB_PATH_PREFIX)
+
+
+async def acquire_blob(db: Prisma, bucket: str, path: str) -> bool:
+    """Take a reference to a blob. Returns whether its content is stored."""
+    rows = await db.query_raw(ACQUIRE_BLOB_QUERY, bucket, path)
+    return bool(rows[0]["stored"])
+
+
+async def mark_blob_stored(db: Prisma, bucket: str, path: str) -> None:
+    await db.blob.update_many(
+        where={"bucket": bucket, "path": path}, data={"stored": True}
+    )
+
+
+async def store_blob(
+    db: Prisma,
+    storage: Storage,
+    bucket: str,
+    content: bytes,
+    content_type: str,
+    suffix: str,
+) -> str:
+    """
+    Store `content` under its SHA-256 and take a reference to it.
+
+    Returns the blob's storage path. Content that is already stored is not
+    uploaded again. If the upload fails, the reference is dropped.
+    """
+    path = blob_path(content_digest(content), suffix)
+    return await store_blob_at(db, storage, bucket, path, content, content_type)
+
+
+async def store_blob_at(
+    db: Prisma,
+    storage: Storage,
+    bucket: str,
+    path: str,
+    content: bytes,
+    content_type: str,
+) -> str:
+    """Like `store_blob`, for content addressed by a key of the caller's."""
+    if await acquire_blob(db, bucket, path):
+        return path
+    try:
+        await storage.upload(bucket, path, content, content_type, upsert=True)
+        await mark_blob_stored(db, bucket, path)
+    except Exception:
+        await release_blobs(db, storage, bucket, [path])
+        raise
+    return path
+
+
+async def release_blobs(
+    db: Prisma,
+    storage: Storage,
+    bucket: str,
+    paths: Sequence[str],
+    objects: ObjectPaths = single_object,
+) -> None:
+    """
+    Drop one reference to each blob in `paths` (a path listed twice drops
+    two) and remove the blobs no longer referenced.
+
+    Paths stored before blobs were introduced are removed straight away.
+    """
+    legacy = [path for path in paths if not is_blob_path(path)]
+    legacy_objects = [obj for path in legacy for obj in objects(path)]
+    if legacy_objects:
+        await storage.remove(bucket, legacy_objects)
+        await signed_url_cache.invalidate(bucket, legacy_objects)
+
+    released = Counter(path for path in paths if is_blob_path(path))
+    if not released:
+        return
+    # One update per distinct count, i.e. usually a single one
+    by_count: Dict[int, List[str]] = {}
+    for path, count in released.items():
+        by_count.setdefault(count, []).append(path)
+    for count, group in by_count.items():
+        await db.blob.update_many(
+            where={"bucket": bucket, "path": {"in": group}},
+            data={"ref_count": {"decrement": count}},
+        )
+    await collect_blobs(db, storage, bucket, list(released), objects)
+
+
+async def collect_blobs(
+    db: Prisma,
+    storage: Storage,
+    bucket: str,
+    paths: List[str],
+    objects: ObjectPaths = single_object,
+) -> None:
+    """
+    Remove the blobs in `paths` that are no longer referenced.
+
+    Their rows are first marked as not stored, so an upload of the same
+    content racing with the removal stores it again instead of relying on
+    objects about to disappear. Failures are logged and leave the rows in
+    place, to be collected when the blob is next released.
+    """
+    placeholders = ", ".join(f"${i}" for i in range(2, len(paths) + 2))
+    removed: List[str] = []
+    try:
+        await db.blob.update_many(
+            where={"bucket": bucket, "path": {"in": paths}, "ref_count": {"lte": 0}},
+            data={"stored": False},
+        )
+        async with db.tx(timeout=BLOB_GC_TIMEOUT) as tx:
+            rows = await tx.query_raw(
+                LOCK_UNREFERENCED_BLOBS_QUERY.format(paths=placeholders),
+                bucket,
+                *paths,
+            )
+            unreferenced = [str(row["path"]) for row in rows]
+            if unreferenced:
+                removed = [obj for path in unreferenced for obj in objects(path)]
+                await storage.remove(bucket, removed)
+                await tx.blob.delete_many(
+                    where={"bucket": bucket, "path": {"in": unreferenced}}
+                )
+    except Exception as e:
+        logger.warning(f"Failed to collect unreferenced blobs: {e}")
+        return
+    if removed:
+        await signed_url_cache.invalidate(bucket, removed)
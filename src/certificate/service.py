@@ -1,24 +1,29 @@
+import asyncio
 import os
 from datetime import date, datetime
 from logging import getLogger
-from typing import Dict, List, Optional, Union
-from uuid import uuid4
+from typing import Dict, List, Optional, Tuple, Union
 
 from starlette.datastructures import UploadFile
-from supabase import Client
 
+from src.blobs import release_blobs, store_blob
 from src.certificate.exceptions import (
     CertificateNotFoundException,
     CertificateUploadException,
 )
 from src.certificate.schemas import CertificateFormData, CertificateOut
-from src.database import get_db, get_supabase
+from src.cv.preview_cache import invalidate_static_data
+from src.database import Storage, get_db, get_storage
+from src.portfolio.public_cache import invalidate_public_portfolios
 from src.prisma_client import Prisma
+from src.signed_urls import signed_url_cache
 
 logger = getLogger(__name__)
 
 STORAGE_BUCKET = "certificates"
 MAX_FILE_SIZE_MB = 5
+# Uploads in flight per batch
+UPLOAD_CONCURRENCY = 4
 
 # Date validation messages
 DATE_FUTURE_ERROR = "Certificate issue date cannot be in the future."
@@ -26,35 +31,47 @@ DATE_FORMAT_ERROR = "Invalid issued_date format. Use YYYY-MM-DD."
 DATE_RANGE_ERROR = "Certificate issue date must be from 1900 onwards."
 
 
-def generate_signed_url(
-    supabase: Client, path: str, storage_bucket: str, expires: int = 3600
-) -> str:
-    result = supabase.storage.from_(storage_bucket).create_signed_url(
-        path, expires_in=expires
-    )
-    signed_url = result.get("signedURL") or ""
-    if not signed_url:
+async def generate_signed_urls(
+    storage: Storage, paths: List[str], storage_bucket: str, expires: int = 3600
+) -> Dict[str, str]:
+    """Signed URLs for `paths`, keyed by path, in at most one storage call."""
+    signed = await signed_url_cache.sign_many(storage, storage_bucket, paths, expires)
+    if len(signed) < len(set(paths)):
         raise CertificateUploadException("Failed to generate signed URL.")
-    return signed_url
+    return signed
 
 
-async def upload_file_to_supabase(
-    supabase: Client, uid: str, file: UploadFile, storage_bucket: str
+async def generate_signed_url(
+    storage: Storage, path: str, storage_bucket: str, expires: int = 3600
 ) -> str:
+    signed = await generate_signed_urls(storage, [path], storage_bucket, expires)
+    return signed[path]
+
+
+async def read_certificate_file(file: UploadFile) -> Tuple[str, bytes]:
     filename = file.filename or ""
     contents = await file.read()
     validate_file(filename, contents)
-    ext = os.path.splitext(filename)[1].lower()
-    unique_filename = f"{uid}/{uuid4()}{ext}"
+    return filename, contents
+
 
+async def store_certificate_file(
+    db: Prisma, storage: Storage, contents: bytes, storage_bucket: str
+) -> str:
+    """Store a certificate as a blob; identical files share one object."""
     try:
-        supabase.storage.from_(storage_bucket).upload(
-            unique_filename, contents, {"content-type": "application/pdf"}
+        return await store_blob(
+            db, storage, storage_bucket, contents, "application/pdf", ".pdf"
         )
     except Exception:
         raise CertificateUploadException()
 
-    return unique_filename
+
+async def upload_file_to_supabase(
+    db: Prisma, storage: Storage, file: UploadFile, storage_bucket: str
+) -> str:
+    _, contents = await read_certificate_file(file)
+    return await store_certificate_file(db, storage, contents, storage_bucket)
 
 
 async def get_certificate_or_404(db: Prisma, uid: str, cert_id: int) -> CertificateOut:
@@ -113,38 +130,90 @@ def validate_and_format_date(date_str: str) -> str:
 async def process_certificate_uploads(
     uid: str, certs: List[CertificateFormData]
 ) -> None:
-    async with get_db() as db, get_supabase() as supabase:
-        for cert in certs:
-            # 1) Validate and format date
-            full_dt = validate_and_format_date(cert["issued_date"])
-
-            # 2) Upload file
-            path = await upload_file_to_supabase(
-                supabase, uid, cert["file"], STORAGE_BUCKET
-            )
+    """
+    Upload a batch of certificates and create their records.
 
-            # 3) Create record
-            await db.certification.create(
-                data={
-                    "user_id": uid,
-                    "title": cert["title"],
-                    "issuer": cert["issuer"],
-                    "issued_date": full_dt,  # ISO-8601 DateTime string
-                    "link": path,
-                }
+    Every entry is validated before anything is uploaded. Files are uploaded
+    concurrently (at most UPLOAD_CONCURRENCY at a time) and the records are
+    inserted in a single transaction; if any step fails, the files stored
+    for the batch are released again.
+    """
+    # 1) Validate dates and files up front
+    prepared: List[Tuple[CertificateFormData, str, bytes]] = []
+    for cert in certs:
+        full_dt = validate_and_format_date(cert["issued_date"])
+        _, contents = await read_certificate_file(cert["file"])
+        prepared.append((cert, full_dt, contents))
+
+    async with get_db() as db, get_storage() as storage:
+        semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+        uploaded: List[str] = []
+
+        async def upload(contents: bytes) -> str:
+            async with semaphore:
+                path = await store_certificate_file(
+                    db, storage, contents, STORAGE_BUCKET
+                )
+            uploaded.append(path)
+            return path
+
+        try:
+            # 2) Upload files; wait for all of them so none outlive a failure
+            results = await asyncio.gather(
+                *(upload(contents) for _, _, contents in prepared),
+                return_exceptions=True,
             )
+            paths: List[str] = []
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+                paths.append(result)
+
+            # 3) Create records
+            async with db.tx() as tx:
+                await tx.certification.create_many(
+                    data=[
+                        {
+                            "user_id": uid,
+                            "title": cert["title"],
+                            "issuer": cert["issuer"],
+                            "issued_date": full_dt,  # ISO-8601 DateTime string
+                            "link": path,
+                        }
+                        for (cert, full_dt, _), path in zip(prepared, paths)
+                    ]
+                )
+        except Exception:
+            await release_uploaded_files(db, storage, uploaded)
+            raise
+        await invalidate_static_data(uid)
+        await invalidate_public_portfolios(uid)
+
+
+async def release_uploaded_files(
+    db: Prisma, storage: Storage, paths: List[str]
+) -> None:
+    if not paths:
+        return
+    try:
+        await release_blobs(db, storage, STORAGE_BUCKET, paths)
+    except Exception:
+        logger.exception(f"Failed to clean up uploaded certificates: {paths}")
 
 
 async def get_user_certificates(uid: str) -> List[CertificateOut]:
-    async with get_db() as db, get_supabase() as supabase:
+    async with get_db() as db, get_storage() as storage:
         certs = await db.certification.find_many(where={"user_id": uid})
+        links = await generate_signed_urls(
+            storage, [cert.link for cert in certs], STORAGE_BUCKET
+        )
         return [
             CertificateOut(
                 id=cert.id,
                 title=cert.title,
                 issuer=cert.issuer,
                 issued_date=format_date_for_output(cert.issued_date),
-                link=generate_signed_url(supabase, cert.link, STORAGE_BUCKET),
+                link=links[cert.link],
             )
             for cert in certs
         ]
@@ -158,7 +227,7 @@ async def update_user_certificate(
     issued_date: Optional[str],
     file: Optional[UploadFile],
 ) -> CertificateOut:
-    async with get_db() as db, get_supabase() as supabase:
+    async with get_db() as db, get_storage() as storage:
         cert = await get_certificate_or_404(db, uid, cert_id)
 
         update_data: Dict[str, object] = {}
@@ -173,31 +242,67 @@ async def update_user_certificate(
             iso_dt = validate_and_format_date(issued_date)
             update_data["issued_date"] = iso_dt
 
+        link: Optional[str] = None
         if file:
-            supabase.storage.from_(STORAGE_BUCKET).remove([cert.link])
-            update_data["link"] = await upload_file_to_supabase(
-                supabase, uid, file, STORAGE_BUCKET
-            )
+            link = await upload_file_to_supabase(db, storage, file, STORAGE_BUCKET)
+            update_data["link"] = link
 
         if not update_data:
             raise CertificateUploadException("No fields provided to update")
 
-        updated = await db.certification.update(where={"id": cert_id}, data=update_data)
+        if link is None:
+            updated = await db.certification.update(
+                where={"id": cert_id}, data=update_data
+            )
+        else:
+            try:
+                replaced = await swap_certificate_link(
+                    db, uid, cert_id, cert.link, update_data
+                )
+            except Exception:
+                await release_uploaded_files(db, storage, [link])
+                raise
+            # The replaced file goes once nothing else refers to it
+            await release_blobs(db, storage, STORAGE_BUCKET, [replaced])
+            updated = await db.certification.find_unique(where={"id": cert_id})
+            if updated is None:
+                raise CertificateNotFoundException()
+        await invalidate_static_data(uid)
+        await invalidate_public_portfolios(uid)
 
         return CertificateOut(
             id=updated.id,
             title=updated.title,
             issuer=updated.issuer,
             issued_date=format_date_for_output(updated.issued_date),
-            link=generate_signed_url(supabase, updated.link, STORAGE_BUCKET),
+            link=await generate_signed_url(storage, updated.link, STORAGE_BUCKET),
         )
 
 
+async def swap_certificate_link(
+    db: Prisma, uid: str, cert_id: int, link: str, data: Dict[str, object]
+) -> str:
+    """
+    Apply an update that replaces a certificate's file; returns the link it
+    replaced.
+
+    The row is only updated while its link is still the one last read, so of
+    two concurrent replacements each releases exactly the file it replaced.
+    """
+    while not await db.certification.update_many(
+        where={"id": cert_id, "link": link}, data=data
+    ):
+        link = (await get_certificate_or_404(db, uid, cert_id)).link
+    return link
+
+
 async def delete_user_certificate(uid: str, cert_id: int) -> None:
-    async with get_db() as db, get_supabase() as supabase:
+    async with get_db() as db, get_storage() as storage:
         cert = await get_certificate_or_404(db, uid, cert_id)
-        supabase.storage.from_(STORAGE_BUCKET).remove([cert.link])
         await db.certification.delete(where={"id": cert_id})
+        await release_blobs(db, storage, STORAGE_BUCKET, [cert.link])
+        await invalidate_static_data(uid)
+        await invalidate_public_portfolios(uid)
 
 
 def format_date_for_output(dt_obj: Union[datetime, date, str]) -> str:
@@ -17,8 +17,46 @@ class Settings(BaseSettings):
     REDIS_PORT: int = Field(default=6379)
     SUPABASE_PROJECT_URL: str = Field(default="your_supabase_project_url")
     SUPABASE_SERVICE_ROLE_KEY: str = Field(default="your_supabase_service_role_key")
+    STORAGE_BACKEND: str = Field(default="supabase")
+    STORAGE_LOCAL_ROOT: str = Field(default="storage")
+    STORAGE_MAX_CONCURRENCY: int = Field(default=8)
+    STORAGE_TIMEOUT_SECONDS: float = Field(default=30.0)
     GROQ_API_KEY: str = Field(default="your_groq_api_key")
+    GROQ_TIMEOUT_SECONDS: float = Field(default=30.0)
+    GROQ_CONNECT_TIMEOUT_SECONDS: float = Field(default=5.0)
+    GROQ_MAX_RETRIES: int = Field(default=3)
+    GROQ_MAX_CONNECTIONS: int = Field(default=20)
+    GROQ_MAX_CONCURRENCY: int = Field(default=8)
+    GROQ_QUEUE_TIMEOUT_SECONDS: float = Field(default=10.0)
+    AI_OPTIMIZE_CACHE_TTL_SECONDS: int = Field(default=7 * 24 * 3600)
+    AI_OPTIMIZE_CACHE_MAX_ENTRIES: int = Field(default=50000)
+    RESUME_EXTRACTION_WORKERS: int = Field(default=2)
+    RESUME_EXTRACTION_MAX_PAGES: int = Field(default=10)
+    RESUME_EXTRACTION_PAGE_TIMEOUT_SECONDS: float = Field(default=5.0)
+    RESUME_EXTRACTION_TIMEOUT_SECONDS: float = Field(default=30.0)
+    PORTFOLIO_IMAGE_WORKERS: int = Field(default=2)
+    PORTFOLIO_IMAGE_TIMEOUT_SECONDS: float = Field(default=20.0)
+    RESUME_ANALYSIS_CACHE_TTL_SECONDS: int = Field(default=30 * 24 * 3600)
+    # JSON object of job family -> keywords; the built-in sets when empty
+    RESUME_KEYWORDS_FILE: str = Field(default="")
     GOOGLE_API_KEY: str = Field(default="your_google_api_key")
+    GEMINI_MODEL: str = Field(default="gemini-1.5-flash")
+    GEMINI_DEADLINE_SECONDS: float = Field(default=15.0)
+    # Hard limit on a Gemini call, including one finishing in the background
+    GEMINI_TIMEOUT_SECONDS: float = Field(default=90.0)
+    GEMINI_DRAIN_TIMEOUT_SECONDS: float = Field(default=10.0)
+    GEMINI_MAX_CONCURRENCY: int = Field(default=8)
+    TOKEN_CACHE_MAX_SIZE: int = Field(default=10000)
+    TOKEN_CACHE_REDIS_ENABLED: bool = Field(default=False)
+    SIGNED_URL_CACHE_MAX_SIZE: int = Field(default=10000)
+    SIGNED_URL_CACHE_REDIS_ENABLED: bool = Field(default=True)
+    CV_COMPILE_BACKEND: str = Field(default="remote")
+    CV_COMPILE_WORKERS: int = Field(default=2)
+    CV_COMPILE_MAX_JOBS_PER_USER: int = Field(default=2)
+    CV_COMPILE_MAX_ATTEMPTS: int = Field(default=3)
+    CV_TEMPLATE_BYTECODE_CACHE_DIR: str = Field(default="")
+    CV_PREVIEW_FRAGMENT_CACHE_SIZE: int = Field(default=2048)
+    ADMIN_UIDS: list[str] = Field(default_factory=list)
 
 
 settings = Settings()
@@ -5,3 +5,8 @@ CV_NOT_FOUND = "CV not found."
 CV_INVALID_TYPE = "CV type must be either 'academic' or 'industry'."
 CV_INVALID_TEMPLATE = "CV template not found."
 DEFAULT_CV_TYPE = "academic"
+CV_GENERATION_LIMIT_EXCEEDED = (
+    "Too many CV PDFs are being generated for this user. Try again shortly."
+)
+CV_GENERATION_JOB_NOT_FOUND = "CV generation job not found."
+CV_ADMIN_ONLY = "Only administrators can perform this action."
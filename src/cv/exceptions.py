@@ -1,4 +1,7 @@
 from src.cv.constants import (
+    CV_ADMIN_ONLY,
+    CV_GENERATION_JOB_NOT_FOUND,
+    CV_GENERATION_LIMIT_EXCEEDED,
     CV_INVALID_TEMPLATE,
     CV_INVALID_TYPE,
     CV_NOT_FOUND,
@@ -32,3 +35,24 @@ class CVInvalidTemplateException(Exception):
         self.message = message
         self.status_code = 404
         super().__init__(self.message)
+
+
+class CVGenerationLimitException(Exception):
+    def __init__(self, message: str = CV_GENERATION_LIMIT_EXCEEDED) -> None:
+        self.message = message
+        self.status_code = 429
+        super().__init__(self.message)
+
+
+class CVGenerationJobNotFoundException(Exception):
+    def __init__(self, message: str = CV_GENERATION_JOB_NOT_FOUND) -> None:
+        self.message = message
+        self.status_code = 404
+        super().__init__(self.message)
+
+
+class CVAdminOnlyException(Exception):
+    def __init__(self, message: str = CV_ADMIN_ONLY) -> None:
+        self.message = message
+        self.status_code = 403
+        super().__init__(self.message)
@@ -1,11 +1,26 @@
+import hashlib
+import json
 import os
+from collections import OrderedDict
 from datetime import datetime
 from logging import getLogger
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Tuple
 
-import requests
-from jinja2 import Environment, FileSystemLoader
+import httpx
+from jinja2 import (
+    BytecodeCache,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    Template,
+    meta,
+    nodes,
+)
+from jinja2.runtime import Context
+from pydantic import BaseModel
 
 from src.certificate.schemas import CertificateOut
+from src.config import settings
 from src.cv.schemas import ExperienceIn, ProjectIn, PublicationIn, TechnicalSkillIn
 from src.education.schemas import EducationOut
 from src.users.schemas import UserProfile
@@ -14,6 +29,7 @@ TEMPLATE_DIR = "src/cv/templates"
 TEMPLATE_TEX_FILE = "template.tex"
 TEMPLATE_HTML_FILE = "template.html"
 LATEX_API_URL = "https://latex.ytotech.com/builds/sync"
+LATEX_API_TIMEOUT = 120.0
 
 logger = getLogger(__name__)
 
@@ -23,7 +39,9 @@ def format_date(value: str, fmt: str = "%b %Y") -> str:
     return datetime.fromisoformat(value).strftime(fmt)
 
 
-def create_jinja_environment(template: int) -> Environment:
+def create_jinja_environment(
+    template: int, bytecode_cache: Optional[BytecodeCache] = None
+) -> Environment:
     """Creates and configures a Jinja2 environment."""
     env = Environment(
         loader=FileSystemLoader(os.path.join(TEMPLATE_DIR, str(template))),
@@ -36,11 +54,160 @@ def create_jinja_environment(template: int) -> Environment:
         autoescape=True,
         trim_blocks=True,
         lstrip_blocks=True,
+        # Templates only change through TemplateRegistry.reload().
+        auto_reload=False,
+        bytecode_cache=bytecode_cache,
     )
     env.filters["format_date"] = format_date
     return env
 
 
+class TemplateRegistry:
+    """
+    Process-wide Jinja environments, one per CV template id.
+
+    Templates are parsed and compiled once and then served from memory. An
+    optional on-disk bytecode cache lets new processes skip compilation.
+
+    Rendered `block`s are memoized by a hash of the variables each block
+    reads, so a preview re-renders only the sections whose data changed.
+    """
+
+    def __init__(self, bytecode_cache_dir: str = "", fragment_cache_size: int = 0):
+        self.bytecode_cache: Optional[BytecodeCache] = None
+        if bytecode_cache_dir:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            self.bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+        self.fragment_cache_size = fragment_cache_size
+        self._environments: Dict[int, Environment] = {}
+        self._block_variables: Dict[Tuple[int, str], Dict[str, FrozenSet[str]]] = {}
+        self._fragments: OrderedDict[str, str] = OrderedDict()
+
+    @staticmethod
+    def template_ids() -> List[int]:
+        return sorted(
+            int(name)
+            for name in os.listdir(TEMPLATE_DIR)
+            if name.isdigit() and os.path.isdir(os.path.join(TEMPLATE_DIR, name))
+        )
+
+    def environment(self, template: int) -> Environment:
+        env = self._environments.get(template)
+        if env is None:
+            env = create_jinja_environment(template, self.bytecode_cache)
+            self._environments[template] = env
+        return env
+
+    def get_template(self, template: int, template_file: str) -> Template:
+        return self.environment(template).get_template(template_file)
+
+    def block_variables(
+        self, template: int, template_file: str
+    ) -> Dict[str, FrozenSet[str]]:
+        """Names of the template variables each block of a template reads."""
+        key = (template, template_file)
+        if key not in self._block_variables:
+            env = self.environment(template)
+            assert env.loader is not None
+            source, _, _ = env.loader.get_source(env, template_file)
+            self._block_variables[key] = {
+                block.name: frozenset(
+                    meta.find_undeclared_variables(
+                        nodes.Template(block.body).set_environment(env)
+                    )
+                )
+                for block in env.parse(source).find_all(nodes.Block)
+            }
+        return self._block_variables[key]
+
+    def _fragment_key(
+        self, template: int, template_file: str, block: str, values: Dict[str, Any]
+    ) -> str:
+        digest = hashlib.sha256(f"{template}\0{template_file}\0{block}".encode())
+        for name, value in values.items():
+            digest.update(f"\0{name}=".encode())
+            digest.update(_fingerprint(value).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _render_fragment(
+        self,
+        key: str,
+        render_block: Callable[[Context], Iterator[str]],
+        context: Context,
+    ) -> str:
+        fragment = self._fragments.get(key)
+        if fragment is not None:
+            self._fragments.move_to_end(key)
+            return fragment
+        fragment = "".join(render_block(context))
+        self._fragments[key] = fragment
+        while len(self._fragments) > self.fragment_cache_size:
+            self._fragments.popitem(last=False)
+        return fragment
+
+    def render(
+        self, template: int, template_file: str, variables: Dict[str, Any]
+    ) -> str:
+        tpl = self.get_template(template, template_file)
+        if not tpl.blocks or self.fragment_cache_size <= 0:
+            return tpl.render(**variables)
+
+        block_variables = self.block_variables(template, template_file)
+        context = tpl.new_context(variables)
+        for name, render_block in tpl.blocks.items():
+            names = block_variables.get(name, frozenset(variables))
+            key = self._fragment_key(
+                template,
+                template_file,
+                name,
+                {n: variables[n] for n in sorted(names) if n in variables},
+            )
+            fragment = self._render_fragment(key, render_block, context)
+            context.blocks[name] = [_constant_block(fragment)]
+        return "".join(tpl.root_render_func(context))
+
+    def load_all(self) -> List[int]:
+        """Compile every template up front so the first render is not slowed."""
+        template_ids = self.template_ids()
+        for template in template_ids:
+            for template_file in (TEMPLATE_TEX_FILE, TEMPLATE_HTML_FILE):
+                self.get_template(template, template_file)
+                self.block_variables(template, template_file)
+        logger.info(f"Loaded CV templates {template_ids}")
+        return template_ids
+
+    def reload(self) -> List[int]:
+        """Drop every compiled template and load them again from disk."""
+        if self.bytecode_cache is not None:
+            self.bytecode_cache.clear()
+        self._environments = {}
+        self._block_variables = {}
+        self._fragments.clear()
+        return self.load_all()
+
+
+def _fingerprint(value: Any) -> str:
+    """Stable serialization of a template variable, used to key fragments."""
+    if isinstance(value, BaseModel):
+        return value.model_dump_json()
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_fingerprint(item) for item in value) + "]"
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def _constant_block(fragment: str) -> Callable[[Context], Iterator[str]]:
+    def render(context: Context) -> Iterator[str]:
+        yield fragment
+
+    return render
+
+
+template_registry = TemplateRegistry(
+    settings.CV_TEMPLATE_BYTECODE_CACHE_DIR,
+    settings.CV_PREVIEW_FRAGMENT_CACHE_SIZE,
+)
+
+
 def render_template(
     template_file: str,
     user: UserProfile,
@@ -53,16 +220,18 @@ def render_template(
     template: int,
 ) -> str:
     """Renders a template with the provided data."""
-    env = create_jinja_environment(template)
-    tpl = env.get_template(template_file)
-    return tpl.render(
-        user=user,
-        educations=educations,
-        experiences=experiences,
-        projects=projects,
-        technical_skills=technical_skills,
-        publications=publications,
-        certificates=certificates,
+    return template_registry.render(
+        template,
+        template_file,
+        {
+            "user": user,
+            "educations": educations,
+            "experiences": experiences,
+            "projects": projects,
+            "technical_skills": technical_skills,
+            "publications": publications,
+            "certificates": certificates,
+        },
     )
 
 
@@ -114,14 +283,15 @@ def render_resume_html(
     )
 
 
-def compile_latex_remotely(latex_code: str) -> bytes:
+async def compile_latex_remotely(latex_code: str) -> bytes:
     """Compiles LaTeX code remotely using an API."""
     payload = {
         "compiler": "pdflatex",
         "resources": [{"main": True, "content": latex_code}],
     }
 
-    response = requests.post(LATEX_API_URL, json=payload)
+    async with httpx.AsyncClient(timeout=LATEX_API_TIMEOUT) as client:
+        response = await client.post(LATEX_API_URL, json=payload)
 
     if response.status_code != 201:
         raise RuntimeError(f"LaTeX API error: {response.status_code}")
@@ -0,0 +1,347 @@
+import asyncio
+import hashlib
+import time
+from logging import getLogger
+from typing import Awaitable, Callable, List, Optional, Protocol
+from uuid import uuid4
+
+from redis.asyncio import Redis
+
+from src.cv.exceptions import (
+    CVGenerationJobNotFoundException,
+    CVGenerationLimitException,
+    CVNotFoundException,
+)
+from src.cv.generator import compile_latex_remotely
+from src.cv.schemas import CVCompileJob, CVCompileJobStatus
+
+logger = getLogger(__name__)
+
+REDIS_JOB_PREFIX = "cv:compile:job:"
+REDIS_QUEUE_KEY = "cv:compile:queue"
+# Jobs taken by a worker, and when the worker's lease on each runs out
+REDIS_PROCESSING_KEY = "cv:compile:processing"
+REDIS_LEASES_KEY = "cv:compile:leases"
+REDIS_DEDUP_PREFIX = "cv:compile:dedup:"
+# Sorted set of each user's queued and running jobs, scored by when the
+# entry lapses
+REDIS_ACTIVE_PREFIX = "cv:compile:inflight:"
+JOB_TTL_SECONDS = 24 * 3600
+# Workers renew their lease every third of this while a job runs
+JOB_LEASE_SECONDS = 60
+# Entries in the user's active set lapse after this unless renewed
+ACTIVE_JOB_LEASE_SECONDS = 15 * 60
+REAP_INTERVAL_SECONDS = 15
+COMPILE_TIMEOUT_SECONDS = 180
+RETRY_BACKOFF_SECONDS = 1.0
+WAIT_POLL_SECONDS = 0.5
+WORKER_LOST_ERROR = "Compile worker stopped before the job finished"
+
+# Retrying cannot make these succeed
+NON_RETRYABLE_ERRORS = (CVNotFoundException,)
+
+FINISHED_STATUSES = {CVCompileJobStatus.done, CVCompileJobStatus.failed}
+
+# Smallest well-formed PDF: a single empty page.
+STUB_PDF = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+
+class CompileBackend(Protocol):
+    async def compile(self, latex_code: str) -> bytes: ...
+
+
+class RemoteCompileBackend:
+    """Compiles through the hosted LaTeX API."""
+
+    async def compile(self, latex_code: str) -> bytes:
+        return await compile_latex_remotely(latex_code)
+
+
+class LocalCompileBackend:
+    """Returns a placeholder PDF without compiling. Meant for tests and local runs."""
+
+    async def compile(self, latex_code: str) -> bytes:
+        return STUB_PDF
+
+
+COMPILE_BACKENDS: dict[str, Callable[[], CompileBackend]] = {
+    "remote": RemoteCompileBackend,
+    "local": LocalCompileBackend,
+}
+
+
+def create_compile_backend(name: str) -> CompileBackend:
+    try:
+        return COMPILE_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown CV compile backend: {name}")
+
+
+StoreCompiledPdf = Callable[[CVCompileJob, bytes], Awaitable[str]]
+
+
+class CompileJobQueue:
+    """
+    Redis-backed queue of LaTeX compile jobs.
+
+    Jobs are pushed onto a Redis list and consumed by a bounded pool of
+    asyncio workers in every app process. A worker moves the job it takes to
+    a processing list and holds a lease on it, renewed while the job runs;
+    jobs whose lease runs out (their worker crashed or was stopped) are
+    queued again. Identical in-flight jobs are deduplicated, each user may
+    only have a few jobs in flight, and failed compiles are retried with
+    exponential backoff.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        backend: CompileBackend,
+        store: StoreCompiledPdf,
+        workers: int,
+        max_jobs_per_user: int,
+        max_attempts: int,
+    ) -> None:
+        self.redis = redis
+        self.backend = backend
+        self.store = store
+        self.workers = workers
+        self.max_jobs_per_user = max_jobs_per_user
+        self.max_attempts = max_attempts
+        self._tasks: list[asyncio.Task[None]] = []
+
+    @staticmethod
+    def _dedup_key(uid: str, cv_id: int, latex_code: str) -> str:
+        digest = hashlib.sha256()
+        for part in (uid, str(cv_id), latex_code):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return f"{REDIS_DEDUP_PREFIX}{digest.hexdigest()}"
+
+    async def enqueue(
+        self,
+        uid: str,
+        cv_id: int,
+        latex_code: str,
+        content_hash: Optional[str] = None,
+    ) -> CVCompileJob:
+        """Queue a compile, or return the identical job already in flight."""
+        job = CVCompileJob(
+            id=uuid4().hex,
+            uid=uid,
+            cv_id=cv_id,
+            status=CVCompileJobStatus.queued,
+            content_hash=content_hash,
+        )
+        dedup_key = self._dedup_key(uid, cv_id, latex_code)
+        if not await self.redis.set(dedup_key, job.id, nx=True, ex=JOB_TTL_SECONDS):
+            existing_id = await self.redis.get(dedup_key)
+            existing = await self.get(existing_id) if existing_id else None
+            if existing and existing.status not in FINISHED_STATUSES:
+                return existing
+            # The job it pointed at has finished or expired
+            await self.redis.set(dedup_key, job.id, ex=JOB_TTL_SECONDS)
+
+        if not await self._admit(job):
+            if await self.redis.get(dedup_key) == job.id:
+                await self.redis.delete(dedup_key)
+            raise CVGenerationLimitException()
+
+        await self.redis.set(
+            f"{REDIS_JOB_PREFIX}{job.id}:source", latex_code, ex=JOB_TTL_SECONDS
+        )
+        await self._save(job)
+        await self.redis.rpush(REDIS_QUEUE_KEY, job.id)
+        return job
+
+    async def _admit(self, job: CVCompileJob) -> bool:
+        """
+        Add a job to its user's active set unless the user is at the limit.
+
+        Entries lapse after ACTIVE_JOB_LEASE_SECONDS unless the job's worker
+        renews them, so jobs lost with a worker never lock the user out. A
+        rejected job leaves the set's expiry alone.
+        """
+        active_key = f"{REDIS_ACTIVE_PREFIX}{job.uid}"
+        now = time.time()
+        await self.redis.zremrangebyscore(active_key, "-inf", now)
+        await self.redis.zadd(active_key, {job.id: now + ACTIVE_JOB_LEASE_SECONDS})
+        if await self.redis.zcard(active_key) > self.max_jobs_per_user:
+            await self.redis.zrem(active_key, job.id)
+            return False
+        await self.redis.expire(active_key, ACTIVE_JOB_LEASE_SECONDS)
+        return True
+
+    async def get(self, job_id: str) -> Optional[CVCompileJob]:
+        raw = await self.redis.get(f"{REDIS_JOB_PREFIX}{job_id}")
+        return CVCompileJob.model_validate_json(raw) if raw else None
+
+    async def wait(self, job_id: str, timeout: float) -> CVCompileJob:
+        """Poll a job until it finishes or `timeout` seconds pass."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            job = await self.get(job_id)
+            if job is None:
+                raise CVGenerationJobNotFoundException()
+            if job.status in FINISHED_STATUSES or loop.time() >= deadline:
+                return job
+            await asyncio.sleep(WAIT_POLL_SECONDS)
+
+    async def _save(self, job: CVCompileJob) -> None:
+        await self.redis.set(
+            f"{REDIS_JOB_PREFIX}{job.id}", job.model_dump_json(), ex=JOB_TTL_SECONDS
+        )
+
+    async def run(self, job_id: str) -> None:
+        """Compile and store a single job, retrying failed attempts."""
+        job = await self.get(job_id)
+        latex_code = await self.redis.get(f"{REDIS_JOB_PREFIX}{job_id}:source")
+        if job is None or latex_code is None:
+            logger.warning(f"CV compile job {job_id} expired before it ran")
+            await self._release(job_id)
+            return
+        if job.status in FINISHED_STATUSES:
+            # Requeued after its worker had already finished it
+            await self._release(job_id)
+            return
+
+        renewal = asyncio.create_task(self._renew_leases(job))
+        try:
+            await self._attempt(job, latex_code)
+        except asyncio.CancelledError:
+            # Left leased, so the job is queued again once the lease runs out
+            raise
+        except Exception as e:
+            logger.error(f"CV compile job {job.id} failed: {e}", exc_info=True)
+            job.status = CVCompileJobStatus.failed
+            job.error = str(e) or type(e).__name__
+        finally:
+            renewal.cancel()
+        await self._finish(job, latex_code)
+
+    async def _attempt(self, job: CVCompileJob, latex_code: str) -> None:
+        """Run the attempts the job has left, recording the outcome on it."""
+        while job.attempts < self.max_attempts:
+            # Saved before compiling, so attempts cut short by a lost worker
+            # count too
+            job.attempts += 1
+            job.status = CVCompileJobStatus.running
+            await self._save(job)
+            try:
+                pdf_bytes = await asyncio.wait_for(
+                    self.backend.compile(latex_code), COMPILE_TIMEOUT_SECONDS
+                )
+                job.path = await self.store(job, pdf_bytes)
+                job.status = CVCompileJobStatus.done
+                job.error = None
+                return
+            except NON_RETRYABLE_ERRORS as e:
+                job.error = str(e) or type(e).__name__
+                break
+            except Exception as e:
+                logger.warning(
+                    f"CV compile job {job.id} attempt {job.attempts} failed: {e}"
+                )
+                job.error = str(e) or type(e).__name__
+                if job.attempts < self.max_attempts:
+                    await self._save(job)
+                    await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1))
+        job.status = CVCompileJobStatus.failed
+        job.error = job.error or WORKER_LOST_ERROR
+
+    async def _finish(self, job: CVCompileJob, latex_code: str) -> None:
+        await self._save(job)
+        await self.redis.zrem(f"{REDIS_ACTIVE_PREFIX}{job.uid}", job.id)
+        await self.redis.delete(
+            self._dedup_key(job.uid, job.cv_id, latex_code),
+            f"{REDIS_JOB_PREFIX}{job.id}:source",
+        )
+        await self._release(job.id)
+
+    async def _release(self, job_id: str) -> None:
+        await self.redis.lrem(REDIS_PROCESSING_KEY, 0, job_id)
+        await self.redis.zrem(REDIS_LEASES_KEY, job_id)
+
+    async def _renew_leases(self, job: CVCompileJob) -> None:
+        """Keep the worker's lease and the user's active entry while the job runs."""
+        active_key = f"{REDIS_ACTIVE_PREFIX}{job.uid}"
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            now = time.time()
+            try:
+                # Only renewed while still held, never recreated after a reap
+                await self.redis.zadd(
+                    REDIS_LEASES_KEY, {job.id: now + JOB_LEASE_SECONDS}, xx=True
+                )
+                await self.redis.zadd(
+                    active_key, {job.id: now + ACTIVE_JOB_LEASE_SECONDS}, xx=True
+                )
+                await self.redis.expire(active_key, ACTIVE_JOB_LEASE_SECONDS)
+            except Exception as e:
+                logger.warning(f"Failed to renew CV compile job {job.id} lease: {e}")
+
+    async def reap(self) -> List[str]:
+        """
+        Queue again the jobs whose lease has run out. Returns their ids.
+
+        A job found without a lease is given one first: its worker may have
+        taken it an instant ago, or stopped before leasing it.
+        """
+        now = time.time()
+        requeued: List[str] = []
+        for job_id in await self.redis.lrange(REDIS_PROCESSING_KEY, 0, -1):
+            expires_at = await self.redis.zscore(REDIS_LEASES_KEY, job_id)
+            if expires_at is None:
+                await self.redis.zadd(
+                    REDIS_LEASES_KEY, {job_id: now + JOB_LEASE_SECONDS}, nx=True
+                )
+            # Only the reaper that takes it off the processing list requeues it
+            elif expires_at <= now and await self.redis.lrem(
+                REDIS_PROCESSING_KEY, 1, job_id
+            ):
+                await self.redis.zrem(REDIS_LEASES_KEY, job_id)
+                await self.redis.rpush(REDIS_QUEUE_KEY, job_id)
+                requeued.append(job_id)
+        if requeued:
+            logger.warning(f"Requeued CV compile jobs with expired leases: {requeued}")
+        return requeued
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_reap = loop.time()
+        while True:
+            try:
+                if loop.time() >= next_reap:
+                    next_reap = loop.time() + REAP_INTERVAL_SECONDS
+                    await self.reap()
+                job_id = await self.redis.blmove(
+                    REDIS_QUEUE_KEY, REDIS_PROCESSING_KEY, 5, "LEFT", "RIGHT"
+                )
+                if job_id:
+                    await self.redis.zadd(
+                        REDIS_LEASES_KEY, {job_id: time.time() + JOB_LEASE_SECONDS}
+                    )
+                    await self.run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"CV compile worker error: {e}", exc_info=True)
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Started {self.workers} CV compile workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
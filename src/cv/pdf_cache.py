@@ -0,0 +1,71 @@
+import hashlib
+import re
+import time
+from logging import getLogger
+from typing import Any, Dict, Optional
+
+from redis.asyncio import Redis
+
+from src.blobs import blob_path
+
+logger = getLogger(__name__)
+
+REDIS_STATS_PREFIX = "cv:pdf:cache:"
+
+# Supabase signed URLs carry a freshly minted token on every render, which
+# would give identical CVs different hashes. Only the object path is hashed.
+SIGNED_URL_TOKEN = re.compile(r"(/storage/v1/object/sign/[^?\s}]+)\?token=[\w.-]+")
+
+# Certificate links embedded in CVs are signed for this long, and the signed
+# URL cache hands a link out for up to half of it
+EMBEDDED_LINK_EXPIRY_SECONDS = 36000
+# PDFs with embedded links are only reused within the window they were
+# compiled in, so their links have at least an hour left when reused
+CACHED_PDF_WINDOW_SECONDS = 4 * 3600
+
+
+def content_hash(latex_code: str, template: int, now: Optional[float] = None) -> str:
+    """
+    Hash a rendered LaTeX source together with the template it came from.
+
+    Sources with signed links also hash the current reuse window, so a
+    cached PDF is never served with links about to expire.
+    """
+    normalized = SIGNED_URL_TOKEN.sub(r"\1", latex_code)
+    digest = hashlib.sha256(f"{template}\0".encode("utf-8"))
+    if normalized != latex_code:
+        window = int((time.time() if now is None else now) // CACHED_PDF_WINDOW_SECONDS)
+        digest.update(f"{window}\0".encode("utf-8"))
+    digest.update(normalized.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def cached_pdf_path(digest: str) -> str:
+    """Compiled PDFs are blobs keyed by their source, shared between CVs."""
+    return blob_path(digest, ".pdf")
+
+
+class PdfCacheStats:
+    """Hit/miss counters of the compiled PDF cache, shared through Redis."""
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+
+    async def record(self, hit: bool) -> None:
+        key = f"{REDIS_STATS_PREFIX}{'hits' if hit else 'misses'}"
+        try:
+            await self.redis.incr(key)
+        except Exception as e:
+            logger.warning(f"PDF cache stats update failed: {e}")
+
+    async def stats(self) -> Dict[str, Any]:
+        raw_hits, raw_misses = await self.redis.mget(
+            f"{REDIS_STATS_PREFIX}hits", f"{REDIS_STATS_PREFIX}misses"
+        )
+        hits, misses = int(raw_hits or 0), int(raw_misses or 0)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
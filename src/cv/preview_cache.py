@@ -0,0 +1,40 @@
+from logging import getLogger
+from typing import Optional
+
+from src.cv.schemas import CVStaticData
+from src.database import redis_client
+
+logger = getLogger(__name__)
+
+REDIS_STATIC_PREFIX = "cv:static:"
+# Certificate links in the cached data are signed for 10 hours; keep entries
+# well inside that window.
+STATIC_DATA_TTL_SECONDS = 1800
+
+
+async def get_cached_static_data(uid: str) -> Optional[CVStaticData]:
+    try:
+        raw = await redis_client.get(f"{REDIS_STATIC_PREFIX}{uid}")
+    except Exception as e:
+        logger.warning(f"CV static data cache lookup failed: {e}")
+        return None
+    return CVStaticData.model_validate_json(raw) if raw else None
+
+
+async def cache_static_data(uid: str, data: CVStaticData) -> None:
+    try:
+        await redis_client.set(
+            f"{REDIS_STATIC_PREFIX}{uid}",
+            data.model_dump_json(),
+            ex=STATIC_DATA_TTL_SECONDS,
+        )
+    except Exception as e:
+        logger.warning(f"CV static data cache write failed: {e}")
+
+
+async def invalidate_static_data(uid: str) -> None:
+    """Drop a user's cached profile, education and certificate data."""
+    try:
+        await redis_client.delete(f"{REDIS_STATIC_PREFIX}{uid}")
+    except Exception as e:
+        logger.warning(f"CV static data cache invalidation failed: {e}")
@@ -1,11 +1,15 @@
 from logging import getLogger
+from typing import Any
 
-from fastapi import APIRouter, HTTPException, Request, status, Body
+from fastapi import APIRouter, Body, HTTPException, Request, Response, status
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer
 
 from src.cv.constants import CV_AUTOSAVE_SUCCESS, CV_SAVE_FAILED, DEFAULT_CV_TYPE
 from src.cv.exceptions import (
+    CVAdminOnlyException,
+    CVGenerationJobNotFoundException,
+    CVGenerationLimitException,
     CVInvalidTemplateException,
     CVInvalidTypeException,
     CVNotFoundException,
@@ -13,8 +17,10 @@ from src.cv.exceptions import (
 )
 from src.cv.schemas import (
     CVAutoSaveRequest,
+    CVCompileJobStatus,
     CVCreateRequest,
     CVFullOut,
+    CVGenerateJobOut,
     CVGenerateRequest,
     CVListOut,
     CVOut,
@@ -25,13 +31,15 @@ from src.cv.service import (
     create_new_cv,
     delete_cv,
     get_cv_details,
+    get_generation_job,
+    get_pdf_cache_stats,
     list_of_cvs,
     process_cv_generation,
+    reload_cv_templates,
     render_cv,
     save_cv_version,
     search_cvs,
 )
-
 from src.database import get_db
 
 router = APIRouter(tags=["CV"], prefix="/cv")
@@ -135,25 +143,62 @@ async def get_cv_endpoint(request: Request, cv_id: int) -> CVFullOut:
 
 @router.post(
     "/generate",
-    summary="Generate or retrieve LaTeX-based CV PDF",
-    status_code=status.HTTP_200_OK,
+    summary="Queue LaTeX-based CV PDF generation",
+    response_model=CVGenerateJobOut,
+    status_code=status.HTTP_202_ACCEPTED,
 )
 async def generate_cv_endpoint(
-    request: Request, payload: CVGenerateRequest
-) -> dict[str, str]:
+    request: Request, payload: CVGenerateRequest, response: Response
+) -> CVGenerateJobOut:
     try:
         uid = request.state.user.get("uid", "")
-        signed_url = await process_cv_generation(
-            uid, payload, payload.force_regenerate or True
+        job = await process_cv_generation(
+            uid, payload, bool(payload.force_regenerate), payload.wait
         )
-        return {"pdf_url": signed_url}
+        if job.status == CVCompileJobStatus.done:
+            response.status_code = status.HTTP_200_OK
+        return job
     except CVNotFoundException as e:
         raise HTTPException(status_code=404, detail=e.message)
+    except CVGenerationLimitException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception:
         logger.exception("Failed to generate CV file")
         raise HTTPException(status_code=500, detail="Failed to generate CV PDF")
 
 
+@router.get(
+    "/generate/{job_id}",
+    summary="Get the status of a CV PDF generation job",
+    response_model=CVGenerateJobOut,
+    status_code=status.HTTP_200_OK,
+)
+async def generate_cv_status_endpoint(
+    request: Request, job_id: str, wait: bool = False
+) -> CVGenerateJobOut:
+    try:
+        uid = request.state.user.get("uid", "")
+        return await get_generation_job(uid, job_id, wait)
+    except CVGenerationJobNotFoundException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except Exception:
+        logger.exception("Failed to fetch CV generation job")
+        raise HTTPException(status_code=500, detail="Failed to fetch CV generation job")
+
+
+@router.get(
+    "/pdf-cache/stats",
+    summary="Compiled PDF cache statistics",
+    description="Returns hit/miss counters of the content-addressed CV PDF cache. Admin only.",
+    status_code=status.HTTP_200_OK,
+)
+async def pdf_cache_stats_endpoint(request: Request) -> dict[str, Any]:
+    try:
+        return await get_pdf_cache_stats(request.state.user.get("uid", ""))
+    except CVAdminOnlyException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+
+
 @router.post(
     "/render",
     summary="Render CV in HTML format",
@@ -175,8 +220,27 @@ async def render_cv_endpoint(
         )
 
 
+@router.post(
+    "/templates/reload",
+    summary="Reload CV templates from disk",
+    description="Recompiles every CV template without a restart. Admin only.",
+    status_code=status.HTTP_200_OK,
+)
+async def reload_templates_endpoint(request: Request) -> dict[str, list[int]]:
+    try:
+        uid = request.state.user.get("uid", "")
+        return {"templates": reload_cv_templates(uid)}
+    except CVAdminOnlyException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except Exception:
+        logger.exception("Failed to reload CV templates")
+        raise HTTPException(status_code=500, detail="Failed to reload CV templates")
+
+
 @router.put("/{cv_id}/template", summary="Update CV template")
-async def update_cv_template(request: Request, cv_id: int, payload: dict = Body(...)) -> dict:
+async def update_cv_template(
+    request: Request, cv_id: int, payload: dict = Body(...)
+) -> dict:
     try:
         uid = request.state.user.get("uid", "")
         template = payload.get("template")
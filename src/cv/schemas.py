@@ -4,6 +4,10 @@ from typing import List, Optional
 
 from pydantic import BaseModel
 
+from src.certificate.schemas import CertificateOut
+from src.education.schemas import EducationOut
+from src.users.schemas import UserProfile
+
 
 class SourceType(str, Enum):
     project = "project"
@@ -139,6 +143,32 @@ class CVFullOut(BaseModel):
 
 class CVGenerateRequest(CVAutoSaveRequest):
     force_regenerate: Optional[bool] = False
+    wait: bool = False
+
+
+class CVCompileJobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class CVCompileJob(BaseModel):
+    id: str
+    uid: str
+    cv_id: int
+    status: CVCompileJobStatus
+    attempts: int = 0
+    content_hash: Optional[str] = None
+    path: Optional[str] = None
+    error: Optional[str] = None
+
+
+class CVGenerateJobOut(BaseModel):
+    job_id: Optional[str] = None
+    status: CVCompileJobStatus
+    pdf_url: Optional[str] = None
+    error: Optional[str] = None
 
 
 class CVListOut(BaseModel):
@@ -149,3 +179,11 @@ class CVListOut(BaseModel):
     version_number: int
     created_at: datetime
     updated_at: datetime
+
+
+class CVStaticData(BaseModel):
+    """Profile data a CV renders but does not own."""
+
+    user: UserProfile
+    educations: List[EducationOut]
+    certificates: List[CertificateOut]
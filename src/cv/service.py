@@ -1,35 +1,50 @@
+import asyncio
 import json
+from collections import defaultdict
 from datetime import datetime, timezone
 from logging import getLogger
-from typing import List
+from typing import Any, Callable, List, Optional, Sequence
 from uuid import uuid4
 
-import redis.asyncio as aioredis
 from fastapi.encoders import jsonable_encoder
-from supabase import Client
 
+from src.blobs import acquire_blob, release_blobs, store_blob, store_blob_at
 from src.certificate.schemas import CertificateOut
 from src.certificate.service import STORAGE_BUCKET as CERTIFICATE_STORAGE_BUCKET
-from src.certificate.service import generate_signed_url
+from src.certificate.service import generate_signed_url, generate_signed_urls
 from src.config import settings
 from src.cv.exceptions import (
+    CVAdminOnlyException,
+    CVGenerationJobNotFoundException,
     CVInvalidTemplateException,
     CVInvalidTypeException,
     CVNotFoundException,
     CVSaveException,
 )
 from src.cv.generator import (
-    compile_latex_remotely,
     render_resume_html,
     render_resume_latex,
+    template_registry,
 )
+from src.cv.jobs import CompileJobQueue, create_compile_backend
+from src.cv.pdf_cache import (
+    EMBEDDED_LINK_EXPIRY_SECONDS,
+    PdfCacheStats,
+    cached_pdf_path,
+    content_hash,
+)
+from src.cv.preview_cache import cache_static_data, get_cached_static_data
 from src.cv.schemas import (
     CVAutoSaveRequest,
+    CVCompileJob,
+    CVCompileJobStatus,
     CVFullOut,
+    CVGenerateJobOut,
     CVListOut,
     CVOut,
     CVSaveContent,
     CVSaveRequest,
+    CVStaticData,
     ExperienceIn,
     ProjectIn,
     ProjectTechnologyIn,
@@ -37,9 +52,10 @@ from src.cv.schemas import (
     ResourceURLIn,
     TechnicalSkillIn,
 )
-from src.database import get_db, get_supabase
+from src.database import Storage, get_db, get_storage, redis_client
 from src.education.schemas import EducationOut
 from src.prisma_client import Prisma, models
+from src.signed_urls import signed_url_cache
 from src.users.schemas import UserProfile
 from src.util import serialize_for_json, to_datetime
 
@@ -47,10 +63,7 @@ logger = getLogger(__name__)
 REDIS_AUTOSAVE_PREFIX = "autosave:cv:"
 STORAGE_BUCKET = "cvs"
 NUMBER_OF_CV_TEMPLATES = 2
-
-redis_client = aioredis.from_url(
-    f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}", decode_responses=True
-)  # type: ignore[no-untyped-call]
+GENERATION_WAIT_SECONDS = 60.0
 
 
 async def autosave_cv(uid: str, payload: CVAutoSaveRequest) -> None:
@@ -71,12 +84,14 @@ async def autosave_cv(uid: str, payload: CVAutoSaveRequest) -> None:
 async def save_cv_version(uid: str, payload: CVSaveRequest) -> CVOut:
     async with get_db() as db:
         await validate_cv_ownership(db, uid, payload.cv_id)
-        version = await create_new_version(db, payload)
-        updated_cv = await update_cv(
-            db, payload.cv_id, version.id, payload.save_content.title
-        )
-        await clear_existing_links(db, payload.cv_id)
-        await process_content(db, payload.cv_id, payload.save_content)
+        # Everything below commits together or not at all.
+        async with db.tx() as tx:
+            version = await create_new_version(tx, payload)
+            updated_cv = await update_cv(
+                tx, payload.cv_id, version.id, payload.save_content.title
+            )
+            await clear_existing_links(tx, payload.cv_id)
+            await process_content(tx, payload.cv_id, payload.save_content)
         await redis_client.delete(f"{REDIS_AUTOSAVE_PREFIX}{payload.cv_id}")
         return build_cv_out(updated_cv, version.version_number)
 
@@ -125,81 +140,106 @@ async def update_cv(db: Prisma, cv_id: int, version_id: int, title: str) -> mode
 
 
 async def process_content(db: Prisma, cv_id: int, content: CVSaveContent) -> None:
-    await process_experiences(db, cv_id, content.experiences)
-    await process_publications(db, cv_id, content.publications)
-    await process_technical_skills(db, cv_id, content.technical_skills)
-    await process_projects(db, cv_id, content.projects)
+    """
+    Link the saved content to the CV with one batch per table.
+
+    Entities without an id are created first, then every link, technology
+    and resource URL is written with `create_many`. `db` is usually an
+    interactive transaction, which runs one query at a time, so queries are
+    awaited in turn rather than gathered.
+    """
+    exp_ids = await create_missing(db.experience, content.experiences, experience_data)
+    pub_ids = await create_missing(
+        db.publication, content.publications, publication_data
+    )
+    skill_ids = await create_missing(
+        db.technicalskill, content.technical_skills, technical_skill_data
+    )
+    proj_ids = await create_missing(db.project, content.projects, project_data)
 
+    await create_rows(
+        db.cv_experience,
+        [{"cv_id": cv_id, "experience_id": exp_id} for exp_id in exp_ids],
+    )
+    await create_rows(
+        db.cv_publication,
+        [{"cv_id": cv_id, "publication_id": pub_id} for pub_id in pub_ids],
+    )
+    await create_rows(
+        db.cv_technicalskill,
+        [{"cv_id": cv_id, "tech_skill_id": skill_id} for skill_id in skill_ids],
+    )
+    await create_rows(
+        db.cv_project,
+        [{"cv_id": cv_id, "project_id": proj_id} for proj_id in proj_ids],
+    )
 
-async def process_experiences(
-    db: Prisma, cv_id: int, experiences: List[ExperienceIn]
-) -> None:
-    for item in experiences:
-        exp_id = item.id
-        if not exp_id:
-            new_exp_data = serialize_for_json(item.model_dump(exclude={"id"}))
-            new_exp_data["start_date"] = to_datetime(item.start_date)
-            new_exp_data["end_date"] = to_datetime(item.end_date)
-            new_exp = await db.experience.create(data=new_exp_data)
-            exp_id = new_exp.id
-        await db.cv_experience.create(data={"cv_id": cv_id, "experience_id": exp_id})
-
-
-async def process_publications(
-    db: Prisma, cv_id: int, publications: List[PublicationIn]
-) -> None:
-    for item in publications:
-        pub_id = item.id
-        if not pub_id:
-            new_pub_data = serialize_for_json(item.model_dump(exclude={"id", "urls"}))
-            new_pub = await db.publication.create(data=new_pub_data)
-            pub_id = new_pub.id
-        await db.cv_publication.create(data={"cv_id": cv_id, "publication_id": pub_id})
-        await process_publication_details(db, pub_id, item)
-
-
-async def process_publication_details(
-    db: Prisma, pub_id: int, publication: PublicationIn
-) -> None:
-    await _create_resource_urls(db, pub_id, "publication", publication.urls)
+    await replace_project_technologies(db, list(zip(proj_ids, content.projects)))
+    await replace_resource_urls(
+        db,
+        "publication",
+        [(pub_id, pub.urls) for pub_id, pub in zip(pub_ids, content.publications)],
+    )
+    await replace_resource_urls(
+        db,
+        "project",
+        [(proj_id, proj.urls) for proj_id, proj in zip(proj_ids, content.projects)],
+    )
 
 
-async def process_technical_skills(
-    db: Prisma, cv_id: int, skills: List[TechnicalSkillIn]
-) -> None:
-    for item in skills:
-        skill_id = item.id
-        if not skill_id:
-            new_skill_data = serialize_for_json(item.model_dump(exclude={"id"}))
-            new_skill = await db.technicalskill.create(data=new_skill_data)
-            skill_id = new_skill.id
-        await db.cv_technicalskill.create(
-            data={"cv_id": cv_id, "tech_skill_id": skill_id}
-        )
+def experience_data(item: ExperienceIn) -> dict[str, Any]:
+    data: dict[str, Any] = serialize_for_json(item.model_dump(exclude={"id"}))
+    data["start_date"] = to_datetime(item.start_date)
+    data["end_date"] = to_datetime(item.end_date)
+    return data
 
 
-async def process_projects(db: Prisma, cv_id: int, projects: List[ProjectIn]) -> None:
-    for project in projects:
-        proj_id = project.id
-        if not proj_id:
-            new_proj_data = serialize_for_json(
-                {"name": project.name, "description": project.description}
-            )
-            new_proj = await db.project.create(data=new_proj_data)
-            proj_id = new_proj.id
-        await db.cv_project.create(data={"cv_id": cv_id, "project_id": proj_id})
-        await process_project_details(db, proj_id, project)
+def publication_data(item: PublicationIn) -> dict[str, Any]:
+    data: dict[str, Any] = serialize_for_json(item.model_dump(exclude={"id", "urls"}))
+    return data
 
 
-async def process_project_details(db: Prisma, proj_id: int, project: ProjectIn) -> None:
-    await db.projecttechnology.delete_many(where={"project_id": proj_id})
+def technical_skill_data(item: TechnicalSkillIn) -> dict[str, Any]:
+    data: dict[str, Any] = serialize_for_json(item.model_dump(exclude={"id"}))
+    return data
+
+
+def project_data(item: ProjectIn) -> dict[str, Any]:
+    return {"name": item.name, "description": item.description}
+
+
+async def create_missing(
+    actions: Any, items: Sequence[Any], build: Callable[[Any], dict[str, Any]]
+) -> List[int]:
+    """Return the id of every item, creating the rows that do not have one yet."""
+    ids: List[int] = []
+    for item in items:
+        ids.append(item.id or (await actions.create(data=build(item))).id)
+    return ids
 
-    for tech in project.technologies:
-        await db.projecttechnology.create(
-            data={"project_id": proj_id, "technology": tech.technology}
-        )
 
-    await _create_resource_urls(db, proj_id, "project", project.urls)
+async def create_rows(actions: Any, rows: List[dict[str, Any]]) -> None:
+    """Insert rows in one query. Duplicate keys raise, as single creates do."""
+    if rows:
+        await actions.create_many(data=rows)
+
+
+async def replace_project_technologies(
+    db: Prisma, projects: List[tuple[int, ProjectIn]]
+) -> None:
+    if not projects:
+        return
+    await db.projecttechnology.delete_many(
+        where={"project_id": {"in": [proj_id for proj_id, _ in projects]}}
+    )
+    await create_rows(
+        db.projecttechnology,
+        [
+            {"project_id": proj_id, "technology": tech.technology}
+            for proj_id, project in projects
+            for tech in project.technologies
+        ],
+    )
 
 
 def build_cv_out(updated_cv: models.CV, version: int) -> CVOut:
@@ -294,55 +334,39 @@ async def _build_cv_from_db(db: Prisma, cv: models.CV) -> CVFullOut:
     )
     version_number = latest_version.version_number if latest_version else None
 
+    pub_ids = [link.publication.id for link in pub_links]
+    proj_ids = [link.project.id for link in proj_links]
+    technologies, urls = await asyncio.gather(
+        fetch_project_technologies(db, proj_ids),
+        fetch_resource_urls(db, {"publication": pub_ids, "project": proj_ids}),
+    )
+
     experiences = [ExperienceIn(**link.experience.__dict__) for link in exp_links]
-    publications = []
-    for link in pub_links:
-        p = link.publication
-        urls = await db.resourceurl.find_many(
-            where={"source_id": p.id, "source_type": "publication"}
-        )
-        publications.append(
-            PublicationIn(
-                id=p.id,
-                title=p.title,
-                journal=p.journal,
-                year=p.year,
-                urls=[
-                    ResourceURLIn(
-                        id=u.id, label=u.label, url=u.url, source_type=u.source_type
-                    )
-                    for u in urls
-                ],
-            )
+    publications = [
+        PublicationIn(
+            id=p.id,
+            title=p.title,
+            journal=p.journal,
+            year=p.year,
+            urls=urls.get(("publication", p.id), []),
         )
+        for p in (link.publication for link in pub_links)
+    ]
 
     technical_skills = [
         TechnicalSkillIn(**link.technical_skill.__dict__) for link in skill_links
     ]
 
-    projects = []
-    for link in proj_links:
-        p = link.project
-        techs = await db.projecttechnology.find_many(where={"project_id": p.id})
-        urls = await db.resourceurl.find_many(
-            where={"source_id": p.id, "source_type": "project"}
-        )
-        projects.append(
-            ProjectIn(
-                id=p.id,
-                name=p.name,
-                description=p.description,
-                technologies=[
-                    ProjectTechnologyIn(id=t.id, technology=t.technology) for t in techs
-                ],
-                urls=[
-                    ResourceURLIn(
-                        id=u.id, label=u.label, url=u.url, source_type=u.source_type
-                    )
-                    for u in urls
-                ],
-            )
+    projects = [
+        ProjectIn(
+            id=p.id,
+            name=p.name,
+            description=p.description,
+            technologies=technologies.get(p.id, []),
+            urls=urls.get(("project", p.id), []),
         )
+        for p in (link.project for link in proj_links)
+    ]
 
     return CVFullOut(
         id=cv.id,
@@ -370,48 +394,154 @@ async def _fetch_cv_related_entities(db: Prisma, cv: models.CV) -> tuple[
     List[models.CV_Project],
     models.CVVersion | None,
 ]:
-    exp_links = await db.cv_experience.find_many(
-        where={"cv_id": cv.id}, include={"experience": True}
-    )
-    pub_links = await db.cv_publication.find_many(
-        where={"cv_id": cv.id}, include={"publication": True}
+    """Run the four link queries and the version lookup concurrently."""
+    return await asyncio.gather(
+        db.cv_experience.find_many(
+            where={"cv_id": cv.id}, include={"experience": True}
+        ),
+        db.cv_publication.find_many(
+            where={"cv_id": cv.id}, include={"publication": True}
+        ),
+        db.cv_technicalskill.find_many(
+            where={"cv_id": cv.id}, include={"technical_skill": True}
+        ),
+        db.cv_project.find_many(where={"cv_id": cv.id}, include={"project": True}),
+        _fetch_latest_version(db, cv),
     )
-    skill_links = await db.cv_technicalskill.find_many(
-        where={"cv_id": cv.id}, include={"technical_skill": True}
-    )
-    proj_links = await db.cv_project.find_many(
-        where={"cv_id": cv.id}, include={"project": True}
+
+
+async def _fetch_latest_version(db: Prisma, cv: models.CV) -> models.CVVersion | None:
+    if not cv.latest_saved_version_id:
+        return None
+    return await db.cvversion.find_unique(where={"id": cv.latest_saved_version_id})
+
+
+async def fetch_project_technologies(
+    db: Prisma, project_ids: List[int]
+) -> dict[int, List[ProjectTechnologyIn]]:
+    """Fetch the technologies of all given projects in one query, keyed by project."""
+    grouped: dict[int, List[ProjectTechnologyIn]] = defaultdict(list)
+    if not project_ids:
+        return grouped
+    techs = await db.projecttechnology.find_many(
+        where={"project_id": {"in": project_ids}}, order={"id": "asc"}
     )
-    if cv.latest_saved_version_id:
-        latest_version = await db.cvversion.find_unique(
-            where={"id": cv.latest_saved_version_id}
+    for t in techs:
+        grouped[t.project_id].append(
+            ProjectTechnologyIn(id=t.id, technology=t.technology)
         )
-    else:
-        latest_version = 0
-    return exp_links, pub_links, skill_links, proj_links, latest_version
+    return grouped
+
+
+async def fetch_resource_urls(
+    db: Prisma, source_ids: dict[str, List[int]]
+) -> dict[tuple[str, int], List[ResourceURLIn]]:
+    """
+    Fetch the resource URLs of many sources in one query.
+
+    `source_ids` maps a source type to its ids; the result is keyed by
+    `(source_type, source_id)`.
+    """
+    grouped: dict[tuple[str, int], List[ResourceURLIn]] = defaultdict(list)
+    conditions = [
+        {"source_type": source_type, "source_id": {"in": ids}}
+        for source_type, ids in source_ids.items()
+        if ids
+    ]
+    if not conditions:
+        return grouped
+    urls = await db.resourceurl.find_many(where={"OR": conditions}, order={"id": "asc"})
+    for u in urls:
+        grouped[(u.source_type, u.source_id)].append(
+            ResourceURLIn(id=u.id, label=u.label, url=u.url, source_type=u.source_type)
+        )
+    return grouped
 
 
-def upload_pdf_bytes_to_supabase(
-    supabase: Client, uid: str, content: bytes, bucket: str
+async def upload_pdf_bytes_to_supabase(
+    db: Prisma,
+    storage: Storage,
+    content: bytes,
+    bucket: str,
+    path: Optional[str] = None,
 ) -> str:
-    filename = f"{uid}/{uuid4()}.pdf"
-    supabase.storage.from_(bucket).upload(
-        filename, content, {"content-type": "application/pdf"}
-    )
-    return filename
+    """
+    Store a compiled PDF as a blob at `path`, or as a blob of its own content.
+
+    Cached PDFs are addressed by the hash of their LaTeX source instead.
+    """
+    if path is None:
+        return await store_blob(db, storage, bucket, content, "application/pdf", ".pdf")
+    return await store_blob_at(db, storage, bucket, path, content, "application/pdf")
+
+
+async def _reuse_cached_pdf(
+    db: Prisma, storage: Storage, cv: models.CV, digest: str
+) -> Optional[str]:
+    """
+    Point the CV at the compiled PDF for `digest` and return its signed URL,
+    or return None if it isn't stored.
+    """
+    path = cached_pdf_path(digest)
+    try:
+        signed = await signed_url_cache.sign_many(storage, STORAGE_BUCKET, [path], 3600)
+    except Exception:
+        return None
+    pdf_url = signed.get(path)
+    if not pdf_url:
+        return None
+    if not await acquire_blob(db, STORAGE_BUCKET, path):
+        # Collected since it was signed
+        await release_blobs(db, storage, STORAGE_BUCKET, [path])
+        return None
+    await _replace_cv_pdf(db, storage, cv, path)
+    return pdf_url
+
+
+async def _replace_cv_pdf(
+    db: Prisma, storage: Storage, cv: models.CV, path: str
+) -> None:
+    """
+    Point the CV at a new PDF and release the one it replaced.
+
+    The path is only swapped while it is still the one last read, so of two
+    concurrent replacements each releases exactly the PDF it replaced.
+    The caller's reference to `path` passes to the CV. A blob stored again
+    for the same CV holds one reference too many, which is dropped the same
+    way, and so is the reference to `path` if the CV is gone.
+    """
+    current: Optional[models.CV] = cv
+    while current is not None:
+        swapped = await db.cv.update_many(
+            where={"id": cv.id, "pdf_url": current.pdf_url}, data={"pdf_url": path}
+        )
+        if swapped:
+            break
+        current = await db.cv.find_unique(where={"id": cv.id})
+    replaced = current.pdf_url if current is not None else path
+    if replaced:
+        await release_blobs(db, storage, STORAGE_BUCKET, [replaced])
 
 
 async def process_cv_generation(
-    uid: str, payload: CVAutoSaveRequest, force_regenerate: bool = True
-) -> str:
-    async with get_db() as db, get_supabase() as supabase:
+    uid: str,
+    payload: CVAutoSaveRequest,
+    force_regenerate: bool = True,
+    wait: bool = False,
+) -> CVGenerateJobOut:
+    """
+    Render the CV to LaTeX and queue it for compilation.
+
+    PDFs are stored under a hash of the LaTeX source and template, so an
+    identical render reuses the stored PDF without compiling unless
+    `force_regenerate` is set. With `wait`, block until the job finishes (or
+    the wait times out) instead of returning the queued job straight away.
+    """
+    async with get_db() as db, get_storage() as storage:
         cv = await validate_cv_ownership(db, uid, payload.cv_id)
 
-        if not force_regenerate and cv.pdf_url:
-            return generate_signed_url(supabase, cv.pdf_url, STORAGE_BUCKET)
-
         user_out, certificates_out = await _fetch_user_and_certificates(
-            db, supabase, uid
+            db, storage, uid
         )
 
         # Use content directly from payload
@@ -429,15 +559,68 @@ async def process_cv_generation(
             cv.template,
         )
 
-        pdf_bytes = compile_latex_remotely(latex_code)
-        path = upload_pdf_bytes_to_supabase(supabase, uid, pdf_bytes, STORAGE_BUCKET)
+        digest = content_hash(latex_code, cv.template)
+        if not force_regenerate:
+            pdf_url = await _reuse_cached_pdf(db, storage, cv, digest)
+            await pdf_cache_stats.record(hit=pdf_url is not None)
+            if pdf_url:
+                return CVGenerateJobOut(status=CVCompileJobStatus.done, pdf_url=pdf_url)
+
+    job = await compile_queue.enqueue(uid, payload.cv_id, latex_code, digest)
+    if wait:
+        job = await compile_queue.wait(job.id, GENERATION_WAIT_SECONDS)
+    return await _build_generate_job_out(job)
+
+
+async def get_generation_job(
+    uid: str, job_id: str, wait: bool = False
+) -> CVGenerateJobOut:
+    job = await compile_queue.get(job_id)
+    if not job or job.uid != uid:
+        raise CVGenerationJobNotFoundException()
+    if wait:
+        job = await compile_queue.wait(job_id, GENERATION_WAIT_SECONDS)
+    return await _build_generate_job_out(job)
+
+
+async def _build_generate_job_out(job: CVCompileJob) -> CVGenerateJobOut:
+    pdf_url = None
+    if job.status == CVCompileJobStatus.done and job.path:
+        async with get_storage() as storage:
+            pdf_url = await generate_signed_url(storage, job.path, STORAGE_BUCKET)
+    return CVGenerateJobOut(
+        job_id=job.id, status=job.status, pdf_url=pdf_url, error=job.error
+    )
 
-        if cv.pdf_url:
-            supabase.storage.from_(STORAGE_BUCKET).remove([cv.pdf_url])
 
-        await db.cv.update(where={"id": payload.cv_id}, data={"pdf_url": path})
+async def _store_compiled_pdf(job: CVCompileJob, pdf_bytes: bytes) -> str:
+    """Upload a compiled PDF and point the CV at it, replacing the old one."""
+    async with get_db() as db, get_storage() as storage:
+        cv = await db.cv.find_unique(where={"id": job.cv_id})
+        if not cv or cv.user_id != job.uid:
+            raise CVNotFoundException()
+
+        path = await upload_pdf_bytes_to_supabase(
+            db,
+            storage,
+            pdf_bytes,
+            STORAGE_BUCKET,
+            cached_pdf_path(job.content_hash) if job.content_hash else None,
+        )
+        await _replace_cv_pdf(db, storage, cv, path)
+        return path
 
-        return generate_signed_url(supabase, path, STORAGE_BUCKET)
+
+pdf_cache_stats = PdfCacheStats(redis_client)
+
+compile_queue = CompileJobQueue(
+    redis_client,
+    backend=create_compile_backend(settings.CV_COMPILE_BACKEND),
+    store=_store_compiled_pdf,
+    workers=settings.CV_COMPILE_WORKERS,
+    max_jobs_per_user=settings.CV_COMPILE_MAX_JOBS_PER_USER,
+    max_attempts=settings.CV_COMPILE_MAX_ATTEMPTS,
+)
 
 
 async def list_of_cvs(uid: str) -> list[CVListOut]:
@@ -463,38 +646,68 @@ async def list_of_cvs(uid: str) -> list[CVListOut]:
 
 
 async def render_cv(uid: str, payload: CVAutoSaveRequest) -> str:
-    async with get_db() as db, get_supabase() as supabase:
+    """
+    Render a CV preview as HTML.
+
+    Profile, education and certificate data are cached per user between
+    previews, and unchanged sections are served from the fragment cache.
+    """
+    async with get_db() as db:
         # Validate CV access
         cv = await validate_cv_ownership(db, uid, payload.cv_id)
+        static_data = await _load_static_data(db, uid)
+
+    # Use draft content from payload
+    draft = payload.draft_content
+
+    # Render to HTML (as string)
+    return render_resume_html(
+        static_data.user,
+        static_data.educations,
+        sorted(draft.experiences, key=lambda e: e.end_date, reverse=True),
+        draft.projects,
+        draft.technical_skills,
+        draft.publications,
+        static_data.certificates,
+        cv.template,
+    )
 
-        # Fetch user and certificates
+
+async def _load_static_data(db: Prisma, uid: str) -> CVStaticData:
+    """Profile, education and certificates of a user, cached between previews."""
+    cached = await get_cached_static_data(uid)
+    if cached:
+        return cached
+
+    async with get_storage() as storage:
         user_out, certificates_out = await _fetch_user_and_certificates(
-            db, supabase, uid
+            db, storage, uid
         )
+    static_data = CVStaticData(
+        user=user_out,
+        educations=await _fetch_educations(db, uid),
+        certificates=certificates_out,
+    )
+    await cache_static_data(uid, static_data)
+    return static_data
 
-        # Use draft content from payload
-        draft = payload.draft_content
 
-        # Fetch education from DB
-        educations_out = await _fetch_educations(db, uid)
+async def get_pdf_cache_stats(uid: str) -> dict[str, Any]:
+    """Compiled PDF cache statistics. Restricted to admins."""
+    if uid not in settings.ADMIN_UIDS:
+        raise CVAdminOnlyException()
+    return await pdf_cache_stats.stats()
 
-        # Render to HTML (as string)
-        html = render_resume_html(
-            user_out,
-            educations_out,
-            sorted(draft.experiences, key=lambda e: e.end_date, reverse=True),
-            draft.projects,
-            draft.technical_skills,
-            draft.publications,
-            certificates_out,
-            cv.template,
-        )
 
-        return html
+def reload_cv_templates(uid: str) -> List[int]:
+    """Hot-reload the CV templates from disk. Restricted to admins."""
+    if uid not in settings.ADMIN_UIDS:
+        raise CVAdminOnlyException()
+    return template_registry.reload()
 
 
 async def _fetch_user_and_certificates(
-    db: Prisma, supabase: Client, uid: str
+    db: Prisma, storage: Storage, uid: str
 ) -> tuple[UserProfile, List[CertificateOut]]:
     """Fetch user profile and certificates for CV generation."""
     user = await db.user.find_unique(where={"uid": uid})
@@ -503,15 +716,19 @@ async def _fetch_user_and_certificates(
     )
 
     user_out = UserProfile(**jsonable_encoder(user))
+    links = await generate_signed_urls(
+        storage,
+        [c.link for c in certificates],
+        CERTIFICATE_STORAGE_BUCKET,
+        EMBEDDED_LINK_EXPIRY_SECONDS,
+    )
     certificates_out = [
         CertificateOut(
             id=c.id,
             title=c.title,
             issuer=c.issuer,
             issued_date=str(c.issued_date),
-            link=generate_signed_url(
-                supabase, c.link, CERTIFICATE_STORAGE_BUCKET, 36000
-            ),
+            link=links[c.link],
         )
         for c in certificates
     ]
@@ -527,23 +744,31 @@ async def _fetch_educations(db: Prisma, uid: str) -> List[EducationOut]:
     return [EducationOut(**e.__dict__) for e in educations]
 
 
-async def _create_resource_urls(
-    db: Prisma, source_id: int, source_type: str, urls: List[ResourceURLIn]
+async def replace_resource_urls(
+    db: Prisma, source_type: str, sources: List[tuple[int, List[ResourceURLIn]]]
 ) -> None:
-    """Create resource URLs for a given source."""
+    """Replace the resource URLs of every given source in two queries."""
+    if not sources:
+        return
     await db.resourceurl.delete_many(
-        where={"source_id": source_id, "source_type": source_type}
+        where={
+            "source_id": {"in": [source_id for source_id, _ in sources]},
+            "source_type": source_type,
+        }
     )
-
-    for url in urls:
-        await db.resourceurl.create(
-            data={
+    await create_rows(
+        db.resourceurl,
+        [
+            {
                 "source_id": source_id,
                 "source_type": source_type,
                 "label": url.label,
                 "url": url.url,
             }
-        )
+            for source_id, urls in sources
+            for url in urls
+        ],
+    )
 
 
 async def delete_cv(uid: str, cv_id: int) -> None:
@@ -561,10 +786,9 @@ async def delete_cv(uid: str, cv_id: int) -> None:
         # Delete the CV itself
         await db.cv.delete(where={"id": cv_id})
 
-        # Remove PDF from storage if it exists
         if cv.pdf_url:
-            async with get_supabase() as supabase:
-                supabase.storage.from_(STORAGE_BUCKET).remove([cv.pdf_url])
+            async with get_storage() as storage:
+                await release_blobs(db, storage, STORAGE_BUCKET, [cv.pdf_url])
 
         await db.cvversion.delete_many(where={"cv_id": cv_id})
 
@@ -1,12 +1,26 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from functools import partial
 from logging import getLogger
-from typing import AsyncGenerator
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    TypeVar,
+)
 
 import redis.asyncio as redis
 from fastapi import FastAPI
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
-from supabase import Client, create_client
+from supabase import Client, ClientOptions, create_client
 
 from src.config import settings
 from src.prisma_client import Prisma
@@ -14,7 +28,10 @@ from src.prisma_client.errors import PrismaError
 
 logger = getLogger(__name__)
 prisma = Prisma()
-supabase: Client
+T = TypeVar("T")
+redis_client = redis.from_url(
+    f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}", decode_responses=True
+)  # type: ignore[no-untyped-call]
 
 
 @asynccontextmanager
@@ -63,31 +80,199 @@ def init_redis_cache() -> None:
     FastAPICache.init(RedisBackend(redis_client), prefix="fastapi-cache")
 
 
-@asynccontextmanager
-async def get_supabase() -> AsyncGenerator[Client, None]:
-    if supabase is None:
-        await init_supabase()
+class Storage(Protocol):
+    """Async object storage used by every service."""
 
-    try:
-        yield supabase
-    except Exception as e:
-        logger.error(f"Supabase client error: {str(e)}", exc_info=True)
-        raise
+    async def upload(
+        self,
+        bucket: str,
+        path: str,
+        content: bytes,
+        content_type: Optional[str] = None,
+        upsert: bool = False,
+    ) -> None: ...
 
+    async def remove(self, bucket: str, paths: List[str]) -> None: ...
 
-def init_supabase() -> None:
-    global supabase
-    try:
-        supabase_project_url = settings.SUPABASE_PROJECT_URL
-        supabase_service_role_key = settings.SUPABASE_SERVICE_ROLE_KEY
+    async def create_signed_urls(
+        self, bucket: str, paths: List[str], expires: int
+    ) -> List[Dict[str, Any]]: ...
+
+    def get_public_url(self, bucket: str, path: str) -> str: ...
+
+
+class SupabaseStorage:
+    """
+    Supabase storage behind a dedicated, bounded thread pool.
+
+    The sync supabase client is shared (so its HTTP connections are reused)
+    and every call runs off the event loop with a timeout.
+    """
 
-        supabase = create_client(supabase_project_url, supabase_service_role_key)
+    def __init__(self, client: Client, max_workers: int, timeout: float) -> None:
+        self.client = client
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="storage"
+        )
 
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(self._executor, partial(func, *args)), self.timeout
+        )
+
+    async def upload(
+        self,
+        bucket: str,
+        path: str,
+        content: bytes,
+        content_type: Optional[str] = None,
+        upsert: bool = False,
+    ) -> None:
+        options: Dict[str, str] = {}
+        if content_type:
+            options["content-type"] = content_type
+        if upsert:
+            options["upsert"] = "true"
+        await self._run(
+            self.client.storage.from_(bucket).upload, path, content, options
+        )
+
+    async def remove(self, bucket: str, paths: List[str]) -> None:
+        await self._run(self.client.storage.from_(bucket).remove, paths)
+
+    async def create_signed_urls(
+        self, bucket: str, paths: List[str], expires: int
+    ) -> List[Dict[str, Any]]:
+        results = await self._run(
+            self.client.storage.from_(bucket).create_signed_urls, paths, expires
+        )
+        return [dict(result) for result in results]
+
+    def get_public_url(self, bucket: str, path: str) -> str:
+        # Built locally by the client; no request is made.
+        return str(self.client.storage.from_(bucket).get_public_url(path))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class LocalStorage:
+    """
+    Keeps objects in memory, or under `root` on the local filesystem.
+
+    Meant for tests and local runs without Supabase.
+    """
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self.root = root
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+
+    def _file(self, bucket: str, path: str) -> str:
+        assert self.root is not None
+        return os.path.join(self.root, bucket, path)
+
+    def exists(self, bucket: str, path: str) -> bool:
+        if self.root is None:
+            return (bucket, path) in self.objects
+        return os.path.isfile(self._file(bucket, path))
+
+    async def upload(
+        self,
+        bucket: str,
+        path: str,
+        content: bytes,
+        content_type: Optional[str] = None,
+        upsert: bool = False,
+    ) -> None:
+        if self.exists(bucket, path) and not upsert:
+            raise FileExistsError(f"{bucket}/{path} already exists")
+        if self.root is None:
+            self.objects[(bucket, path)] = content
+            return
+        file_path = self._file(bucket, path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as f:
+            f.write(content)
+
+    async def remove(self, bucket: str, paths: List[str]) -> None:
+        for path in paths:
+            if self.root is None:
+                self.objects.pop((bucket, path), None)
+            elif self.exists(bucket, path):
+                os.remove(self._file(bucket, path))
+
+    async def create_signed_urls(
+        self, bucket: str, paths: List[str], expires: int
+    ) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
+        for path in paths:
+            if self.exists(bucket, path):
+                url = f"{self.get_public_url(bucket, path)}?expires={expires}"
+                results.append({"path": path, "signedURL": url, "error": None})
+            else:
+                results.append(
+                    {"path": path, "signedURL": None, "error": "Object not found"}
+                )
+        return results
+
+    def get_public_url(self, bucket: str, path: str) -> str:
+        if self.root is None:
+            return f"memory://{bucket}/{path}"
+        return f"file://{os.path.abspath(self._file(bucket, path))}"
+
+
+storage: Optional[Storage] = None
+
+
+def init_storage() -> Storage:
+    global storage
+    if storage is not None:
+        return storage
+    backend = settings.STORAGE_BACKEND
+    if backend == "supabase":
+        try:
+            client = create_client(
+                settings.SUPABASE_PROJECT_URL,
+                settings.SUPABASE_SERVICE_ROLE_KEY,
+                options=ClientOptions(
+                    storage_client_timeout=int(settings.STORAGE_TIMEOUT_SECONDS)
+                ),
+            )
+        except Exception as e:
+            logger.error(f"Failed to initialize Supabase: {e}", exc_info=True)
+            raise
+        storage = SupabaseStorage(
+            client, settings.STORAGE_MAX_CONCURRENCY, settings.STORAGE_TIMEOUT_SECONDS
+        )
+    elif backend == "local":
+        storage = LocalStorage(settings.STORAGE_LOCAL_ROOT)
+    elif backend == "memory":
+        storage = LocalStorage()
+    else:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return storage
+
+
+@asynccontextmanager
+async def get_storage() -> AsyncGenerator[Storage, None]:
+    current = storage if storage is not None else init_storage()
+
+    try:
+        yield current
     except Exception as e:
-        logger.error(f"Failed to initialize Supabase: {e}", exc_info=True)
+        logger.error(f"Storage error: {str(e)}", exc_info=True)
         raise
 
 
+def close_storage() -> None:
+    global storage
+    if isinstance(storage, SupabaseStorage):
+        storage.close()
+    storage = None
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """
@@ -98,13 +283,14 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         # Startup
         await init_db()
         init_redis_cache()
-        init_supabase()
+        init_storage()
         logger.info("Application startup complete")
         yield
     finally:
         # Shutdown - ensure cleanup happens even if there are errors
         try:
             await close_db()
+            close_storage()
             logger.info("Application shutdown complete")
         except Exception as e:
             logger.error(f"Error during application shutdown: {e}", exc_info=True)
@@ -1,8 +1,10 @@
 from logging import getLogger
 
+from src.cv.preview_cache import invalidate_static_data
 from src.database import get_db
 from src.education.exceptions import EducationNotFoundException
 from src.education.schemas import EducationCreate, EducationOut, EducationUpdate
+from src.portfolio.public_cache import invalidate_public_portfolios
 
 logger = getLogger(__name__)
 
@@ -29,6 +31,8 @@ async def add_education(uid: str, entries: list[EducationCreate]) -> bool:
     async with get_db() as db:
         for entry in entries:
             await db.education.create(data={"user_id": uid, **entry.model_dump()})
+        await invalidate_static_data(uid)
+        await invalidate_public_portfolios(uid)
         return True
 
 
@@ -41,6 +45,8 @@ async def delete_education(uid: str, education_id: int) -> bool:
             raise EducationNotFoundException()
 
         await db.education.delete(where={"id": education_id})
+        await invalidate_static_data(uid)
+        await invalidate_public_portfolios(uid)
         return True
 
 
@@ -58,6 +64,8 @@ async def update_education(
             where={"id": education_id},
             data=update.model_dump(exclude_unset=True, exclude_none=True),
         )
+        await invalidate_static_data(uid)
+        await invalidate_public_portfolios(uid)
 
         return EducationOut(
             id=updated.id,
@@ -6,14 +6,16 @@ from fastapi.exception_handlers import request_validation_exception_handler
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.datastructures import Headers
+from starlette.requests import ClientDisconnect
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from src.auth.constants import (
     AUTH_HEADER_MISSING,
     INVALID_TOKEN,
     TOKEN_VERIFICATION_ERROR,
 )
+from src.auth.token_cache import token_cache
 from src.firebase import auth, verify_token
 
 logger = getLogger(__name__)
@@ -25,19 +27,85 @@ ERROR_DETAIL_SUFFIX = '"}'
 
 security = HTTPBearer(auto_error=False)
 
+# Paths served without a Firebase token
+PUBLIC_PATHS = {
+    "/api/v1/docs",
+    "/api/v1/redoc",
+    "/api/v1/openapi.json",
+    "/openapi.json",
+    "/favicon.ico",
+    "/",
+}
+PUBLIC_PORTFOLIO_PREFIX = "/api/v1/portfolio/public/"
+
+
+class LimitBodySizeMiddleware:
+    """
+    Reject request bodies larger than `max_bytes` with 413.
+
+    The declared Content-Length is checked before the app runs. Bodies without
+    one (chunked uploads) are counted as they stream through `receive`, so
+    nothing is buffered here and multipart uploads stay streamed.
+    """
 
-class LimitBodySizeMiddleware(BaseHTTPMiddleware):
     def __init__(self, app: ASGIApp, max_bytes: int) -> None:
-        super().__init__(app)
+        self.app = app
         self.max_bytes = max_bytes
 
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        body = await request.body()
-        if len(body) > self.max_bytes:
-            return Response("Payload too large", status_code=413)
-        return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if (
+            content_length is not None
+            and content_length.isdigit()
+            and int(content_length) > self.max_bytes
+        ):
+            await self._payload_too_large(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+        rejected = False
+        replied = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejected, replied
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    rejected = True
+                    if not response_started:
+                        replied = True
+                        await self._payload_too_large(scope, receive, send)
+                    # The app sees a client disconnect and stops reading.
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            if replied:
+                # A 413 has already been sent; drop whatever the app replies.
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except ClientDisconnect:
+            if not replied:
+                raise
+
+    @staticmethod
+    async def _payload_too_large(scope: Scope, receive: Receive, send: Send) -> None:
+        response = Response("Payload too large", status_code=413)
+        await response(scope, receive, send)
 
 
 async def verify_token_middleware(
@@ -85,67 +153,74 @@ async def verify_token_middleware(
         )
 
 
-class FirebaseAuthMiddleware(BaseHTTPMiddleware):
+class FirebaseAuthMiddleware:
     """Middleware to handle Firebase authentication and set user UID in request state."""
 
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if (
+            scope["method"] == "OPTIONS"
+            or path in PUBLIC_PATHS
+            or path.startswith(PUBLIC_PORTFOLIO_PREFIX)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def tracked_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            if (
-                request.method == "OPTIONS"
-                or request.url.path
-                in [
-                    "/api/v1/docs",
-                    "/api/v1/redoc",
-                    "/api/v1/openapi.json",
-                    "/openapi.json",
-                    "/favicon.ico",
-                    "/",
-                ]
-                or request.url.path.startswith("/api/v1/portfolio/public/")
-            ):
-                return await call_next(request)
-
-            auth_header = request.headers.get("Authorization")
+            auth_header = Headers(scope=scope).get("Authorization")
             if not auth_header:
                 logger.warning(AUTH_HEADER_MISSING)
-                return Response(
-                    content=ERROR_DETAIL_PREFIX
-                    + AUTH_HEADER_MISSING
-                    + ERROR_DETAIL_SUFFIX,
-                    status_code=401,
-                    media_type=JSON_MEDIA_TYPE,
-                )
+                await self._unauthorized(AUTH_HEADER_MISSING, scope, receive, send)
+                return
 
             # Remove 'Bearer ' prefix if present
             token = auth_header.replace("Bearer ", "")
-            decoded_token = auth.verify_id_token(token)
+            decoded_token = await token_cache.verify(token, auth.verify_id_token)
 
             # Set user data in request state
-            request.state.user = decoded_token
-            request.state.uid = decoded_token.get("uid")
+            state = Request(scope).state
+            state.user = decoded_token
+            state.uid = decoded_token.get("uid")
 
             # Process the request
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, tracked_send)
 
         except ValueError as e:
+            if response_started:
+                raise
             logger.warning(e)
-            return Response(
-                content=ERROR_DETAIL_PREFIX + INVALID_TOKEN + ERROR_DETAIL_SUFFIX,
-                status_code=401,
-                media_type=JSON_MEDIA_TYPE,
-            )
+            await self._unauthorized(INVALID_TOKEN, scope, receive, send)
         except Exception as e:
+            if response_started:
+                raise
             logger.error(f"{TOKEN_VERIFICATION_ERROR}: {str(e)}")
-            return Response(
-                content=ERROR_DETAIL_PREFIX
-                + TOKEN_VERIFICATION_ERROR
-                + ERROR_DETAIL_SUFFIX,
-                status_code=401,
-                media_type=JSON_MEDIA_TYPE,
-            )
+            await self._unauthorized(TOKEN_VERIFICATION_ERROR, scope, receive, send)
+
+    @staticmethod
+    async def _unauthorized(
+        detail: str, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        response = Response(
+            content=ERROR_DETAIL_PREFIX + detail + ERROR_DETAIL_SUFFIX,
+            status_code=401,
+            media_type=JSON_MEDIA_TYPE,
+        )
+        await response(scope, receive, send)
 
 
 async def validation_exception_handler(request: Request, exc: Exception) -> Response:
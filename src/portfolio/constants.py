@@ -3,3 +3,5 @@ PORTFOLIO_NOT_FOUND = "Portfolio not found."
 PORTFOLIO_PUBLISH_ERROR = "Failed to publish portfolio."
 PORTFOLIO_PUBLIC_NOT_FOUND = "Portfolio not found or not public."
 PORTFOLIO_UNPUBLISH_SUCCESS = "Portfolio unpublished and public URL removed."
+PORTFOLIO_INVALID_IMAGE = "Invalid image. Upload a PNG, JPEG, GIF or WebP image."
+PORTFOLIO_IMAGE_BUSY = "Image processing is busy. Please try again shortly."
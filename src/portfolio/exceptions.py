@@ -1,4 +1,6 @@
 from src.portfolio.constants import (
+    PORTFOLIO_IMAGE_BUSY,
+    PORTFOLIO_INVALID_IMAGE,
     PORTFOLIO_INVALID_THEME,
     PORTFOLIO_NOT_FOUND,
     PORTFOLIO_PUBLIC_NOT_FOUND,
@@ -13,6 +15,20 @@ class PortfolioInvalidThemeException(Exception):
         super().__init__(self.message)
 
 
+class PortfolioInvalidImageException(Exception):
+    def __init__(self, message: str = PORTFOLIO_INVALID_IMAGE) -> None:
+        self.message = message
+        self.status_code = 400
+        super().__init__(self.message)
+
+
+class PortfolioImageBusyException(Exception):
+    def __init__(self, message: str = PORTFOLIO_IMAGE_BUSY) -> None:
+        self.message = message
+        self.status_code = 503
+        super().__init__(self.message)
+
+
 class PortfolioNotFoundException(Exception):
     def __init__(self, message: str = PORTFOLIO_NOT_FOUND) -> None:
         self.message = message
@@ -0,0 +1,186 @@
+import asyncio
+import multiprocessing
+import re
+import warnings
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from logging import getLogger
+from typing import Dict, List, Optional, Sequence
+
+from src.config import settings
+from src.portfolio.exceptions import (
+    PortfolioImageBusyException,
+    PortfolioInvalidImageException,
+)
+from src.util import kill_pool
+
+logger = getLogger(__name__)
+
+# Every uploaded logo and thumbnail is stored as WebP at these widths
+IMAGE_WIDTHS = (320, 640, 1280)
+# Widths the public page lays logos and thumbnails out at
+LOGO_WIDTH = 320
+THUMBNAIL_WIDTH = 640
+WEBP_QUALITY = 80
+ACCEPTED_FORMATS = ["PNG", "JPEG", "GIF", "WEBP"]
+# Far above any logo or thumbnail; larger images are rejected before decoding
+MAX_IMAGE_PIXELS = 25_000_000
+VARIANT_SUFFIX = re.compile(r"-(\d+)\.webp$")
+
+
+def encode_variants(
+    data: bytes,
+    widths: Sequence[int],
+    quality: int,
+    max_pixels: int = MAX_IMAGE_PIXELS,
+) -> Dict[int, bytes]:
+    """
+    Re-encode an image as WebP at each of `widths`.
+
+    Images are never upscaled: a variant wider than the original keeps the
+    original size. Each variant is scaled down from the previous one, widest
+    first. Images of more than `max_pixels` pixels are rejected.
+    """
+    from PIL import Image, ImageOps
+
+    # Pillow only warns between the limit and twice the limit
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", Image.DecompressionBombWarning)
+        with Image.open(BytesIO(data), formats=ACCEPTED_FORMATS) as source:
+            image = ImageOps.exif_transpose(source)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            variants: Dict[int, bytes] = {}
+            for width in sorted(widths, reverse=True):
+                if image.width > width:
+                    height = max(1, round(image.height * width / image.width))
+                    image = image.resize((width, height), Image.Resampling.LANCZOS)
+                out = BytesIO()
+                image.save(out, "WEBP", quality=quality)
+                variants[width] = out.getvalue()
+    return variants
+
+
+def variant_path(base: str, width: int) -> str:
+    return f"{base}-{width}.webp"
+
+
+def image_variant(path: str, width: int) -> str:
+    """The path of an image's variant at `width`; other images as they are."""
+    if width in IMAGE_WIDTHS and VARIANT_SUFFIX.search(path):
+        return VARIANT_SUFFIX.sub(f"-{width}.webp", path)
+    return path
+
+
+def image_variants(path: str) -> List[str]:
+    """The paths of every stored variant of an image."""
+    if VARIANT_SUFFIX.search(path):
+        return [image_variant(path, width) for width in IMAGE_WIDTHS]
+    return [path]
+
+
+class ImageOptimizer:
+    """
+    Resizes and re-encodes uploaded images in a pool of worker processes.
+
+    Decoding and encoding are CPU bound, so they are kept off the event loop
+    and out of the GIL. The pool is started on first use. Images wait for a
+    free worker before they are submitted, so `timeout` bounds the time one
+    is processed, not the time it waits behind others. A pool whose worker
+    timed out or died is killed and the next call starts a new one. Images
+    that were being processed in a pool killed over another's timeout are
+    retried once on the new pool.
+    """
+
+    def __init__(self, workers: int, timeout: float) -> None:
+        self.workers = workers
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._workers = asyncio.Semaphore(workers)
+        # Pools killed because one of their images timed out
+        self._timed_out: weakref.WeakSet[ProcessPoolExecutor] = weakref.WeakSet()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    async def optimize(self, data: bytes) -> Dict[int, bytes]:
+        """
+        WebP variants of an image, keyed by width.
+
+        Raises:
+            PortfolioInvalidImageException: If the image cannot be read or
+                takes too long to process
+            PortfolioImageBusyException: If other images' timeouts killed
+                the pool under this one twice
+        """
+        async with self._workers:
+            try:
+                return await self._submit(data)
+            except BrokenProcessPool:
+                # Killed over another image's timeout; nothing says this
+                # image is at fault
+                logger.warning("Image optimization pool was killed, retrying")
+                try:
+                    return await self._submit(data)
+                except BrokenProcessPool:
+                    raise PortfolioImageBusyException()
+
+    async def _submit(self, data: bytes) -> Dict[int, bytes]:
+        """
+        Process one image on the pool.
+
+        Raises:
+            PortfolioInvalidImageException: If the image cannot be read,
+                takes too long or kills its worker
+            BrokenProcessPool: If the pool was killed because another image
+                timed out
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(
+                    pool, encode_variants, data, IMAGE_WIDTHS, WEBP_QUALITY
+                ),
+                self.timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Image optimization timed out after {self.timeout}s")
+            # The worker is still busy with it; cancelling does not stop it
+            self._timed_out.add(pool)
+            self._discard_pool(pool)
+            raise PortfolioInvalidImageException()
+        except BrokenProcessPool as e:
+            if pool in self._timed_out:
+                raise
+            logger.warning(f"Image optimization worker died: {e}")
+            self._discard_pool(pool)
+            raise PortfolioInvalidImageException()
+        except Exception as e:
+            logger.warning(f"Image optimization failed: {e}")
+            raise PortfolioInvalidImageException()
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        # Concurrent failures may already have replaced it
+        if self._pool is pool:
+            self._pool = None
+        kill_pool(pool)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+image_optimizer = ImageOptimizer(
+    workers=settings.PORTFOLIO_IMAGE_WORKERS,
+    timeout=settings.PORTFOLIO_IMAGE_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,158 @@
+import hashlib
+from logging import getLogger
+from typing import NamedTuple, Optional
+
+from src.database import redis_client
+
+logger = getLogger(__name__)
+
+REDIS_PUBLIC_PAGE_PREFIX = "portfolio:public:page:"
+# Published URLs of each owner's cached pages, so profile, education and
+# certificate writes can drop them without a database lookup
+REDIS_PUBLIC_OWNER_PREFIX = "portfolio:public:owner:"
+# Bumped by every invalidation of a page, or of all an owner's pages. A page
+# built on a cache miss is only cached if neither changed while it was built,
+# so an update or unpublish racing with the build cannot be undone by it.
+REDIS_PUBLIC_PAGE_GENERATION_PREFIX = "portfolio:public:generation:page:"
+REDIS_PUBLIC_OWNER_GENERATION_PREFIX = "portfolio:public:generation:owner:"
+# Images and certificate links in the page are signed for an hour and reused
+# from the signed URL cache for at most half of that; keep snapshots well
+# inside the window.
+PUBLIC_PORTFOLIO_TTL_SECONDS = 900
+# Browsers and CDNs revalidate with If-None-Match after this
+PUBLIC_PORTFOLIO_CACHE_CONTROL = "public, max-age=60"
+
+# Caches the page only if both generations still have the values read
+# before it was built
+CACHE_IF_CURRENT_SCRIPT = """
+if (redis.call('GET', KEYS[3]) or '0') ~= ARGV[1]
+    or (redis.call('GET', KEYS[4]) or '0') ~= ARGV[2] then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'body', ARGV[3], 'etag', ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+redis.call('SADD', KEYS[2], ARGV[5])
+redis.call('EXPIRE', KEYS[2], ARGV[6])
+return 1
+"""
+
+
+class PublicSnapshot(NamedTuple):
+    """A serialized PublicPortfolioOut and its ETag."""
+
+    body: str
+    etag: str
+
+
+class PublicGeneration(NamedTuple):
+    """The page and owner generations a page was built at."""
+
+    page: str
+    owner: str
+
+
+def public_etag(body: str) -> str:
+    return f'"{hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+async def get_cached_public_portfolio(published_url: str) -> Optional[PublicSnapshot]:
+    try:
+        raw = await redis_client.hgetall(f"{REDIS_PUBLIC_PAGE_PREFIX}{published_url}")
+    except Exception as e:
+        logger.warning(f"Public portfolio cache lookup failed: {e}")
+        return None
+    if not raw or "body" not in raw or "etag" not in raw:
+        return None
+    return PublicSnapshot(body=str(raw["body"]), etag=str(raw["etag"]))
+
+
+async def get_generation(key: str) -> Optional[str]:
+    """A page or owner generation; None if it cannot be read."""
+    try:
+        value = await redis_client.get(key)
+    except Exception as e:
+        logger.warning(f"Public portfolio generation lookup failed: {e}")
+        return None
+    return str(value) if value is not None else "0"
+
+
+async def get_page_generation(published_url: str) -> Optional[str]:
+    return await get_generation(f"{REDIS_PUBLIC_PAGE_GENERATION_PREFIX}{published_url}")
+
+
+async def get_owner_generation(uid: str) -> Optional[str]:
+    return await get_generation(f"{REDIS_PUBLIC_OWNER_GENERATION_PREFIX}{uid}")
+
+
+async def bump_generation(key: str) -> None:
+    # Expires long after any build that read it has finished; a lapsed
+    # generation reads as "0", which differs from any value read before
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.incr(key)
+        pipe.expire(key, PUBLIC_PORTFOLIO_TTL_SECONDS)
+        await pipe.execute()
+
+
+async def cache_public_portfolio(
+    uid: str,
+    published_url: str,
+    body: str,
+    generation: Optional[PublicGeneration],
+) -> PublicSnapshot:
+    """
+    Cache a page built at `generation`, unless the page or its owner's pages
+    were invalidated since. The snapshot is returned either way.
+    """
+    snapshot = PublicSnapshot(body=body, etag=public_etag(body))
+    if generation is None:
+        return snapshot
+    try:
+        cached = await redis_client.eval(
+            CACHE_IF_CURRENT_SCRIPT,
+            4,
+            f"{REDIS_PUBLIC_PAGE_PREFIX}{published_url}",
+            f"{REDIS_PUBLIC_OWNER_PREFIX}{uid}",
+            f"{REDIS_PUBLIC_PAGE_GENERATION_PREFIX}{published_url}",
+            f"{REDIS_PUBLIC_OWNER_GENERATION_PREFIX}{uid}",
+            generation.page,
+            generation.owner,
+            snapshot.body,
+            snapshot.etag,
+            published_url,
+            PUBLIC_PORTFOLIO_TTL_SECONDS,
+        )
+        if not cached:
+            logger.info("Public portfolio changed while it was built, not caching")
+    except Exception as e:
+        logger.warning(f"Public portfolio cache write failed: {e}")
+    return snapshot
+
+
+async def invalidate_public_portfolio(published_url: str) -> None:
+    """Drop the cached page of one published portfolio."""
+    try:
+        await bump_generation(f"{REDIS_PUBLIC_PAGE_GENERATION_PREFIX}{published_url}")
+        await redis_client.delete(f"{REDIS_PUBLIC_PAGE_PREFIX}{published_url}")
+    except Exception as e:
+        logger.warning(f"Public portfolio cache invalidation failed: {e}")
+
+
+async def invalidate_public_portfolios(uid: str) -> None:
+    """Drop the cached pages of all of a user's published portfolios."""
+    owner_key = f"{REDIS_PUBLIC_OWNER_PREFIX}{uid}"
+    try:
+        await bump_generation(f"{REDIS_PUBLIC_OWNER_GENERATION_PREFIX}{uid}")
+        published_urls = await redis_client.smembers(owner_key)
+        await redis_client.delete(
+            owner_key,
+            *(f"{REDIS_PUBLIC_PAGE_PREFIX}{str(url)}" for url in published_urls),
+        )
+    except Exception as e:
+        logger.warning(f"Public portfolio cache invalidation failed: {e}")
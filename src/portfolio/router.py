@@ -1,12 +1,15 @@
 from logging import getLogger
 
 from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 from src.portfolio.exceptions import (
+    PortfolioImageBusyException,
+    PortfolioInvalidImageException,
     PortfolioInvalidThemeException,
     PortfolioNotFoundException,
 )
+from src.portfolio.public_cache import PUBLIC_PORTFOLIO_CACHE_CONTROL, etag_matches
 from src.portfolio.schemas import (
     PortfolioCreateRequest,
     PortfolioFullOut,
@@ -14,10 +17,10 @@ from src.portfolio.schemas import (
     PortfolioOut,
     PublicPortfolioOut,
 )
-from src.portfolio.service import get_full_public_portfolio  # <-- add this import
 from src.portfolio.service import (
     create_new_portfolio,
     get_portfolio_details,
+    get_public_portfolio_snapshot,
     list_of_portfolios,
     publish_portfolio_service,
     unpublish_portfolio_service,
@@ -115,7 +118,11 @@ async def update_portfolio_endpoint(
             project_thumbnails=project_thumbnails,
             company_logos=company_logos,
         )
-    except PortfolioNotFoundException as e:
+    except (
+        PortfolioNotFoundException,
+        PortfolioInvalidImageException,
+        PortfolioImageBusyException,
+    ) as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception as e:
         logger.error(f"Failed to update portfolio: {e}")
@@ -171,10 +178,13 @@ async def unpublish_portfolio(request: Request, portfolio_id: int) -> JSONRespon
     response_model=PublicPortfolioOut,
     status_code=status.HTTP_200_OK,
 )
-async def view_public_portfolio(published_url: str) -> PublicPortfolioOut:
+async def view_public_portfolio(request: Request, published_url: str) -> Response:
+    """
+    Serves the portfolio's cached page with an ETag, answering 304 Not
+    Modified when it matches the request's If-None-Match.
+    """
     try:
-        result: PublicPortfolioOut = await get_full_public_portfolio(published_url)
-        return result
+        snapshot = await get_public_portfolio_snapshot(published_url)
     except PortfolioNotFoundException as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception as e:
@@ -182,9 +192,12 @@ async def view_public_portfolio(published_url: str) -> PublicPortfolioOut:
         raise HTTPException(
             status_code=500, detail="Failed to retrieve public portfolio"
         )
-        raise HTTPException(status_code=e.status_code, detail=e.message)
-    except Exception as e:
-        logger.error(f"Failed to retrieve public portfolio: {e}")
-        raise HTTPException(
-            status_code=500, detail="Failed to retrieve public portfolio"
-        )
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": PUBLIC_PORTFOLIO_CACHE_CONTROL,
+    }
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        content=snapshot.body, media_type="application/json", headers=headers
+    )
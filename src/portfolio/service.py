@@ -1,40 +1,96 @@
+import asyncio
 import json
 from datetime import datetime
 from logging import getLogger
-from typing import Any, Optional
+from typing import (
+    Any,
+    Coroutine,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 from uuid import uuid4
 
 from fastapi import UploadFile
 
-from src.certificate.service import generate_signed_url, get_user_certificates
+from src.blobs import (
+    acquire_blob,
+    blob_path,
+    content_digest,
+    is_blob_path,
+    mark_blob_stored,
+    release_blobs,
+)
+from src.certificate.service import generate_signed_urls, get_user_certificates
 from src.cv.schemas import (
     ExperienceIn,
-    ProjectTechnologyIn,
+    ProjectIn,
     PublicationIn,
     ResourceURLIn,
     TechnicalSkillIn,
 )
-from src.database import get_db, get_supabase
+from src.cv.service import (
+    create_missing,
+    create_rows,
+    experience_data,
+    fetch_project_technologies,
+    fetch_resource_urls,
+    project_data,
+    publication_data,
+    replace_project_technologies,
+    replace_resource_urls,
+    technical_skill_data,
+)
+from src.database import Storage, get_db, get_storage
 from src.education.service import get_user_education
 from src.portfolio.exceptions import (
     PortfolioInvalidThemeException,
     PortfolioNotFoundException,
 )
+from src.portfolio.images import (
+    IMAGE_WIDTHS,
+    LOGO_WIDTH,
+    THUMBNAIL_WIDTH,
+    image_optimizer,
+    image_variant,
+    image_variants,
+    variant_path,
+)
+from src.portfolio.public_cache import (
+    PublicGeneration,
+    PublicSnapshot,
+    cache_public_portfolio,
+    get_cached_public_portfolio,
+    get_owner_generation,
+    get_page_generation,
+    invalidate_public_portfolio,
+)
 from src.portfolio.schemas import (
     FeedbackIn,
     PortfolioFullOut,
     PortfolioListOut,
     PortfolioOut,
     PortfolioProjectIn,
+    PortfolioSaveContent,
     PortfolioSaveRequest,
+    PublicCertificateOut,
+    PublicEducationOut,
     PublicPortfolioOut,
 )
+from src.prisma_client import Prisma, models
 from src.users.service import get_user_profile_by_uid
 from src.util import to_datetime
 
 logger = getLogger(__name__)
 
 PORTFOLIO_IMAGE_BUCKET = "portfolio-images"
+# Image uploads in flight per portfolio update
+IMAGE_UPLOAD_CONCURRENCY = 4
 
 
 async def create_new_portfolio(uid: str, theme: str) -> int:
@@ -72,27 +128,74 @@ async def list_of_portfolios(uid: str) -> list[PortfolioListOut]:
         ]
 
 
-async def get_portfolio_details(uid: str, portfolio_id: int) -> PortfolioFullOut:
-    async with get_db() as db, get_supabase() as supabase:
-        portfolio = await db.portfolio.find_unique(where={"id": portfolio_id})
-        if not portfolio or portfolio.user_id != uid:
-            raise PortfolioNotFoundException()
-
-        exp_links = await db.portfolio_experience.find_many(
+async def fetch_portfolio_links(db: Prisma, portfolio_id: int) -> Tuple[
+    List[models.Portfolio_Experience],
+    List[models.Portfolio_Project],
+    List[models.Portfolio_Publication],
+    List[models.Portfolio_TechnicalSkill],
+    List[models.PortfolioFeedback],
+]:
+    """Run the four link queries and the feedback lookup concurrently."""
+    return await asyncio.gather(
+        db.portfolio_experience.find_many(
             where={"portfolio_id": portfolio_id}, include={"experience": True}
-        )
-        proj_links = await db.portfolio_project.find_many(
+        ),
+        db.portfolio_project.find_many(
             where={"portfolio_id": portfolio_id}, include={"project": True}
-        )
-        pub_links = await db.portfolio_publication.find_many(
+        ),
+        db.portfolio_publication.find_many(
             where={"portfolio_id": portfolio_id}, include={"publication": True}
-        )
-        skill_links = await db.portfolio_technicalskill.find_many(
+        ),
+        db.portfolio_technicalskill.find_many(
             where={"portfolio_id": portfolio_id}, include={"technical_skill": True}
+        ),
+        db.portfoliofeedback.find_many(where={"portfolio_id": portfolio_id}),
+    )
+
+
+async def get_portfolio_details(
+    uid: str,
+    portfolio_id: int,
+    logo_width: Optional[int] = None,
+    thumbnail_width: Optional[int] = None,
+) -> PortfolioFullOut:
+    """
+    Load a portfolio with everything it links to.
+
+    The link queries run concurrently, then the technologies and resource
+    URLs of all projects and publications are fetched with one query each
+    while every logo and thumbnail is signed in one storage call, so the
+    number of round trips does not grow with the portfolio. Images are
+    signed at their widest unless `logo_width` or `thumbnail_width` picks
+    another variant.
+    """
+    async with get_db() as db, get_storage() as storage:
+        portfolio = await db.portfolio.find_unique(where={"id": portfolio_id})
+        if not portfolio or portfolio.user_id != uid:
+            raise PortfolioNotFoundException()
+
+        exp_links, proj_links, pub_links, skill_links, feedbacks = (
+            await fetch_portfolio_links(db, portfolio_id)
         )
-        feedbacks = await db.portfoliofeedback.find_many(
-            where={"portfolio_id": portfolio_id}
+
+        proj_ids = [link.project.id for link in proj_links]
+        pub_ids = [link.publication.id for link in pub_links]
+        shown_images = {
+            image: image_variant(image, width) if width else image
+            for image, width in [
+                (link.experience.company_logo, logo_width) for link in exp_links
+            ]
+            + [(link.thumbnail_url, thumbnail_width) for link in proj_links]
+            if image and is_storage_path(image)
+        }
+        technologies, urls, signed = await asyncio.gather(
+            fetch_project_technologies(db, proj_ids),
+            fetch_resource_urls(db, {"project": proj_ids, "publication": pub_ids}),
+            generate_signed_urls(
+                storage, list(shown_images.values()), PORTFOLIO_IMAGE_BUCKET
+            ),
         )
+        image_urls = {image: signed[path] for image, path in shown_images.items()}
 
         experiences = []
         for link in exp_links:
@@ -102,64 +205,37 @@ async def get_portfolio_details(uid: str, portfolio_id: int) -> PortfolioFullOut
             exp_dict["end_date"] = to_datetime(exp_dict["end_date"])
             logo_url = exp_dict.get("company_logo")
             if logo_url:
-                exp_dict["company_logo"] = generate_signed_url(
-                    supabase, logo_url, PORTFOLIO_IMAGE_BUCKET
-                )
+                exp_dict["company_logo"] = image_urls.get(logo_url, logo_url)
             if exp_dict.get("company_logo") is None:
                 exp_dict["company_logo"] = ""
             experiences.append(ExperienceIn(**exp_dict))
 
-        projects = []
-        for link in proj_links:
-            p = link.project
-            techs = await db.projecttechnology.find_many(where={"project_id": p.id})
-            urls = await db.resourceurl.find_many(
-                where={"source_id": p.id, "source_type": "project"}
-            )
-            thumb_url = link.thumbnail_url
-            if thumb_url:
-                thumb_url = generate_signed_url(
-                    supabase, thumb_url, PORTFOLIO_IMAGE_BUCKET
-                )
-            projects.append(
-                PortfolioProjectIn(
-                    id=p.id,
-                    name=p.name,
-                    description=p.description,
-                    technologies=[
-                        ProjectTechnologyIn(id=t.id, technology=t.technology)
-                        for t in techs
-                    ],
-                    urls=[
-                        ResourceURLIn(
-                            id=u.id, label=u.label, url=u.url, source_type=u.source_type
-                        )
-                        for u in urls
-                    ],
-                    thumbnail_url=thumb_url,
-                )
+        projects = [
+            PortfolioProjectIn(
+                id=link.project.id,
+                name=link.project.name,
+                description=link.project.description,
+                technologies=technologies[link.project.id],
+                urls=urls[("project", link.project.id)],
+                thumbnail_url=(
+                    image_urls.get(link.thumbnail_url, link.thumbnail_url)
+                    if link.thumbnail_url
+                    else None
+                ),
             )
+            for link in proj_links
+        ]
 
-        publications = []
-        for link in pub_links:
-            pub = link.publication
-            urls = await db.resourceurl.find_many(
-                where={"source_id": pub.id, "source_type": "publication"}
-            )
-            publications.append(
-                PublicationIn(
-                    id=pub.id,
-                    title=pub.title,
-                    journal=pub.journal,
-                    year=pub.year,
-                    urls=[
-                        ResourceURLIn(
-                            id=u.id, label=u.label, url=u.url, source_type=u.source_type
-                        )
-                        for u in urls
-                    ],
-                )
+        publications = [
+            PublicationIn(
+                id=link.publication.id,
+                title=link.publication.title,
+                journal=link.publication.journal,
+                year=link.publication.year,
+                urls=urls[("publication", link.publication.id)],
             )
+            for link in pub_links
+        ]
 
         technical_skills = [
             TechnicalSkillIn(**link.technical_skill.__dict__) for link in skill_links
@@ -185,190 +261,396 @@ async def get_portfolio_details(uid: str, portfolio_id: int) -> PortfolioFullOut
         )
 
 
+class PortfolioWrite(NamedTuple):
+    portfolio: models.Portfolio
+    # Logos and thumbnails replaced or unlinked, to release after commit
+    replaced_images: List[str]
+    changed: bool
+
+
+def portfolio_out(portfolio: models.Portfolio) -> PortfolioOut:
+    return PortfolioOut(
+        id=portfolio.id,
+        title=portfolio.title,
+        theme=portfolio.theme,
+        created_at=portfolio.created_at,
+        updated_at=portfolio.updated_at,
+        is_public=portfolio.is_public,
+        bio=portfolio.bio or "",
+    )
+
+
 async def update_portfolio_content(
     uid: str, payload: PortfolioSaveRequest
 ) -> PortfolioOut:
-    async with get_db() as db:
-        portfolio = await db.portfolio.find_unique(where={"id": payload.portfolio_id})
-        if not portfolio or portfolio.user_id != uid:
-            raise PortfolioNotFoundException()
+    return await save_portfolio(uid, payload.portfolio_id, payload.save_content)
 
-        # Delete all shared table links
-        await db.portfolio_experience.delete_many(
-            where={"portfolio_id": payload.portfolio_id}
-        )
-        await db.portfolio_project.delete_many(
-            where={"portfolio_id": payload.portfolio_id}
-        )
-        await db.portfolio_publication.delete_many(
-            where={"portfolio_id": payload.portfolio_id}
-        )
-        await db.portfolio_technicalskill.delete_many(
-            where={"portfolio_id": payload.portfolio_id}
-        )
-
-        save_content = payload.save_content
-
-        # Update main portfolio fields
-        updated_portfolio = await db.portfolio.update(
-            where={"id": payload.portfolio_id},
-            data={
-                "title": save_content.title,
-                "bio": save_content.bio,
-                "updated_at": datetime.now(),
-            },
-        )
 
-        # Experiences
-        for exp in save_content.experiences:
-            exp_id = exp.id
-            if not exp_id:
-                new_exp_data = exp.model_dump(exclude={"id"})
-                # Always convert start_date and end_date to datetime
-                new_exp_data["start_date"] = to_datetime(new_exp_data["start_date"])
-                new_exp_data["end_date"] = to_datetime(new_exp_data["end_date"])
-                new_exp = await db.experience.create(data=new_exp_data)
-                exp_id = new_exp.id
-            await db.portfolio_experience.create(
-                data={"portfolio_id": payload.portfolio_id, "exp_id": exp_id}
-            )
+async def save_portfolio(
+    uid: str,
+    portfolio_id: int,
+    content: PortfolioSaveContent,
+    logos: Optional[Dict[int, str]] = None,
+    thumbnails: Optional[Dict[int, str]] = None,
+) -> PortfolioOut:
+    """
+    Save portfolio content in one transaction.
 
-        # Projects
-        for proj in save_content.projects:
-            proj_id = proj.id
-            if not proj_id:
-                new_proj_data = {
-                    "name": proj.name,
-                    "description": proj.description,
-                }
-                new_proj = await db.project.create(data=new_proj_data)
-                proj_id = new_proj.id
-            await db.portfolio_project.create(
-                data={
-                    "portfolio_id": payload.portfolio_id,
-                    "project_id": proj_id,
-                    "thumbnail_url": proj.thumbnail_url,
-                }
-            )
-            # Technologies
-            await db.projecttechnology.delete_many(where={"project_id": proj_id})
-            for tech in proj.technologies:
-                await db.projecttechnology.create(
-                    data={"project_id": proj_id, "technology": tech.technology}
-                )
-            # URLs
-            await db.resourceurl.delete_many(
-                where={"source_id": proj_id, "source_type": "project"}
-            )
-            for url in proj.urls:
-                await db.resourceurl.create(
-                    data={
-                        "source_id": proj_id,
-                        "source_type": url.source_type,
-                        "label": url.label,
-                        "url": url.url,
-                    }
+    `logos` and `thumbnails` hold already uploaded images by the index of
+    their experience or project. They are released again if the transaction
+    fails; the images they replace are released once it has committed.
+    """
+    logos = logos or {}
+    thumbnails = thumbnails or {}
+    async with get_db() as db, get_storage() as storage:
+        try:
+            # Everything below commits together or not at all.
+            async with db.tx() as tx:
+                result = await write_portfolio_content(
+                    tx, uid, portfolio_id, content, logos, thumbnails
                 )
+        except Exception:
+            await release_images(db, storage, [*logos.values(), *thumbnails.values()])
+            raise
+        await release_images(db, storage, result.replaced_images)
 
-        # Publications
-        for pub in save_content.publications:
-            pub_id = pub.id
-            if not pub_id:
-                new_pub_data = pub.model_dump(exclude={"id", "urls"})
-                new_pub = await db.publication.create(data=new_pub_data)
-                pub_id = new_pub.id
-            await db.portfolio_publication.create(
-                data={"portfolio_id": payload.portfolio_id, "publication_id": pub_id}
-            )
-            # URLs
-            await db.resourceurl.delete_many(
-                where={"source_id": pub_id, "source_type": "publication"}
-            )
-            for url in pub.urls:
-                await db.resourceurl.create(
-                    data={
-                        "source_id": pub_id,
-                        "source_type": url.source_type,
-                        "label": url.label,
-                        "url": url.url,
-                    }
-                )
+    if result.changed and result.portfolio.is_public:
+        await refresh_public_portfolio(result.portfolio.published_url)
+    return portfolio_out(result.portfolio)
 
-        # Technical Skills
-        for skill in save_content.technical_skills:
-            skill_id = skill.id
-            if not skill_id:
-                new_skill_data = skill.model_dump(exclude={"id"})
-                new_skill = await db.technicalskill.create(data=new_skill_data)
-                skill_id = new_skill.id
-            await db.portfolio_technicalskill.create(
-                data={"portfolio_id": payload.portfolio_id, "tech_skill_id": skill_id}
-            )
 
-        return PortfolioOut(
-            id=updated_portfolio.id,
-            title=updated_portfolio.title,
-            theme=updated_portfolio.theme,
-            created_at=updated_portfolio.created_at,
-            updated_at=updated_portfolio.updated_at,
-            is_public=updated_portfolio.is_public,
-            bio=updated_portfolio.bio or "",
-        )
+async def write_portfolio_content(
+    db: Prisma,
+    uid: str,
+    portfolio_id: int,
+    content: PortfolioSaveContent,
+    logos: Dict[int, str],
+    thumbnails: Dict[int, str],
+) -> PortfolioWrite:
+    """
+    Bring a portfolio in line with `content`, writing only what changed.
+
+    The portfolio and its links are read in one query, and the referenced
+    experiences, projects (with their technologies) and resource URLs in one
+    query each. New entities are created, links added and removed, and the
+    technologies and URLs of projects and publications whose lists differ
+    are replaced, one batch per table. Existing entities are otherwise left
+    as they are: only a newly uploaded logo or thumbnail replaces the stored
+    one. Stored images the payload copies onto new rows take a reference of
+    their own, and the thumbnails of unlinked projects are returned with the
+    replaced images. The portfolio row is updated only if something changed.
+    `db` is usually an interactive transaction, which runs one query at a
+    time, so queries are awaited in turn rather than gathered.
+    """
+    portfolio = await db.portfolio.find_unique(
+        where={"id": portfolio_id},
+        include={
+            "experience": True,
+            "projects": True,
+            "publications": True,
+            "technical_skills": True,
+        },
+    )
+    if not portfolio or portfolio.user_id != uid:
+        raise PortfolioNotFoundException()
 
+    experience_rows = await find_by_ids(
+        db.experience, [exp.id for exp in content.experiences]
+    )
+    project_rows = await find_by_ids(
+        db.project,
+        [proj.id for proj in content.projects],
+        include={"technologies": {"order_by": {"id": "asc"}}},
+    )
+    current_urls = await fetch_resource_urls(
+        db,
+        {
+            "project": [proj.id for proj in content.projects if proj.id],
+            "publication": [pub.id for pub in content.publications if pub.id],
+        },
+    )
 
-async def upload_image_to_supabase(
-    supabase: Any, uid: str, file: UploadFile, folder: str
-) -> str:
-    content = await file.read()
-    filename = f"{uid}/{folder}/{uuid4().hex}_{file.filename}"
-    supabase.storage.from_("portfolio-images").upload(
-        filename, content, {"content-type": file.content_type}
+    experiences = [
+        exp.model_copy(update={"company_logo": logos[idx]}) if idx in logos else exp
+        for idx, exp in enumerate(content.experiences)
+    ]
+    exp_ids = await create_missing(db.experience, experiences, experience_data)
+    pub_ids = await create_missing(
+        db.publication, content.publications, publication_data
     )
-    url: Optional[str] = supabase.storage.from_("portfolio-images").get_public_url(
-        filename
+    skill_ids = await create_missing(
+        db.technicalskill, content.technical_skills, technical_skill_data
     )
-    return url if url is not None else ""
+    proj_ids = await create_missing(db.project, content.projects, project_data)
+    changed = any(
+        not item.id
+        for items in (
+            content.experiences,
+            content.publications,
+            content.technical_skills,
+            content.projects,
+        )
+        for item in items
+    )
+    replaced_images: List[str] = []
 
+    # New logos of existing experiences
+    logo_updates = [
+        (exp.id, logos[idx])
+        for idx, exp in enumerate(content.experiences)
+        if idx in logos and exp.id
+    ]
+    for exp_id, _ in logo_updates:
+        row = experience_rows.get(exp_id)
+        if row and row.company_logo:
+            replaced_images.append(row.company_logo)
+    for exp_id, logo in logo_updates:
+        await db.experience.update(where={"id": exp_id}, data={"company_logo": logo})
+    changed |= bool(logo_updates)
+
+    # Project thumbnails live on the portfolio link
+    linked_thumbnails = {
+        link.project_id: link.thumbnail_url for link in portfolio.projects
+    }
+    new_thumbnails: Dict[int, Optional[str]] = {}
+    copied_images = [
+        exp.company_logo
+        for idx, exp in enumerate(content.experiences)
+        if not exp.id and idx not in logos and exp.company_logo
+    ]
+    for idx, (proj_id, proj) in enumerate(zip(proj_ids, content.projects)):
+        if idx in thumbnails:
+            new_thumbnails[proj_id] = thumbnails[idx]
+            if linked_thumbnails.get(proj_id):
+                replaced_images.append(str(linked_thumbnails[proj_id]))
+        elif proj_id not in linked_thumbnails and proj_id not in new_thumbnails:
+            new_thumbnails[proj_id] = proj.thumbnail_url
+            if proj.thumbnail_url:
+                copied_images.append(proj.thumbnail_url)
+    replaced_images.extend(
+        str(linked_thumbnails[proj_id])
+        for proj_id in set(linked_thumbnails).difference(proj_ids)
+        if linked_thumbnails[proj_id]
+    )
+    await acquire_images(db, copied_images)
+    thumbnail_updates = [
+        (proj_id, thumbnail)
+        for proj_id, thumbnail in new_thumbnails.items()
+        if proj_id in linked_thumbnails and thumbnail != linked_thumbnails[proj_id]
+    ]
+    for proj_id, thumbnail in thumbnail_updates:
+        await db.portfolio_project.update(
+            where={
+                "portfolio_id_project_id": {
+                    "portfolio_id": portfolio_id,
+                    "project_id": proj_id,
+                }
+            },
+            data={"thumbnail_url": thumbnail},
+        )
+    changed |= bool(thumbnail_updates)
+
+    changed |= await sync_links(
+        db.portfolio_experience,
+        portfolio_id,
+        "exp_id",
+        {link.exp_id for link in portfolio.experience},
+        exp_ids,
+    )
+    changed |= await sync_links(
+        db.portfolio_project,
+        portfolio_id,
+        "project_id",
+        set(linked_thumbnails),
+        proj_ids,
+        {
+            proj_id: {"thumbnail_url": thumbnail}
+            for proj_id, thumbnail in new_thumbnails.items()
+        },
+    )
+    changed |= await sync_links(
+        db.portfolio_publication,
+        portfolio_id,
+        "publication_id",
+        {link.publication_id for link in portfolio.publications},
+        pub_ids,
+    )
+    changed |= await sync_links(
+        db.portfolio_technicalskill,
+        portfolio_id,
+        "tech_skill_id",
+        {link.tech_skill_id for link in portfolio.technical_skills},
+        skill_ids,
+    )
 
-async def upload_company_logo(
-    supabase: Any, uid: str, experience_id: int, file: UploadFile
-) -> str:
-    ext = file.filename.split(".")[-1] if file.filename and "." in file.filename else ""
-    filename = f"{uid}/experience-{experience_id}/{uuid4()}.{ext}"
-    content = await file.read()
-    supabase.storage.from_("portfolio-images").upload(
-        filename, content, {"content-type": file.content_type}
+    current_technologies = {
+        row.id: [tech.technology for tech in row.technologies or []]
+        for row in project_rows.values()
+    }
+    changed_technologies: List[Tuple[int, ProjectIn]] = [
+        (proj_id, proj)
+        for proj_id, proj in zip(proj_ids, content.projects)
+        if [tech.technology for tech in proj.technologies]
+        != current_technologies.get(proj_id, [])
+    ]
+    changed_project_urls = changed_resource_urls(
+        current_urls, "project", zip(proj_ids, content.projects)
     )
-    url: Optional[str] = supabase.storage.from_("portfolio-images").get_public_url(
-        filename
+    changed_publication_urls = changed_resource_urls(
+        current_urls, "publication", zip(pub_ids, content.publications)
+    )
+    await replace_project_technologies(db, changed_technologies)
+    await replace_resource_urls(db, "project", changed_project_urls)
+    await replace_resource_urls(db, "publication", changed_publication_urls)
+    changed |= bool(
+        changed_technologies or changed_project_urls or changed_publication_urls
     )
-    return url if url is not None else ""
 
+    fields: Dict[str, Any] = {
+        field: value
+        for field, value in (("title", content.title), ("bio", content.bio))
+        if value is not None and value != getattr(portfolio, field)
+    }
+    changed |= bool(fields)
+    if changed:
+        portfolio = await db.portfolio.update(
+            where={"id": portfolio_id},
+            data={**fields, "updated_at": datetime.now()},
+        )
+    return PortfolioWrite(portfolio, replaced_images, changed)
 
-async def upload_project_thumbnail(
-    supabase: Any, uid: str, project_id: int, file: UploadFile
-) -> str:
-    ext = file.filename.split(".")[-1] if file.filename and "." in file.filename else ""
-    filename = f"{uid}/project-{project_id}/{uuid4()}.{ext}"
-    content = await file.read()
-    supabase.storage.from_("portfolio-images").upload(
-        filename, content, {"content-type": file.content_type}
-    )
-    url: Optional[str] = supabase.storage.from_("portfolio-images").get_public_url(
-        filename
+
+async def find_by_ids(
+    actions: Any, ids: Sequence[Optional[int]], **kwargs: Any
+) -> Dict[int, Any]:
+    """Rows with the given ids, keyed by id, in one query."""
+    wanted = [row_id for row_id in ids if row_id]
+    if not wanted:
+        return {}
+    rows = await actions.find_many(where={"id": {"in": wanted}}, **kwargs)
+    return {row.id: row for row in rows}
+
+
+async def sync_links(
+    actions: Any,
+    portfolio_id: int,
+    column: str,
+    linked: Set[int],
+    wanted: List[int],
+    extra: Optional[Dict[int, Dict[str, Any]]] = None,
+) -> bool:
+    """
+    Add and remove links so the portfolio links exactly `wanted`.
+
+    `extra` holds further columns of new links. Returns whether any link
+    changed. An id listed twice raises, like a duplicate link always has.
+    """
+    added = [row_id for row_id in wanted if row_id not in linked]
+    removed = linked.difference(wanted)
+    if removed:
+        await actions.delete_many(
+            where={"portfolio_id": portfolio_id, column: {"in": list(removed)}}
+        )
+    await create_rows(
+        actions,
+        [
+            {
+                "portfolio_id": portfolio_id,
+                column: row_id,
+                **(extra or {}).get(row_id, {}),
+            }
+            for row_id in added
+        ],
     )
-    return url if url is not None else ""
+    return bool(added or removed)
+
+
+def changed_resource_urls(
+    current: Dict[Tuple[str, int], List[ResourceURLIn]],
+    source_type: str,
+    sources: Iterable[Tuple[int, Any]],
+) -> List[Tuple[int, List[ResourceURLIn]]]:
+    """The sources whose resource URLs differ from the stored ones."""
+    return [
+        (source_id, source.urls)
+        for source_id, source in sources
+        if [(url.label, url.url) for url in source.urls]
+        != [(url.label, url.url) for url in current.get((source_type, source_id), [])]
+    ]
 
 
-async def delete_existing_image(supabase: Any, image_url: Optional[str]) -> None:
-    # Extract path from public URL
-    if not image_url or not isinstance(image_url, str):
-        return
-    if "/storage/v1/object/public/portfolio-images/" not in image_url:
+async def upload_portfolio_image(db: Prisma, storage: Storage, file: UploadFile) -> str:
+    """
+    Store the WebP variants of an uploaded image as one blob.
+
+    The blob is addressed by the hash of the uploaded file, so an image that
+    is already stored is neither optimized nor uploaded again. Returns the
+    storage path of the widest variant; the others are found from it with
+    image_variant. If any variant fails to upload, the reference is dropped.
+    """
+    data = await file.read()
+    base = blob_path(content_digest(data), "")
+    path = variant_path(base, max(IMAGE_WIDTHS))
+    if await acquire_blob(db, PORTFOLIO_IMAGE_BUCKET, path):
+        return path
+    try:
+        variants = await image_optimizer.optimize(data)
+        results = await asyncio.gather(
+            *(
+                storage.upload(
+                    PORTFOLIO_IMAGE_BUCKET,
+                    variant_path(base, width),
+                    variant,
+                    "image/webp",
+                    upsert=True,
+                )
+                for width, variant in variants.items()
+            ),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        await mark_blob_stored(db, PORTFOLIO_IMAGE_BUCKET, path)
+    except Exception:
+        await release_images(db, storage, [path])
+        raise
+    return path
+
+
+def is_storage_path(image: str) -> bool:
+    # Images uploaded before variants were stored kept their public URL
+    return not image.startswith(("http://", "https://"))
+
+
+def image_paths(image: str) -> List[str]:
+    """Storage paths of a stored logo or thumbnail, every variant included."""
+    marker = f"/storage/v1/object/public/{PORTFOLIO_IMAGE_BUCKET}/"
+    if marker in image:
+        image = image.split(marker)[-1]
+    elif not is_storage_path(image):
+        return []
+    return image_variants(image) if image else []
+
+
+async def acquire_images(db: Prisma, images: List[str]) -> None:
+    """Take a reference to each stored image a new row refers to."""
+    for image in images:
+        if is_blob_path(image):
+            await acquire_blob(db, PORTFOLIO_IMAGE_BUCKET, image)
+
+
+async def release_images(db: Prisma, storage: Storage, images: List[str]) -> None:
+    """Release stored logos and thumbnails, removing those no longer used."""
+    images = [image for image in images if image]
+    if not images:
         return
-    path = image_url.split("/storage/v1/object/public/portfolio-images/")[-1]
-    if path:
-        supabase.storage.from_("portfolio-images").remove([path])
+    try:
+        await release_blobs(
+            db, storage, PORTFOLIO_IMAGE_BUCKET, images, objects=image_paths
+        )
+    except Exception as e:
+        logger.warning(f"Failed to release portfolio images: {e}")
 
 
 async def update_portfolio(
@@ -383,214 +665,73 @@ async def update_portfolio(
     project_thumbnails: list[UploadFile],
     company_logos: list[UploadFile],
 ) -> PortfolioOut:
-    async with get_db() as db, get_supabase() as supabase:
+    # Lists the form may leave out default to empty, as they always have
+    content = PortfolioSaveContent.model_validate(
+        {
+            "title": title,
+            "bio": bio,
+            "experiences": [
+                {**exp, "company_logo": exp.get("company_logo") or ""}
+                for exp in json.loads(experiences_json)
+            ],
+            "projects": [
+                {"technologies": [], "urls": [], **proj}
+                for proj in json.loads(projects_json)
+            ],
+            "publications": [
+                {"urls": [], **pub} for pub in json.loads(publications_json)
+            ],
+            "technical_skills": json.loads(technical_skills_json),
+        }
+    )
+
+    async with get_db() as db, get_storage() as storage:
         portfolio = await db.portfolio.find_unique(where={"id": portfolio_id})
         if not portfolio or portfolio.user_id != uid:
             raise PortfolioNotFoundException()
 
-        # Fix: Delete project technologies before deleting portfolio_project links
-        proj_links = await db.portfolio_project.find_many(
-            where={"portfolio_id": portfolio_id}
-        )
-        for link in proj_links:
-            await db.projecttechnology.delete_many(
-                where={"project_id": link.project_id}
-            )
-
-        await db.portfolio_experience.delete_many(where={"portfolio_id": portfolio_id})
-        await db.portfolio_project.delete_many(where={"portfolio_id": portfolio_id})
-        await db.portfolio_publication.delete_many(where={"portfolio_id": portfolio_id})
-        await db.portfolio_technicalskill.delete_many(
-            where={"portfolio_id": portfolio_id}
-        )
-
-        # Parse JSON fields
-        experiences = json.loads(experiences_json)
-        projects = json.loads(projects_json)
-        publications = json.loads(publications_json)
-        technical_skills = json.loads(technical_skills_json)
-
-        # Update main portfolio fields
-        updated_portfolio = await db.portfolio.update(
-            where={"id": portfolio_id},
-            data={
-                "title": title,
-                "bio": bio,
-                "updated_at": datetime.now(),
-            },
-        )
-
-        # Experiences (handle company_logo)
-        for idx, exp in enumerate(experiences):
-            exp_id = exp.get("id")
-            logo_url = None
-            # Delete previous logo if present
-            if exp_id:
-                old_exp = await db.experience.find_unique(where={"id": exp_id})
-                if (
-                    old_exp
-                    and old_exp.company_logo
-                    and idx < len(company_logos)
-                    and company_logos[idx]
-                ):
-                    await delete_existing_image(supabase, old_exp.company_logo)
-            if idx < len(company_logos) and company_logos[idx]:
-                # Ensure exp_id is int for upload_company_logo
-                logo_url = await upload_company_logo(
-                    supabase,
-                    uid,
-                    (
-                        int(exp_id)
-                        if exp_id is not None and isinstance(exp_id, int)
-                        else 0
-                    ),
-                    company_logos[idx],
-                )
-                exp["company_logo"] = logo_url
-            if not exp_id:
-                new_exp_data = exp.copy()
-                new_exp_data.pop("id", None)
-                # Remove company_logo if not present or empty string
-                if (
-                    "company_logo" not in new_exp_data
-                    or not new_exp_data["company_logo"]
-                ):
-                    new_exp_data.pop("company_logo", None)
-                # Always convert start_date and end_date to datetime
-                new_exp_data["start_date"] = to_datetime(new_exp_data["start_date"])
-                new_exp_data["end_date"] = to_datetime(new_exp_data["end_date"])
-                new_exp = await db.experience.create(data=new_exp_data)
-                exp_id = new_exp.id
-            else:
-                # Only update company_logo if a new file was uploaded
-                if idx < len(company_logos) and company_logos[idx]:
-                    await db.experience.update(
-                        where={"id": exp_id},
-                        data={"company_logo": exp.get("company_logo")},
-                    )
-            await db.portfolio_experience.create(
-                data={"portfolio_id": portfolio_id, "exp_id": exp_id}
-            )
-
-        # Projects (handle thumbnail_url)
-        for idx, proj in enumerate(projects):
-            proj_id = proj.get("id")
-            thumb_url = None
-            # If a new thumbnail is uploaded, delete previous and upload new
-            if proj_id:
-                old_proj = await db.project.find_unique(where={"id": proj_id})
-                if (
-                    old_proj
-                    and old_proj.thumbnail_url
-                    and idx < len(project_thumbnails)
-                    and project_thumbnails[idx]
-                ):
-                    await delete_existing_image(supabase, old_proj.thumbnail_url)
-            if idx < len(project_thumbnails) and project_thumbnails[idx]:
-                # Ensure proj_id is int for upload_project_thumbnail
-                thumb_url = await upload_project_thumbnail(
-                    supabase,
-                    uid,
-                    (
-                        int(proj_id)
-                        if proj_id is not None and isinstance(proj_id, int)
-                        else 0
-                    ),
-                    project_thumbnails[idx],
+        # Storage is not transactional, so images are uploaded before the
+        # rows are written, concurrently and at most IMAGE_UPLOAD_CONCURRENCY
+        # at a time
+        logos: Dict[int, str] = {}
+        thumbnails: Dict[int, str] = {}
+        semaphore = asyncio.Semaphore(IMAGE_UPLOAD_CONCURRENCY)
+
+        async def upload(
+            uploaded: Dict[int, str], idx: int, store: Coroutine[Any, Any, str]
+        ) -> None:
+            async with semaphore:
+                uploaded[idx] = await store
+
+        results = await asyncio.gather(
+            *(
+                upload(
+                    logos,
+                    idx,
+                    upload_portfolio_image(db, storage, company_logos[idx]),
                 )
-                proj["thumbnail_url"] = thumb_url
-            else:
-                # If no new file, keep the existing thumbnail_url if present
-                if proj_id and old_proj and old_proj.thumbnail_url:
-                    proj["thumbnail_url"] = old_proj.thumbnail_url
-            if not proj_id:
-                new_proj_data = {
-                    "name": proj["name"],
-                    "description": proj["description"],
-                }
-                # Make thumbnail_url optional
-                if "thumbnail_url" in proj and proj["thumbnail_url"]:
-                    new_proj_data["thumbnail_url"] = proj["thumbnail_url"]
-                new_proj = await db.project.create(data=new_proj_data)
-                proj_id = new_proj.id
-            else:
-                # Only update thumbnail_url if a new file was uploaded
-                if idx < len(project_thumbnails) and project_thumbnails[idx]:
-                    await db.project.update(
-                        where={"id": proj_id},
-                        data={"thumbnail_url": proj.get("thumbnail_url")},
-                    )
-            await db.portfolio_project.create(
-                data={
-                    "portfolio_id": portfolio_id,
-                    "project_id": proj_id,
-                    "thumbnail_url": proj.get("thumbnail_url"),
-                }
-            )
-            # Technologies
-            await db.projecttechnology.delete_many(where={"project_id": proj_id})
-            for tech in proj.get("technologies", []):
-                await db.projecttechnology.create(
-                    data={"project_id": proj_id, "technology": tech["technology"]}
+                for idx in range(len(content.experiences))
+                if idx < len(company_logos) and company_logos[idx]
+            ),
+            *(
+                upload(
+                    thumbnails,
+                    idx,
+                    upload_portfolio_image(db, storage, project_thumbnails[idx]),
                 )
-            # URLs
-            await db.resourceurl.delete_many(
-                where={"source_id": proj_id, "source_type": "project"}
-            )
-            for url in proj.get("urls", []):
-                await db.resourceurl.create(
-                    data={
-                        "source_id": proj_id,
-                        "source_type": url["source_type"],
-                        "label": url["label"],
-                        "url": url["url"],
-                    }
-                )
-
-        # Publications
-        for pub in publications:
-            pub_id = pub.get("id")
-            if not pub_id:
-                new_pub_data = {k: v for k, v in pub.items() if k not in {"id", "urls"}}
-                new_pub = await db.publication.create(data=new_pub_data)
-                pub_id = new_pub.id
-            await db.portfolio_publication.create(
-                data={"portfolio_id": portfolio_id, "publication_id": pub_id}
-            )
-            # URLs
-            await db.resourceurl.delete_many(
-                where={"source_id": pub_id, "source_type": "publication"}
-            )
-            for url in pub.get("urls", []):
-                await db.resourceurl.create(
-                    data={
-                        "source_id": pub_id,
-                        "source_type": url["source_type"],
-                        "label": url["label"],
-                        "url": url["url"],
-                    }
+                for idx in range(len(content.projects))
+                if idx < len(project_thumbnails) and project_thumbnails[idx]
+            ),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                await release_images(
+                    db, storage, [*logos.values(), *thumbnails.values()]
                 )
+                raise result
 
-        # Technical Skills
-        for skill in technical_skills:
-            skill_id = skill.get("id")
-            if not skill_id:
-                new_skill_data = {k: v for k, v in skill.items() if k != "id"}
-                new_skill = await db.technicalskill.create(data=new_skill_data)
-                skill_id = new_skill.id
-            await db.portfolio_technicalskill.create(
-                data={"portfolio_id": portfolio_id, "tech_skill_id": skill_id}
-            )
-
-        return PortfolioOut(
-            id=updated_portfolio.id,
-            title=updated_portfolio.title,
-            theme=updated_portfolio.theme,
-            created_at=updated_portfolio.created_at,
-            updated_at=updated_portfolio.updated_at,
-            is_public=updated_portfolio.is_public,
-            bio=updated_portfolio.bio or "",
-        )
+    return await save_portfolio(uid, portfolio_id, content, logos, thumbnails)
 
 
 async def publish_portfolio_service(uid: str, portfolio_id: int) -> str:
@@ -607,79 +748,96 @@ async def publish_portfolio_service(uid: str, portfolio_id: int) -> str:
                 "published_at": datetime.now(),
             },
         )
+        # Republishing moves the page to a new URL
+        if portfolio.published_url:
+            await invalidate_public_portfolio(portfolio.published_url)
+        await refresh_public_portfolio(published_url)
         return published_url
 
 
-async def view_public_portfolio_service(published_url: str) -> PublicPortfolioOut:
+async def build_public_portfolio(
+    published_url: str,
+) -> Tuple[str, PublicPortfolioOut, Optional[PublicGeneration]]:
+    """
+    The owner's UID, the full public page of a published portfolio and the
+    cache generation it was built at.
+
+    Portfolio details, profile, education and certificates are loaded
+    concurrently. Id fields are left out by PublicPortfolioOut. Each
+    generation is read before the data it covers, so a change made while the
+    page is built always moves it on.
+    """
+    page_generation = await get_page_generation(published_url)
     async with get_db() as db:
         portfolio = await db.portfolio.find_unique(
             where={"published_url": published_url}
         )
-        if not portfolio or not portfolio.is_public:
-            from src.portfolio.exceptions import PortfolioNotFoundException
+    if not portfolio or not portfolio.is_public:
+        raise PortfolioNotFoundException()
+    owner_uid = str(portfolio.user_id)
+    owner_generation = await get_owner_generation(owner_uid)
+
+    details, user_profile, education, certificates = await asyncio.gather(
+        get_portfolio_details(
+            owner_uid,
+            portfolio.id,
+            logo_width=LOGO_WIDTH,
+            thumbnail_width=THUMBNAIL_WIDTH,
+        ),
+        get_user_profile_by_uid(owner_uid),
+        get_user_education(owner_uid),
+        get_user_certificates(owner_uid),
+    )
+    generation = (
+        PublicGeneration(page=page_generation, owner=owner_generation)
+        if page_generation is not None and owner_generation is not None
+        else None
+    )
+    return (
+        owner_uid,
+        PublicPortfolioOut(
+            **details.model_dump(),
+            user_profile=user_profile,
+            education=[PublicEducationOut(**e.model_dump()) for e in education],
+            certificates=[PublicCertificateOut(**c.model_dump()) for c in certificates],
+        ),
+        generation,
+    )
 
-            raise PortfolioNotFoundException()
-        # Get full details
-        details = await get_portfolio_details(portfolio.user_id, portfolio.id)
-        # Remove id fields from response
-        details_dict = details.model_dump()
-        details_dict.pop("id", None)
-        # Remove id from experiences, projects, publications, technical_skills, feedbacks
-        for exp in details_dict.get("experiences", []):
-            exp.pop("id", None)
-        for proj in details_dict.get("projects", []):
-            proj.pop("id", None)
-            for tech in proj.get("technologies", []):
-                tech.pop("id", None)
-            for url in proj.get("urls", []):
-                url.pop("id", None)
-        for pub in details_dict.get("publications", []):
-            pub.pop("id", None)
-            for url in pub.get("urls", []):
-                url.pop("id", None)
-        for skill in details_dict.get("technical_skills", []):
-            skill.pop("id", None)
-        for fb in details_dict.get("feedbacks", []):
-            fb.pop("id", None)
-        # Return as PublicPortfolioOut (Pydantic will ignore extra fields)
-        return PublicPortfolioOut(**details_dict)
-
-
-async def get_full_public_portfolio(published_url: str) -> PublicPortfolioOut:
+
+async def get_public_portfolio_snapshot(published_url: str) -> PublicSnapshot:
     """
-    Returns a PublicPortfolioOut with all public info, including user, education, certificates.
-    Handles all input/output processing for the /public/{published_url} endpoint.
-    Removes id fields from education and certificates.
+    The serialized public page of a published portfolio.
+
+    Pages are built at publish and update time and on a cache miss, and
+    dropped when the portfolio is unpublished or its owner's profile,
+    education or certificates change. A page is not cached if it was dropped
+    while being built.
     """
-    details: PublicPortfolioOut = await view_public_portfolio_service(published_url)
-    owner_uid: str = await get_portfolio_owner_uid_by_published_url(published_url)
-    user_profile = await get_user_profile_by_uid(owner_uid)
-    education = await get_user_education(owner_uid)
-    certificates = await get_user_certificates(owner_uid)
-
-    # Remove id fields from education and certificates
-    education_no_id = [
-        (
-            {k: v for k, v in e.model_dump().items() if k != "id"}
-            if hasattr(e, "model_dump")
-            else {k: v for k, v in e.__dict__.items() if k != "id"}
-        )
-        for e in education
-    ]
-    certificates_no_id = [
-        (
-            {k: v for k, v in c.model_dump().items() if k != "id"}
-            if hasattr(c, "model_dump")
-            else {k: v for k, v in c.__dict__.items() if k != "id"}
-        )
-        for c in certificates
-    ]
+    cached = await get_cached_public_portfolio(published_url)
+    if cached is not None:
+        return cached
+    owner_uid, portfolio, generation = await build_public_portfolio(published_url)
+    return await cache_public_portfolio(
+        owner_uid, published_url, portfolio.model_dump_json(), generation
+    )
 
-    details_dict = details.model_dump()
-    details_dict["user_profile"] = user_profile
-    details_dict["education"] = education_no_id
-    details_dict["certificates"] = certificates_no_id
-    return PublicPortfolioOut(**details_dict)
+
+async def refresh_public_portfolio(published_url: Optional[str]) -> None:
+    """Rebuild the cached public page after its portfolio changed."""
+    if not published_url:
+        return
+    # Dropping the page first also stops builds that read the old portfolio
+    # from caching it
+    await invalidate_public_portfolio(published_url)
+    try:
+        owner_uid, portfolio, generation = await build_public_portfolio(published_url)
+    except Exception as e:
+        logger.warning(f"Failed to rebuild public portfolio page: {e}")
+        return
+    await cache_public_portfolio(
+        owner_uid, published_url, portfolio.model_dump_json(), generation
+    )
 
 
 async def unpublish_portfolio_service(uid: str, portfolio_id: int) -> dict[str, str]:
@@ -695,18 +853,6 @@ async def unpublish_portfolio_service(uid: str, portfolio_id: int) -> dict[str,
                 "published_at": datetime.now(),  # Use current time or a valid datetime
             },
         )
+        if portfolio.published_url:
+            await invalidate_public_portfolio(portfolio.published_url)
         return {"message": "Portfolio unpublished and public URL removed."}
-
-
-async def get_portfolio_owner_uid_by_published_url(published_url: str) -> str:
-    """
-    Returns the user_id (owner UID) for a given published_url.
-    Raises PortfolioNotFoundException if not found or not public.
-    """
-    async with get_db() as db:
-        portfolio = await db.portfolio.find_unique(
-            where={"published_url": published_url}
-        )
-        if not portfolio or not portfolio.is_public:
-            raise PortfolioNotFoundException()
-    return str(portfolio.user_id)  # Ensure return type is str
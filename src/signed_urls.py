@@ -0,0 +1,181 @@
+import time
+from collections import OrderedDict
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from redis.asyncio import Redis
+
+from src.config import settings
+from src.database import Storage, redis_client
+
+logger = getLogger(__name__)
+
+REDIS_SIGNED_URL_PREFIX = "storage:signed:"
+# Requested expiries are rounded up to one of these so callers asking for
+# similar lifetimes share entries.
+EXPIRY_CLASSES = (3600, 36000, 7 * 24 * 3600)
+
+
+class SignedUrlCache:
+    """
+    Bounded LRU cache of Supabase signed URLs.
+
+    Entries are keyed by (bucket, path, expiry class) and kept for half the
+    URL's lifetime, so a cached URL always has a good part of it left.
+    Misses are signed with a single `create_signed_urls` call per bucket, and
+    an optional Redis tier shares signed URLs between workers.
+    """
+
+    def __init__(self, max_size: int, redis: Optional[Redis] = None) -> None:
+        self.max_size = max_size
+        self.redis = redis
+        self._entries: OrderedDict[Tuple[str, str, int], Tuple[float, str]] = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.storage_calls = 0
+
+    @staticmethod
+    def expiry_class(expires: int) -> int:
+        return next((c for c in EXPIRY_CLASSES if c >= expires), EXPIRY_CLASSES[-1])
+
+    @staticmethod
+    def _ttl(expires: int) -> int:
+        return expires // 2
+
+    @staticmethod
+    def _redis_key(bucket: str, path: str, expires: int) -> str:
+        return f"{REDIS_SIGNED_URL_PREFIX}{bucket}:{expires}:{path}"
+
+    def _get_local(self, key: Tuple[str, str, int]) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, url = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return url
+
+    def _set_local(
+        self, key: Tuple[str, str, int], expires_at: float, url: str
+    ) -> None:
+        self._entries[key] = (expires_at, url)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def _get_shared(
+        self, bucket: str, paths: List[str], expires: int
+    ) -> Dict[str, str]:
+        if self.redis is None or not paths:
+            return {}
+        try:
+            values = await self.redis.mget(
+                [self._redis_key(bucket, path, expires) for path in paths]
+            )
+        except Exception as e:
+            logger.warning(f"Signed URL cache Redis lookup failed: {e}")
+            return {}
+        return {path: str(url) for path, url in zip(paths, values) if url}
+
+    async def _set_shared(
+        self, bucket: str, urls: Dict[str, str], expires: int
+    ) -> None:
+        if self.redis is None or not urls:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for path, url in urls.items():
+                    pipe.set(
+                        self._redis_key(bucket, path, expires),
+                        url,
+                        ex=self._ttl(expires),
+                    )
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Signed URL cache Redis write failed: {e}")
+
+    async def _create_signed_urls(
+        self, storage: Storage, bucket: str, paths: List[str], expires: int
+    ) -> Dict[str, str]:
+        self.storage_calls += 1
+        results = await storage.create_signed_urls(bucket, paths, expires)
+        signed: Dict[str, str] = {}
+        for result in results:
+            url = result.get("signedURL")
+            if url and not result.get("error"):
+                signed[result["path"]] = url
+        return signed
+
+    async def sign_many(
+        self, storage: Storage, bucket: str, paths: Sequence[str], expires: int
+    ) -> Dict[str, str]:
+        """
+        Signed URLs for `paths`, keyed by path.
+
+        Paths the storage could not sign (e.g. missing objects) are left out
+        and never cached.
+        """
+        expires = self.expiry_class(expires)
+        now = time.time()
+        signed: Dict[str, str] = {}
+        missing: List[str] = []
+        for path in dict.fromkeys(paths):
+            url = self._get_local((bucket, path, expires))
+            if url is None:
+                missing.append(path)
+            else:
+                self.hits += 1
+                signed[path] = url
+
+        shared = await self._get_shared(bucket, missing, expires)
+        for path, url in shared.items():
+            self.redis_hits += 1
+            # The URL has at least half its lifetime left; keep it locally for
+            # half of that again.
+            self._set_local((bucket, path, expires), now + self._ttl(expires) / 2, url)
+            signed[path] = url
+        missing = [path for path in missing if path not in shared]
+
+        if missing:
+            self.misses += len(missing)
+            created = await self._create_signed_urls(storage, bucket, missing, expires)
+            for path, url in created.items():
+                self._set_local((bucket, path, expires), now + self._ttl(expires), url)
+            await self._set_shared(bucket, created, expires)
+            signed.update(created)
+        return signed
+
+    async def invalidate(self, bucket: str, paths: Sequence[str]) -> None:
+        """Forget cached URLs of removed objects."""
+        keys = [(bucket, path, expires) for path in paths for expires in EXPIRY_CLASSES]
+        for key in keys:
+            self._entries.pop(key, None)
+        if self.redis is None or not keys:
+            return
+        try:
+            await self.redis.delete(*(self._redis_key(*key) for key in keys))
+        except Exception as e:
+            logger.warning(f"Signed URL cache invalidation failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "storage_calls": self.storage_calls,
+            "hit_rate": (self.hits + self.redis_hits) / lookups if lookups else 0.0,
+        }
+
+
+signed_url_cache = SignedUrlCache(
+    max_size=settings.SIGNED_URL_CACHE_MAX_SIZE,
+    redis=redis_client if settings.SIGNED_URL_CACHE_REDIS_ENABLED else None,
+)
@@ -4,3 +4,4 @@ USER_NOT_FOUND = "User not found"
 USERNAME_UNAVAILABLE = "Username is unavailable"
 INVALID_PHONE_NUMBER_FORMAT = "Invalid phone number format"
 INVALID_PHONE_NUMBER = "Invalid phone number"
+INVALID_CURSOR = "Invalid pagination cursor"
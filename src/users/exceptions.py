@@ -1,4 +1,5 @@
 from src.users.constants import (
+    INVALID_CURSOR,
     INVALID_PHONE_NUMBER,
     INVALID_PHONE_NUMBER_FORMAT,
     USERNAME_UNAVAILABLE,
@@ -30,3 +31,12 @@ class InvalidPhoneNumberException(Exception):
         self.message = INVALID_PHONE_NUMBER
         super().__init__(self.message)
         self.status_code = 400
+
+
+class InvalidCursorException(Exception):
+    """Exception raised for a malformed pagination cursor."""
+
+    def __init__(self) -> None:
+        self.message = INVALID_CURSOR
+        super().__init__(self.message)
+        self.status_code = 400
@@ -1,15 +1,18 @@
 from logging import getLogger
+from typing import Optional
 
-from fastapi import APIRouter, Body, HTTPException, Request, status
+from fastapi import APIRouter, Body, HTTPException, Query, Request, status
 
 from src.auth.exceptions import UserNotFoundException
 from src.users.exceptions import (
+    InvalidCursorException,
     InvalidPhoneNumberException,
     InvalidPhoneNumberFormatException,
     UsernameUnavailableException,
 )
-from src.users.schemas import OtherUsersProfile, UserProfile, UserProfileUpdate
+from src.users.schemas import OtherUsersPage, UserProfile, UserProfileUpdate
 from src.users.service import (
+    OTHER_USERS_PAGE_SIZE,
     get_user_profile_by_uid,
     other_user_profiles,
     update_user_profile,
@@ -84,13 +87,25 @@ async def update_profile(
         raise HTTPException(status_code=e.status_code, detail=str(e))
 
 
-@router.get("/others", summary="Other users profile", status_code=status.HTTP_200_OK)
+@router.get(
+    "/others",
+    summary="Other users profile",
+    description="Returns a page of other users' job titles and companies, taken from their CVs. Pass `next_cursor` of a page as `cursor` to get the next one.",
+    response_model=OtherUsersPage,
+    status_code=status.HTTP_200_OK,
+)
 async def get_other_users(
     request: Request,
-) -> list[OtherUsersProfile]:
+    cursor: Optional[str] = None,
+    limit: int = Query(OTHER_USERS_PAGE_SIZE, ge=1, le=100),
+    company: Optional[str] = None,
+    job_title: Optional[str] = None,
+) -> OtherUsersPage:
     try:
         uid = request.state.user.get("uid", "")
-        return await other_user_profiles(uid)
+        return await other_user_profiles(uid, cursor, limit, company, job_title)
+    except InvalidCursorException as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except UserNotFoundException as e:
         raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
@@ -32,3 +32,10 @@ class OtherUsersProfile(BaseModel):
     company_name: str
     start_date: str
     end_date: str
+
+
+class OtherUsersPage(BaseModel):
+    """A page of the other users directory."""
+
+    items: list[OtherUsersProfile]
+    next_cursor: Optional[str] = None
@@ -1,20 +1,50 @@
+import base64
+import hashlib
+import json
 from logging import getLogger
+from typing import Any, Optional
 
 import phonenumbers
 from phonenumbers.phonenumberutil import NumberParseException
 
 from src.auth.exceptions import UserNotFoundException
-from src.cv.schemas import ExperienceIn
-from src.database import get_db
+from src.cv.preview_cache import invalidate_static_data
+from src.database import get_db, redis_client
+from src.portfolio.public_cache import invalidate_public_portfolios
 from src.users.exceptions import (
+    InvalidCursorException,
     InvalidPhoneNumberException,
     InvalidPhoneNumberFormatException,
     UsernameUnavailableException,
 )
-from src.users.schemas import OtherUsersProfile, UserProfile, UserProfileUpdate
+from src.users.schemas import (
+    OtherUsersPage,
+    OtherUsersProfile,
+    UserProfile,
+    UserProfileUpdate,
+)
 
 logger = getLogger(__name__)
 
+OTHER_USERS_PAGE_SIZE = 20
+REDIS_OTHER_USERS_PREFIX = "users:others:"
+# Only the first page is cached, briefly, so new experiences show up quickly.
+OTHER_USERS_CACHE_TTL_SECONDS = 60
+
+# Ordered by the columns DISTINCT runs over, so the last row of a page is a
+# keyset cursor for the next one.
+OTHER_USERS_QUERY = """
+SELECT DISTINCT u.username, e.job_title, e.company AS company_name,
+       e.start_date, e.end_date
+FROM "User" u
+JOIN "CV" c ON c.user_id = u.uid
+JOIN "CV_Experience" ce ON ce.cv_id = c.id
+JOIN "Experience" e ON e.id = ce.experience_id
+WHERE {where}
+ORDER BY u.username, e.job_title, e.company, e.start_date, e.end_date
+LIMIT {limit}
+"""
+
 
 async def get_user_profile_by_uid(uid: str) -> UserProfile:
     """
@@ -98,6 +128,8 @@ async def update_user_profile(uid: str, update: UserProfileUpdate) -> UserProfil
             )
 
         updated_user = await db.user.update(where={"uid": uid}, data=update_data)
+        await invalidate_static_data(uid)
+        await invalidate_public_portfolios(uid)
 
         return UserProfile(
             username=updated_user.username,
@@ -110,30 +142,127 @@ async def update_user_profile(uid: str, update: UserProfileUpdate) -> UserProfil
         )
 
 
-async def other_user_profiles(uid: str) -> list[OtherUsersProfile]:
+async def other_user_profiles(
+    uid: str,
+    cursor: Optional[str] = None,
+    limit: int = OTHER_USERS_PAGE_SIZE,
+    company: Optional[str] = None,
+    job_title: Optional[str] = None,
+) -> OtherUsersPage:
+    """
+    Get a page of the (username, job title, company, dates) directory built
+    from the experiences on other users' CVs.
+
+    Args:
+        uid: UID of the requesting user, who is left out of the directory
+        cursor: Opaque cursor from the previous page's `next_cursor`
+        limit: Maximum number of entries on the page
+        company: Only include entries whose company contains this text
+        job_title: Only include entries whose job title contains this text
+
+    Returns:
+        OtherUsersPage: The entries and the cursor of the next page, if any
+
+    Raises:
+        InvalidCursorException: If the cursor cannot be decoded
+    """
+    after = decode_cursor(cursor) if cursor else None
+    cache_key = _first_page_cache_key(uid, limit, company, job_title)
+    if after is None:
+        cached = await _get_cached_page(cache_key)
+        if cached is not None:
+            return cached
+
+    conditions = ["u.uid <> $1"]
+    params: list[Any] = [uid]
+    if company:
+        params.append(f"%{company}%")
+        conditions.append(f"e.company ILIKE ${len(params)}")
+    if job_title:
+        params.append(f"%{job_title}%")
+        conditions.append(f"e.job_title ILIKE ${len(params)}")
+    if after is not None:
+        start = len(params) + 1
+        params.extend(after)
+        conditions.append(
+            "(u.username, e.job_title, e.company, e.start_date, e.end_date) > "
+            f"(${start}, ${start + 1}, ${start + 2}, "
+            f"${start + 3}::date, ${start + 4}::date)"
+        )
+    # One extra row tells whether there is a next page
+    params.append(limit + 1)
+
+    query = OTHER_USERS_QUERY.format(
+        where=" AND ".join(conditions), limit=f"${len(params)}"
+    )
     async with get_db() as db:
-        users = await db.user.find_many()
-        other_profiles = []
-        for user in users:
-            if uid == user.uid:
-                continue
-            _uid = user.uid
-            cvs = await db.cv.find_many(where={"user_id": _uid})
-            for cv in cvs:
-                exp_links = await db.cv_experience.find_many(
-                    where={"cv_id": cv.id}, include={"experience": True}
-                )
-                experiences = [
-                    ExperienceIn(**link.experience.__dict__) for link in exp_links
-                ]
-                for experience in experiences:
-                    user_profile = OtherUsersProfile(
-                        username=user.username,
-                        job_title=experience.job_title,
-                        company_name=experience.company,
-                        start_date=str(experience.start_date),
-                        end_date=str(experience.end_date),
-                    )
-                    if user_profile not in other_profiles:
-                        other_profiles.append(user_profile)
-        return other_profiles
+        rows = await db.query_raw(query, *params)
+
+    items = [
+        OtherUsersProfile(
+            username=row["username"],
+            job_title=row["job_title"],
+            company_name=row["company_name"],
+            start_date=str(row["start_date"])[:10],
+            end_date=str(row["end_date"])[:10],
+        )
+        for row in rows[:limit]
+    ]
+    page = OtherUsersPage(
+        items=items,
+        next_cursor=encode_cursor(items[-1]) if len(rows) > limit else None,
+    )
+    if after is None:
+        await _cache_page(cache_key, page)
+    return page
+
+
+def encode_cursor(profile: OtherUsersProfile) -> str:
+    key = [
+        profile.username,
+        profile.job_title,
+        profile.company_name,
+        profile.start_date,
+        profile.end_date,
+    ]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list[str]:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise InvalidCursorException()
+    if (
+        not isinstance(key, list)
+        or len(key) != 5
+        or not all(isinstance(value, str) for value in key)
+    ):
+        raise InvalidCursorException()
+    return key
+
+
+def _first_page_cache_key(
+    uid: str, limit: int, company: Optional[str], job_title: Optional[str]
+) -> str:
+    filters = json.dumps([limit, company or "", job_title or ""])
+    digest = hashlib.sha1(filters.encode()).hexdigest()
+    return f"{REDIS_OTHER_USERS_PREFIX}{uid}:{digest}"
+
+
+async def _get_cached_page(key: str) -> Optional[OtherUsersPage]:
+    try:
+        raw = await redis_client.get(key)
+    except Exception as e:
+        logger.warning(f"Other users cache lookup failed: {e}")
+        return None
+    return OtherUsersPage.model_validate_json(raw) if raw else None
+
+
+async def _cache_page(key: str, page: OtherUsersPage) -> None:
+    try:
+        await redis_client.set(
+            key, page.model_dump_json(), ex=OTHER_USERS_CACHE_TTL_SECONDS
+        )
+    except Exception as e:
+        logger.warning(f"Other users cache write failed: {e}")
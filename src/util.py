@@ -1,3 +1,4 @@
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, datetime
 from typing import Any
 
@@ -19,3 +20,17 @@ def serialize_for_json(obj: Any) -> Any:
 
 def to_datetime(d: date) -> datetime:
     return datetime.combine(d, datetime.min.time())
+
+
+def kill_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Kill a process pool's workers and shut it down without waiting.
+
+    For pools with a stuck or dead worker: shutting down alone leaves a
+    stuck worker running. Tasks still running in the pool fail.
+    """
+    # ProcessPoolExecutor has no public way to kill its workers before 3.14
+    processes = getattr(pool, "_processes", None) or {}
+    for process in list(processes.values()):
+        process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,85 @@
+from io import BytesIO
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from starlette.datastructures import Headers, UploadFile
+from test_util import FakeRedis
+
+from src.ai.analysis_cache import AnalysisCache
+from src.ai.schemas import ResumeText
+from src.ai.service import analyze_resume_file
+
+
+def upload(contents):
+    return UploadFile(
+        file=BytesIO(contents),
+        filename="resume.pdf",
+        headers=Headers({"content-type": "application/pdf"}),
+    )
+
+
+@pytest.mark.asyncio
+async def test_reuploads_skip_extraction_model_and_quota():
+    extracted = ResumeText(
+        text="Experience  Python",
+        page_count=1,
+        pages_extracted=1,
+        extraction_ms=1.0,
+        total_ms=2.0,
+    )
+    extract = AsyncMock(return_value=extracted)
+    analyzer = Mock()
+    analyzer.analyze_resume_with_gemini = AsyncMock(return_value={"resume_score": 80})
+    analyzer.in_flight = Mock(return_value=False)
+
+    with patch(
+        "src.ai.service.analysis_cache", AnalysisCache(FakeRedis(), ttl=60)
+    ), patch("src.ai.service.text_extractor.extract_pdf", extract), patch(
+        "src.ai.service.resume_analyzer", analyzer
+    ), patch(
+        "src.ai.service.check_and_update_upload_limit"
+    ) as limit:
+        first = await analyze_resume_file("uid", upload(b"%PDF-1 resume"))
+        again = await analyze_resume_file("uid", upload(b"%PDF-1 resume"))
+        assert again.body == first.body
+        assert extract.await_count == 1
+
+        # A different file with the same text is served after extraction
+        extract.return_value = extracted.model_copy(
+            update={"text": "Experience Python"}
+        )
+        await analyze_resume_file("uid", upload(b"%PDF-1 re-exported resume"))
+        assert extract.await_count == 2
+
+    assert analyzer.analyze_resume_with_gemini.await_count == 1
+    assert limit.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_reupload_during_a_running_analysis_uses_no_quota():
+    extracted = ResumeText(
+        text="Experience Python",
+        page_count=1,
+        pages_extracted=1,
+        extraction_ms=1.0,
+        total_ms=2.0,
+    )
+    analyzer = Mock()
+    analyzer.analyze_resume_with_gemini = AsyncMock(
+        return_value={"analysis_pending": True}
+    )
+    analyzer.in_flight = Mock(return_value=True)
+
+    with patch(
+        "src.ai.service.analysis_cache", AnalysisCache(FakeRedis(), ttl=60)
+    ), patch(
+        "src.ai.service.text_extractor.extract_pdf", AsyncMock(return_value=extracted)
+    ), patch(
+        "src.ai.service.resume_analyzer", analyzer
+    ), patch(
+        "src.ai.service.check_and_update_upload_limit"
+    ) as limit:
+        await analyze_resume_file("uid", upload(b"%PDF-1 resume"))
+
+    limit.assert_not_awaited()
+    assert analyzer.analyze_resume_with_gemini.await_args.kwargs["key"]
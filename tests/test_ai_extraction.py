@@ -0,0 +1,148 @@
+import asyncio
+import time
+from io import BytesIO
+
+import pytest
+from docx import Document
+
+from src.ai.exceptions import ResumeExtractionFailed
+from src.ai.extraction import (
+    PageTimeout,
+    TextExtractor,
+    deadline,
+    extract_docx_text,
+    extract_pdf_text,
+)
+
+
+def slow_extraction(seconds):
+    time.sleep(seconds)
+    return "text", 1, 1, seconds
+
+
+def make_pdf(pages):
+    """A minimal PDF with one line of Helvetica text per page."""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages))), len(pages)
+        ),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode())
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n".encode()
+    )
+    return out.getvalue()
+
+
+def make_docx(paragraphs):
+    doc = Document()
+    for paragraph in paragraphs:
+        doc.add_paragraph(paragraph)
+    out = BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+def test_pdf_text_is_extracted_up_to_page_limit():
+    pdf = make_pdf(["Experience", "Education", "Skills"])
+
+    text, page_count, pages_extracted, seconds = extract_pdf_text(pdf, 2, 5.0)
+
+    assert text == "Experience\nEducation"
+    assert (page_count, pages_extracted) == (3, 2)
+    assert seconds >= 0
+
+
+def test_docx_text_is_extracted_from_bytes():
+    text, page_count, _, _ = extract_docx_text(make_docx(["Experience", "Skills"]))
+
+    assert text == "Experience\nSkills"
+    assert page_count == 1
+
+
+def test_deadline_interrupts_slow_pages():
+    with pytest.raises(PageTimeout):
+        with deadline(0.05):
+            while True:
+                pass
+
+
+@pytest.mark.asyncio
+async def test_extraction_runs_in_worker_process():
+    extractor = TextExtractor(workers=1, max_pages=10, page_timeout=5, timeout=60)
+    try:
+        result = await extractor.extract_pdf(make_pdf(["Experience"]))
+        assert result.text == "Experience"
+        assert result.page_count == 1
+        assert result.total_ms >= result.extraction_ms
+
+        with pytest.raises(ResumeExtractionFailed):
+            await extractor.extract_pdf(b"not a pdf")
+    finally:
+        extractor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_stuck_worker_is_killed_and_the_pool_replaced():
+    extractor = TextExtractor(workers=1, max_pages=10, page_timeout=5, timeout=3)
+    try:
+        with pytest.raises(ResumeExtractionFailed):
+            await extractor._run(time.sleep, 60)
+        assert extractor._pool is None
+
+        extractor.timeout = 60
+        result = await extractor.extract_pdf(make_pdf(["Experience"]))
+        assert result.text == "Experience"
+    finally:
+        extractor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_time_waiting_for_a_worker_does_not_count():
+    extractor = TextExtractor(workers=1, max_pages=10, page_timeout=5, timeout=3)
+    try:
+        # Two run back to back for longer than the timeout
+        first, second = await asyncio.gather(
+            extractor._run(slow_extraction, 2), extractor._run(slow_extraction, 2)
+        )
+        assert first.text == second.text == "text"
+    finally:
+        extractor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_extraction_in_a_pool_killed_over_another_timeout_is_retried():
+    extractor = TextExtractor(workers=2, max_pages=10, page_timeout=5, timeout=3)
+
+    async def started_later():
+        await asyncio.sleep(1.5)
+        return await extractor._run(slow_extraction, 2)
+
+    try:
+        stuck, valid = await asyncio.gather(
+            extractor._run(time.sleep, 60), started_later(), return_exceptions=True
+        )
+        assert isinstance(stuck, ResumeExtractionFailed)
+        assert valid.text == "text"
+    finally:
+        extractor.shutdown()
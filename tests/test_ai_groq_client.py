@@ -0,0 +1,109 @@
+import asyncio
+import gc
+from types import SimpleNamespace
+
+import pytest
+
+from src.ai.exceptions import AIServiceBusy
+from src.ai.groq_client import GroqChat
+from src.ai.router import sse_events
+
+
+class FakeCompletions:
+    def __init__(self, delay):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+
+    async def create(self, **kwargs):
+        if kwargs["stream"]:
+            return FakeStream(["Led ", "a team"])
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        message = SimpleNamespace(content=kwargs["messages"][-1]["content"].upper())
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeStream:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.closed = False
+
+    async def __aiter__(self):
+        for token in self.tokens:
+            delta = SimpleNamespace(content=token)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    async def close(self):
+        self.closed = True
+
+
+def fake_client(delay):
+    completions = FakeCompletions(delay)
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions)), completions
+
+
+@pytest.mark.asyncio
+async def test_concurrent_completions_are_limited():
+    client, completions = fake_client(0.01)
+    chat = GroqChat(client, max_concurrency=2, queue_timeout=5)
+
+    results = await asyncio.gather(
+        *(chat.complete("model", [{"role": "user", "content": "hi"}]) for _ in range(6))
+    )
+
+    assert results == ["HI"] * 6
+    assert completions.max_active == 2
+
+
+@pytest.mark.asyncio
+async def test_waiting_too_long_for_a_slot_is_rejected():
+    client, _ = fake_client(0.2)
+    chat = GroqChat(client, max_concurrency=1, queue_timeout=0.01)
+    messages = [{"role": "user", "content": "hi"}]
+
+    results = await asyncio.gather(
+        chat.complete("model", messages),
+        chat.complete("model", messages),
+        return_exceptions=True,
+    )
+
+    assert results[0] == "HI"
+    assert isinstance(results[1], AIServiceBusy)
+
+
+@pytest.mark.asyncio
+async def test_stream_holds_a_slot_until_consumed():
+    client, _ = fake_client(0)
+    chat = GroqChat(client, max_concurrency=1, queue_timeout=0.01)
+    messages = [{"role": "user", "content": "hi"}]
+
+    tokens = await chat.stream("model", messages)
+    with pytest.raises(AIServiceBusy):
+        await chat.complete("model", messages)
+
+    events = [event async for event in sse_events(tokens)]
+    assert events == [
+        'event: token\ndata: {"token": "Led "}\n\n',
+        'event: token\ndata: {"token": "a team"}\n\n',
+        "event: done\ndata: {}\n\n",
+    ]
+    assert await chat.complete("model", messages) == "HI"
+
+
+@pytest.mark.asyncio
+async def test_stream_that_is_never_iterated_frees_its_slot():
+    client, _ = fake_client(0)
+    chat = GroqChat(client, max_concurrency=1, queue_timeout=0.01)
+    messages = [{"role": "user", "content": "hi"}]
+
+    # E.g. the response was dropped before it started streaming
+    tokens = await chat.stream("model", messages)
+    sse_events(tokens)
+    del tokens
+    gc.collect()
+    await asyncio.sleep(0.01)
+
+    assert await chat.complete("model", messages) == "HI"
@@ -0,0 +1,58 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from test_util import FakeRedis
+
+from src.ai.exceptions import AIServiceBusy
+from src.ai.optimize_cache import OptimizeCache, optimize_cache_key
+from src.ai.service import optimize_text
+
+
+def test_key_ignores_whitespace_differences():
+    assert optimize_cache_key("Built  an API\n") == optimize_cache_key("Built an API")
+    assert optimize_cache_key("Built an API") != optimize_cache_key("Built a CLI")
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded():
+    cache = OptimizeCache(FakeRedis(), ttl=60, max_entries=2)
+
+    for description in ["a", "b", "c"]:
+        await cache.set(description, description.upper())
+
+    assert await cache.get("a") is None
+    assert await cache.get("c") == "C"
+    assert len(cache.redis.values) == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_result_skips_model_and_quota():
+    cache = OptimizeCache(FakeRedis(), ttl=60, max_entries=10)
+    complete = AsyncMock(return_value="Optimized")
+
+    with patch("src.ai.service.optimize_cache", cache), patch(
+        "src.ai.service.groq_chat.complete", complete
+    ), patch("src.ai.service.check_and_update_request_limit") as limit:
+        assert await optimize_text("uid", "Built an API") == "Optimized"
+        assert await optimize_text("uid", "Built  an API") == "Optimized"
+        assert complete.await_count == 1
+        assert limit.await_count == 1
+
+        await optimize_text("uid", "Built an API", regenerate=True)
+        assert complete.await_count == 2
+        assert limit.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_busy_or_failed_calls_are_refunded():
+    cache = OptimizeCache(FakeRedis(), ttl=60, max_entries=10)
+
+    with patch("src.ai.service.optimize_cache", cache), patch(
+        "src.ai.service.groq_chat.complete", AsyncMock(side_effect=AIServiceBusy())
+    ), patch("src.ai.service.check_and_update_request_limit"), patch(
+        "src.ai.service.refund_request"
+    ) as refund:
+        with pytest.raises(AIServiceBusy):
+            await optimize_text("uid", "Built an API")
+
+    refund.assert_awaited_once_with("uid")
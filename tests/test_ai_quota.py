@@ -0,0 +1,108 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from test_util import FakeRedis
+
+from src.ai.exceptions import RequestLimitExceeded
+from src.ai.quota import (
+    DECREMENT_SCRIPT,
+    INCREMENT_SCRIPT,
+    QUOTA_LIMITS,
+    QuotaCounter,
+    QuotaKind,
+)
+
+
+async def increment(redis, keys, args):
+    # Yield first so concurrent callers interleave like real clients
+    await asyncio.sleep(0)
+    current = redis.values.get(keys[0])
+    if current is None:
+        return -2
+    if int(current) >= int(args[0]):
+        return -1
+    return await redis.incr(keys[0])
+
+
+async def decrement(redis, keys, args):
+    current = redis.values.get(keys[0])
+    if current is None or int(current) <= 0:
+        return -1
+    redis.values[keys[0]] = str(int(current) - 1)
+    return int(current) - 1
+
+
+def quota_redis():
+    """A FakeRedis running the quota scripts' logic in Python."""
+    return FakeRedis({INCREMENT_SCRIPT: increment, DECREMENT_SCRIPT: decrement})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_do_not_overshoot_limit():
+    counter = QuotaCounter(quota_redis())
+    limit = QUOTA_LIMITS[QuotaKind.request]
+
+    with patch("src.ai.quota.load_usage", AsyncMock(return_value=0)), patch(
+        "src.ai.quota.persist_usage", AsyncMock()
+    ) as persist:
+        results = await asyncio.gather(
+            *(counter.consume(QuotaKind.request, "uid") for _ in range(limit + 25)),
+            return_exceptions=True,
+        )
+        await counter.drain()
+
+    accepted = [r for r in results if isinstance(r, int)]
+    assert sorted(accepted) == list(range(1, limit + 1))
+    assert sum(isinstance(r, RequestLimitExceeded) for r in results) == 25
+    assert persist.await_count == limit
+
+
+@pytest.mark.asyncio
+async def test_counter_is_seeded_from_postgres():
+    counter = QuotaCounter(quota_redis())
+
+    with patch("src.ai.quota.load_usage", AsyncMock(return_value=7)) as load, patch(
+        "src.ai.quota.persist_usage", AsyncMock()
+    ):
+        assert await counter.consume(QuotaKind.upload, "uid") == 8
+        assert await counter.consume(QuotaKind.upload, "uid") == 9
+        await counter.drain()
+
+    load.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_postgres_without_redis():
+    redis = quota_redis()
+
+    def broken_script(script):
+        async def run(keys, args):
+            raise ConnectionError("redis down")
+
+        return run
+
+    redis.register_script = broken_script
+    counter = QuotaCounter(redis)
+
+    with patch("src.ai.quota.load_usage", AsyncMock(return_value=3)), patch(
+        "src.ai.quota.persist_usage", AsyncMock()
+    ) as persist:
+        assert await counter.consume(QuotaKind.request, "uid") == 4
+
+    persist.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_refund_gives_a_use_back():
+    counter = QuotaCounter(quota_redis())
+
+    with patch("src.ai.quota.load_usage", AsyncMock(return_value=0)), patch(
+        "src.ai.quota.persist_usage", AsyncMock()
+    ), patch("src.ai.quota.refund_usage", AsyncMock()) as refund_usage:
+        assert await counter.consume(QuotaKind.request, "uid") == 1
+        await counter.refund(QuotaKind.request, "uid")
+        assert await counter.consume(QuotaKind.request, "uid") == 1
+        await counter.drain()
+
+    refund_usage.assert_awaited_once()
@@ -0,0 +1,145 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.ai.resume_analyzer import AIResumeAnalyzer
+
+RESUME = "Experience\n- Built Python services\nEducation\nBSc"
+
+
+class FakeModel:
+    def __init__(self, delay, reply):
+        self.delay = delay
+        self.reply = reply
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, request_options=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(text=self.reply)
+
+
+def analyzer_with(model, deadline=1.0, timeout=5.0, drain_timeout=5.0):
+    analyzer = AIResumeAnalyzer(
+        "gemini-test",
+        deadline=deadline,
+        timeout=timeout,
+        max_concurrency=2,
+        drain_timeout=drain_timeout,
+    )
+    analyzer.model = model
+    return analyzer
+
+
+@pytest.mark.asyncio
+async def test_json_reply_is_merged_with_scores():
+    analyzer = analyzer_with(FakeModel(0, json.dumps({"resume_score": 72})))
+
+    result = await analyzer.analyze_resume_with_gemini(RESUME)
+
+    assert result["resume_score"] == 72
+    assert result["job_family"] == "general"
+    assert "ats_score" in result
+    assert "analysis_pending" not in result
+
+
+@pytest.mark.asyncio
+async def test_deadline_returns_scores_and_finishes_in_background():
+    analyzer = analyzer_with(
+        FakeModel(0.2, json.dumps({"resume_score": 90})), deadline=0.01
+    )
+    late = []
+
+    async def on_late_result(result):
+        late.append(result)
+
+    result = await analyzer.analyze_resume_with_gemini(
+        RESUME, on_late_result=on_late_result
+    )
+    assert result["analysis_pending"] is True
+    assert "resume_score" not in result
+    assert "ats_score" in result
+
+    await analyzer.drain()
+    assert len(late) == 1
+    assert late[0]["resume_score"] == 90
+    assert late[0]["ats_score"] == result["ats_score"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_slots():
+    model = FakeModel(0.05, "{}")
+    analyzer = analyzer_with(model)
+    active = peak = 0
+    generate = model.generate_content_async
+
+    async def counting(prompt, request_options=None):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            return await generate(prompt, request_options)
+        finally:
+            active -= 1
+
+    model.generate_content_async = counting
+    await asyncio.gather(
+        *(analyzer.analyze_resume_with_gemini(RESUME) for _ in range(6))
+    )
+
+    assert model.calls == 6
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_background_call_is_cut_off_by_the_timeout():
+    analyzer = analyzer_with(FakeModel(10, "{}"), deadline=0.01, timeout=0.05)
+    late = []
+
+    async def on_late_result(result):
+        late.append(result)
+
+    result = await analyzer.analyze_resume_with_gemini(
+        RESUME, on_late_result=on_late_result
+    )
+    assert result["analysis_pending"] is True
+
+    await asyncio.wait_for(analyzer.drain(), 1)
+    assert late == []
+
+
+@pytest.mark.asyncio
+async def test_drain_gives_up_after_its_timeout():
+    analyzer = analyzer_with(
+        FakeModel(10, "{}"), deadline=0.01, timeout=60, drain_timeout=0.05
+    )
+    await analyzer.analyze_resume_with_gemini(RESUME)
+
+    await asyncio.wait_for(analyzer.drain(), 1)
+    assert not analyzer._background
+
+
+@pytest.mark.asyncio
+async def test_analyses_of_the_same_key_share_one_call():
+    model = FakeModel(0.1, json.dumps({"resume_score": 90}))
+    analyzer = analyzer_with(model, deadline=0.01)
+    late = []
+
+    async def on_late_result(result):
+        late.append(result)
+
+    first = await analyzer.analyze_resume_with_gemini(
+        RESUME, on_late_result=on_late_result, key="fingerprint"
+    )
+    assert analyzer.in_flight("fingerprint")
+    again = await analyzer.analyze_resume_with_gemini(
+        RESUME, on_late_result=on_late_result, key="fingerprint"
+    )
+    assert first["analysis_pending"] and again["analysis_pending"]
+
+    await analyzer.drain()
+    assert model.calls == 1
+    assert len(late) == 1
+    assert not analyzer.in_flight("fingerprint")
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from src.ai.constants import JOB_FAMILY_KEYWORDS
+from src.ai.exceptions import UnknownJobFamily
+from src.ai.scoring import ScoringEngine
+
+RESUME = """Jane Doe
+Experience
+- Led a team building REST microservices in Python and C++
+- Moved CI/CD to Kubernetes on AWS
+Education
+BSc Computer Science
+Skills: Machine
+Learning, SQL, Docker
+"""
+
+
+@pytest.fixture
+def engine():
+    return ScoringEngine(JOB_FAMILY_KEYWORDS)
+
+
+def test_scores_from_single_scan(engine):
+    scores = engine.score(RESUME)
+
+    # experience, education, skills (no project or certification), no tables
+    assert scores.ats_score == 70
+    # python, sql, team, aws, machine learning of the 14 general keywords
+    assert scores.keyword_match_score == int(5 / 14 * 100)
+    # bullets and both sections; too short for the length points
+    assert scores.formatting_score == 60
+    assert scores.matched_terms["python"] == [RESUME.index("Python")]
+    assert scores.matched_terms["machine learning"] == [RESUME.index("Machine")]
+
+
+def test_whole_words_and_plurals(engine):
+    matches = engine.find_terms("JavaScript projects, stable teams, Nodes")
+
+    assert "java" not in matches
+    assert "table" not in matches
+    assert {"project", "team", "node"} <= matches.keys()
+
+
+def test_job_family_keywords(engine):
+    scores = engine.score(RESUME, "software_engineering")
+
+    assert scores.job_family == "software_engineering"
+    assert {"c++", "ci/cd", "rest", "kubernetes"} <= scores.matched_terms.keys()
+    with pytest.raises(UnknownJobFamily):
+        engine.score(RESUME, "astronaut")
+
+
+def test_keyword_sets_load_from_json(tmp_path):
+    path = tmp_path / "keywords.json"
+    path.write_text(json.dumps({"general": ["rust"], "embedded": ["rtos"]}))
+
+    engine = ScoringEngine.from_json(str(path))
+
+    assert engine.families() == ["embedded", "general"]
+    assert engine.score("Rust", "general").keyword_match_score == 100
@@ -1,6 +1,8 @@
+from fastapi import FastAPI, Request
 from fastapi.testclient import TestClient
 
 from src.app import create_app
+from src.middlewares import LimitBodySizeMiddleware
 
 client = TestClient(create_app())
 
@@ -28,3 +30,27 @@ def test_exceed_body_size():
 
     assert response.status_code == 413
     assert response.text == "Payload too large"
+
+
+def test_exceed_body_size_streamed_without_content_length():
+    """Test that a chunked body is rejected once it streams past the limit."""
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request) -> dict[str, int]:
+        return {"size": len(await request.body())}
+
+    app.add_middleware(LimitBodySizeMiddleware, max_bytes=1024)
+    streaming_client = TestClient(app)
+
+    def chunks(count: int):
+        for _ in range(count):
+            yield b"a" * 512
+
+    within = streaming_client.post("/echo", content=chunks(2))
+    assert within.status_code == 200
+    assert within.json() == {"size": 1024}
+
+    exceeded = streaming_client.post("/echo", content=chunks(4))
+    assert exceeded.status_code == 413
+    assert exceeded.text == "Payload too large"
@@ -6,12 +6,18 @@ from test_util import api_prefix
 
 from src.app import create_app
 from src.auth.exceptions import (
+    AdminOnlyException,
     EmailUnavailableException,
     UserAlreadyExistsError,
     UsernameUnavailableException,
 )
 from src.auth.schemas import SignupResponse, UserCreate
-from src.auth.service import create_user, generate_username, get_user_by_uid
+from src.auth.service import (
+    create_user,
+    generate_username,
+    get_token_cache_stats,
+    get_user_by_uid,
+)
 
 
 class TestAuthEndpoints:
@@ -605,3 +611,10 @@ class TestAuthService:
             call_args = db_instance.user.find_unique.call_args[1]["where"]
             assert "uid" in call_args
             assert call_args["uid"] == "test_uid"
+
+    def test_token_cache_stats_are_restricted_to_admins(self):
+        """Test only admins can read the token cache statistics."""
+        with patch("src.auth.service.settings.ADMIN_UIDS", ["admin_uid"]):
+            with pytest.raises(AdminOnlyException):
+                get_token_cache_stats("test_uid")
+            assert "hits" in get_token_cache_stats("admin_uid")
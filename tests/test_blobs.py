@@ -0,0 +1,94 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from test_util import FakeBlobDb
+
+from src.blobs import blob_path, content_digest, release_blobs, store_blob
+from src.database import LocalStorage
+from src.signed_urls import SignedUrlCache
+
+BUCKET = "certificates"
+
+
+@pytest.fixture(autouse=True)
+def signed_url_cache():
+    with patch("src.blobs.signed_url_cache", SignedUrlCache(10)) as cache:
+        yield cache
+
+
+async def store(db, storage, content):
+    return await store_blob(db, storage, BUCKET, content, "application/pdf", ".pdf")
+
+
+@pytest.mark.asyncio
+async def test_identical_content_is_uploaded_once():
+    db, storage = FakeBlobDb(), LocalStorage()
+    storage.upload = AsyncMock(wraps=storage.upload)
+
+    first = await store(db, storage, b"%PDF same")
+    second = await store(db, storage, b"%PDF same")
+    other = await store(db, storage, b"%PDF other")
+
+    assert first == second == blob_path(content_digest(b"%PDF same"), ".pdf")
+    assert first.startswith("blobs/") and first != other
+    assert storage.upload.await_count == 2
+    assert db.ref_count(BUCKET, first) == 2
+
+
+@pytest.mark.asyncio
+async def test_blob_is_removed_when_the_last_reference_goes(signed_url_cache):
+    db, storage = FakeBlobDb(), LocalStorage()
+    path = await store(db, storage, b"%PDF shared")
+    await store(db, storage, b"%PDF shared")
+    await signed_url_cache.sign_many(storage, BUCKET, [path], 3600)
+
+    await release_blobs(db, storage, BUCKET, [path])
+    assert storage.exists(BUCKET, path)
+    assert db.ref_count(BUCKET, path) == 1
+
+    await release_blobs(db, storage, BUCKET, [path])
+    assert not storage.exists(BUCKET, path)
+    assert db.ref_count(BUCKET, path) is None
+    assert signed_url_cache.stats()["size"] == 0
+
+    # Stored afresh once collected
+    assert await store(db, storage, b"%PDF shared") == path
+    assert storage.exists(BUCKET, path)
+
+
+@pytest.mark.asyncio
+async def test_release_counts_every_reference_and_removes_legacy_paths():
+    db, storage = FakeBlobDb(), LocalStorage()
+    path = await store(db, storage, b"%PDF twice")
+    await store(db, storage, b"%PDF twice")
+    await storage.upload(BUCKET, "uid/legacy.pdf", b"%PDF legacy")
+
+    await release_blobs(db, storage, BUCKET, [path, path, "uid/legacy.pdf"])
+
+    assert storage.objects == {}
+    assert db.rows == {}
+
+
+@pytest.mark.asyncio
+async def test_failed_upload_drops_the_reference():
+    db, storage = FakeBlobDb(), LocalStorage()
+    storage.upload = AsyncMock(side_effect=Exception("upload failed"))
+
+    with pytest.raises(Exception, match="upload failed"):
+        await store(db, storage, b"%PDF")
+
+    assert db.rows == {}
+
+
+@pytest.mark.asyncio
+async def test_collection_failure_keeps_the_blob_for_a_later_upload():
+    db, storage = FakeBlobDb(), LocalStorage()
+    path = await store(db, storage, b"%PDF kept")
+    storage.remove = AsyncMock(side_effect=Exception("remove failed"))
+
+    await release_blobs(db, storage, BUCKET, [path])
+
+    # Marked as not stored, so the next upload stores the content again
+    assert db.rows[(BUCKET, path)] == {"ref_count": 0, "stored": False}
+    await store(db, storage, b"%PDF kept")
+    assert db.rows[(BUCKET, path)] == {"ref_count": 1, "stored": True}
@@ -1,4 +1,5 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import ExitStack, asynccontextmanager
 from datetime import date
 from io import BytesIO
 from unittest.mock import AsyncMock, Mock, patch
@@ -6,9 +7,10 @@ from unittest.mock import AsyncMock, Mock, patch
 import pytest
 from fastapi.testclient import TestClient
 from starlette.datastructures import UploadFile
-from test_util import api_prefix, get_firebase_token
+from test_util import FakeBlobDb, FakeRowModel, api_prefix, get_firebase_token
 
 from src.app import create_app
+from src.blobs import store_blob
 from src.certificate.constants import (
     CERTIFICATION_ADDITION_SUCCESS,
     CERTIFICATION_FILE_MISSING,
@@ -21,6 +23,7 @@ from src.certificate.exceptions import (
 )
 from src.certificate.schemas import CertificateOut
 from src.certificate.service import (
+    STORAGE_BUCKET,
     delete_user_certificate,
     generate_signed_url,
     get_certificate_or_404,
@@ -30,6 +33,8 @@ from src.certificate.service import (
     upload_file_to_supabase,
     validate_file,
 )
+from src.database import LocalStorage
+from src.signed_urls import SignedUrlCache
 
 
 @pytest.fixture
@@ -66,6 +71,41 @@ def sample_certificate_data():
     }
 
 
+def pdf_upload(filename, content=b"%PDF-1.4 fake pdf content"):
+    return UploadFile(filename=filename, file=BytesIO(content), size=len(content))
+
+
+def mock_transactional_db():
+    """A fake Prisma client with the Blob table and a mock certification model."""
+    mock_db = FakeBlobDb()
+    mock_db.certification = Mock()
+    mock_db.certification.create_many = AsyncMock(return_value=1)
+    # The client's `tx()` yields the client itself
+    return mock_db, mock_db
+
+
+def patch_db_and_storage(mock_db, storage):
+    @asynccontextmanager
+    async def mock_get_db():
+        yield mock_db
+
+    @asynccontextmanager
+    async def mock_get_storage():
+        yield storage
+
+    stack = ExitStack()
+    stack.enter_context(patch("src.certificate.service.get_db", mock_get_db))
+    stack.enter_context(patch("src.certificate.service.get_storage", mock_get_storage))
+    stack.enter_context(
+        patch("src.certificate.service.invalidate_static_data", AsyncMock())
+    )
+    stack.enter_context(
+        patch("src.certificate.service.invalidate_public_portfolios", AsyncMock())
+    )
+    stack.enter_context(patch("src.blobs.signed_url_cache", SignedUrlCache(10)))
+    return stack
+
+
 # =============================================================================
 # INTEGRATION TESTS - Testing all API endpoints
 # =============================================================================
@@ -580,18 +620,18 @@ class TestCertificateIntegration:
         )
 
         mock_db = Mock()
-        mock_supabase = Mock()
+        mock_storage = AsyncMock()
 
         @asynccontextmanager
         async def mock_get_db():
             yield mock_db
 
         @asynccontextmanager
-        async def mock_get_supabase():
-            yield mock_supabase
+        async def mock_get_storage():
+            yield mock_storage
 
         with patch("src.certificate.service.get_db", mock_get_db), patch(
-            "src.certificate.service.get_supabase", mock_get_supabase
+            "src.certificate.service.get_storage", mock_get_storage
         ), patch("src.certificate.service.get_certificate_or_404") as mock_get_cert:
 
             mock_get_cert.return_value = mock_cert
@@ -643,57 +683,70 @@ class TestCertificateService:
 
         assert "File size exceeds 5MB limit" in str(exc_info.value)
 
-    def test_generate_signed_url_success(self):
+    @pytest.mark.asyncio
+    async def test_generate_signed_url_success(self):
         """Test successful signed URL generation."""
-        mock_supabase = Mock()
-        mock_supabase.storage.from_().create_signed_url.return_value = {
-            "signedURL": "https://example.com/signed-url"
-        }
+        mock_storage = AsyncMock()
+        mock_storage.create_signed_urls.return_value = [
+            {
+                "path": "path/to/file",
+                "signedURL": "https://example.com/signed-url",
+                "error": None,
+            }
+        ]
 
-        result = generate_signed_url(mock_supabase, "path/to/file", "bucket")
+        with patch("src.certificate.service.signed_url_cache", SignedUrlCache(10)):
+            result = await generate_signed_url(mock_storage, "path/to/file", "bucket")
 
         assert result == "https://example.com/signed-url"
-        mock_supabase.storage.from_.assert_called_with("bucket")
+        mock_storage.create_signed_urls.assert_awaited_once_with(
+            "bucket", ["path/to/file"], 3600
+        )
 
-    def test_generate_signed_url_failure(self):
+    @pytest.mark.asyncio
+    async def test_generate_signed_url_failure(self):
         """Test signed URL generation failure."""
-        mock_supabase = Mock()
-        mock_supabase.storage.from_().create_signed_url.return_value = {}
+        mock_storage = AsyncMock()
+        mock_storage.create_signed_urls.return_value = [
+            {"path": "path/to/file", "signedURL": None, "error": "Object not found"}
+        ]
 
-        with pytest.raises(CertificateUploadException) as exc_info:
-            generate_signed_url(mock_supabase, "path/to/file", "bucket")
+        with patch(
+            "src.certificate.service.signed_url_cache", SignedUrlCache(10)
+        ), pytest.raises(CertificateUploadException) as exc_info:
+            await generate_signed_url(mock_storage, "path/to/file", "bucket")
 
         assert "Failed to generate signed URL" in str(exc_info.value)
 
     @pytest.mark.asyncio
     async def test_upload_file_to_supabase_success(self, mock_pdf_file):
         """Test successful file upload to Supabase."""
-        mock_supabase = Mock()
-        mock_supabase.storage.from_().upload.return_value = None
+        mock_storage = AsyncMock()
+        mock_storage.upload.return_value = None
 
         with patch("src.certificate.service.validate_file") as mock_validate:
             mock_validate.return_value = None
 
             result = await upload_file_to_supabase(
-                mock_supabase, "test-uid", mock_pdf_file, "test-bucket"
+                FakeBlobDb(), mock_storage, mock_pdf_file, "test-bucket"
             )
 
-            assert result.startswith("test-uid/")
+            assert result.startswith("blobs/")
             assert result.endswith(".pdf")
-            mock_supabase.storage.from_.assert_called_with("test-bucket")
+            assert mock_storage.upload.await_args.args[0] == "test-bucket"
 
     @pytest.mark.asyncio
     async def test_upload_file_to_supabase_failure(self, mock_pdf_file):
         """Test file upload failure to Supabase."""
-        mock_supabase = Mock()
-        mock_supabase.storage.from_().upload.side_effect = Exception("Upload failed")
+        mock_storage = AsyncMock()
+        mock_storage.upload.side_effect = Exception("Upload failed")
 
         with patch("src.certificate.service.validate_file") as mock_validate:
             mock_validate.return_value = None
 
             with pytest.raises(CertificateUploadException):
                 await upload_file_to_supabase(
-                    mock_supabase, "test-uid", mock_pdf_file, "test-bucket"
+                    FakeBlobDb(), mock_storage, mock_pdf_file, "test-bucket"
                 )
 
     @pytest.mark.asyncio
@@ -737,35 +790,21 @@ class TestCertificateService:
             await get_certificate_or_404(mock_db, "test-uid", 1)
 
     @pytest.mark.asyncio
-    async def test_process_certificate_uploads_success(self, sample_certificate_data):
+    async def test_process_certificate_uploads_success(
+        self, sample_certificate_data, mock_pdf_file
+    ):
         """Test successful certificate upload processing."""
-        mock_file = Mock()
-        mock_file.filename = "test.pdf"
-
-        cert_data = {**sample_certificate_data, "file": mock_file}
-
-        mock_db = Mock()
-        mock_supabase = Mock()
-        mock_db.certification.create = AsyncMock()
-
-        @asynccontextmanager
-        async def mock_get_db():
-            yield mock_db
-
-        @asynccontextmanager
-        async def mock_get_supabase():
-            yield mock_supabase
-
-        with patch("src.certificate.service.get_db", mock_get_db), patch(
-            "src.certificate.service.get_supabase", mock_get_supabase
-        ), patch("src.certificate.service.upload_file_to_supabase") as mock_upload:
-
-            mock_upload.return_value = "test-uid/file-path.pdf"
+        cert_data = {**sample_certificate_data, "file": mock_pdf_file}
+        storage = LocalStorage()
+        mock_db, mock_tx = mock_transactional_db()
 
+        with patch_db_and_storage(mock_db, storage):
             await process_certificate_uploads("test-uid", [cert_data])
 
-            mock_db.certification.create.assert_called_once()
-            mock_upload.assert_called_once()
+        mock_tx.certification.create_many.assert_awaited_once()
+        [row] = mock_tx.certification.create_many.await_args.kwargs["data"]
+        assert row["issued_date"] == "2024-01-15T00:00:00.000Z"
+        assert storage.exists(STORAGE_BUCKET, row["link"])
 
     @pytest.mark.asyncio
     async def test_process_certificate_uploads_invalid_date(
@@ -802,7 +841,7 @@ class TestCertificateService:
         mock_cert2.link = "path/to/cert2"
 
         mock_db = Mock()
-        mock_supabase = Mock()
+        mock_storage = AsyncMock()
         mock_db.certification.find_many = AsyncMock(
             return_value=[mock_cert1, mock_cert2]
         )
@@ -812,20 +851,26 @@ class TestCertificateService:
             yield mock_db
 
         @asynccontextmanager
-        async def mock_get_supabase():
-            yield mock_supabase
+        async def mock_get_storage():
+            yield mock_storage
 
         with patch("src.certificate.service.get_db", mock_get_db), patch(
-            "src.certificate.service.get_supabase", mock_get_supabase
-        ), patch("src.certificate.service.generate_signed_url") as mock_generate:
+            "src.certificate.service.get_storage", mock_get_storage
+        ), patch(
+            "src.certificate.service.generate_signed_urls", new_callable=AsyncMock
+        ) as mock_generate:
 
-            mock_generate.return_value = "https://signed-url.com"
+            mock_generate.return_value = {
+                "path/to/cert1": "https://signed-url.com/1",
+                "path/to/cert2": "https://signed-url.com/2",
+            }
 
             result = await get_user_certificates("test-uid")
 
             assert len(result) == 2
             assert result[0].title == "Cert 1"
             assert result[1].title == "Cert 2"
+            assert result[1].link == "https://signed-url.com/2"
 
     @pytest.mark.asyncio
     async def test_update_user_certificate_success(self):
@@ -846,7 +891,7 @@ class TestCertificateService:
         mock_updated_cert.link = "updated/path"
 
         mock_db = Mock()
-        mock_supabase = Mock()
+        mock_storage = AsyncMock()
         mock_db.certification.update = AsyncMock(return_value=mock_updated_cert)
 
         @asynccontextmanager
@@ -854,15 +899,15 @@ class TestCertificateService:
             yield mock_db
 
         @asynccontextmanager
-        async def mock_get_supabase():
-            yield mock_supabase
+        async def mock_get_storage():
+            yield mock_storage
 
         with patch("src.certificate.service.get_db", mock_get_db), patch(
-            "src.certificate.service.get_supabase", mock_get_supabase
+            "src.certificate.service.get_storage", mock_get_storage
         ), patch(
             "src.certificate.service.get_certificate_or_404"
         ) as mock_get_cert, patch(
-            "src.certificate.service.generate_signed_url"
+            "src.certificate.service.generate_signed_url", new_callable=AsyncMock
         ) as mock_generate:
 
             mock_get_cert.return_value = mock_cert
@@ -888,18 +933,18 @@ class TestCertificateService:
         )
 
         mock_db = Mock()
-        mock_supabase = Mock()
+        mock_storage = AsyncMock()
 
         @asynccontextmanager
         async def mock_get_db():
             yield mock_db
 
         @asynccontextmanager
-        async def mock_get_supabase():
-            yield mock_supabase
+        async def mock_get_storage():
+            yield mock_storage
 
         with patch("src.certificate.service.get_db", mock_get_db), patch(
-            "src.certificate.service.get_supabase", mock_get_supabase
+            "src.certificate.service.get_storage", mock_get_storage
         ), patch("src.certificate.service.get_certificate_or_404") as mock_get_cert:
 
             mock_get_cert.return_value = mock_cert
@@ -917,18 +962,18 @@ class TestCertificateService:
         )
 
         mock_db = Mock()
-        mock_supabase = Mock()
+        mock_storage = AsyncMock()
 
         @asynccontextmanager
         async def mock_get_db():
             yield mock_db
 
         @asynccontextmanager
-        async def mock_get_supabase():
-            yield mock_supabase
+        async def mock_get_storage():
+            yield mock_storage
 
         with patch("src.certificate.service.get_db", mock_get_db), patch(
-            "src.certificate.service.get_supabase", mock_get_supabase
+            "src.certificate.service.get_storage", mock_get_storage
         ), patch("src.certificate.service.get_certificate_or_404") as mock_get_cert:
 
             mock_get_cert.return_value = mock_cert
@@ -952,20 +997,20 @@ class TestCertificateService:
         )
 
         mock_db = Mock()
-        mock_supabase = Mock()
+        mock_storage = AsyncMock()
         mock_db.certification.delete = AsyncMock()
-        mock_supabase.storage.from_().remove.return_value = None
+        mock_storage.remove.return_value = None
 
         @asynccontextmanager
         async def mock_get_db():
             yield mock_db
 
         @asynccontextmanager
-        async def mock_get_supabase():
-            yield mock_supabase
+        async def mock_get_storage():
+            yield mock_storage
 
         with patch("src.certificate.service.get_db", mock_get_db), patch(
-            "src.certificate.service.get_supabase", mock_get_supabase
+            "src.certificate.service.get_storage", mock_get_storage
         ), patch("src.certificate.service.get_certificate_or_404") as mock_get_cert:
 
             mock_get_cert.return_value = mock_cert
@@ -973,7 +1018,9 @@ class TestCertificateService:
             await delete_user_certificate("test-uid", 1)
 
             mock_db.certification.delete.assert_called_once_with(where={"id": 1})
-            mock_supabase.storage.from_.assert_called_with("certificates")
+            mock_storage.remove.assert_awaited_once_with(
+                "certificates", ["path/to/cert"]
+            )
 
     @pytest.mark.asyncio
     async def test_update_user_certificate_with_file_replacement(self):
@@ -997,26 +1044,27 @@ class TestCertificateService:
         mock_file.filename = "new_cert.pdf"
 
         mock_db = Mock()
-        mock_supabase = Mock()
-        mock_db.certification.update = AsyncMock(return_value=mock_updated_cert)
-        mock_supabase.storage.from_().remove.return_value = None
+        mock_storage = AsyncMock()
+        mock_db.certification.update_many = AsyncMock(return_value=1)
+        mock_db.certification.find_unique = AsyncMock(return_value=mock_updated_cert)
+        mock_storage.remove.return_value = None
 
         @asynccontextmanager
         async def mock_get_db():
             yield mock_db
 
         @asynccontextmanager
-        async def mock_get_supabase():
-            yield mock_supabase
+        async def mock_get_storage():
+            yield mock_storage
 
         with patch("src.certificate.service.get_db", mock_get_db), patch(
-            "src.certificate.service.get_supabase", mock_get_supabase
+            "src.certificate.service.get_storage", mock_get_storage
         ), patch(
             "src.certificate.service.get_certificate_or_404"
         ) as mock_get_cert, patch(
             "src.certificate.service.upload_file_to_supabase"
         ) as mock_upload, patch(
-            "src.certificate.service.generate_signed_url"
+            "src.certificate.service.generate_signed_url", new_callable=AsyncMock
         ) as mock_generate:
 
             mock_get_cert.return_value = mock_cert
@@ -1028,10 +1076,51 @@ class TestCertificateService:
             )
 
             # Should remove old file and upload new one
-            mock_supabase.storage.from_().remove.assert_called_once_with(["old/path"])
+            mock_storage.remove.assert_awaited_once_with("certificates", ["old/path"])
             mock_upload.assert_called_once()
+            mock_db.certification.update_many.assert_awaited_once_with(
+                where={"id": 1, "link": "old/path"}, data={"link": "new/path"}
+            )
             assert result.link == "https://signed-url.com"
 
+    @pytest.mark.asyncio
+    async def test_concurrent_file_replacements_release_each_replaced_file(self):
+        """Test that racing replacements never release the old file twice."""
+        db, storage = FakeBlobDb(), LocalStorage()
+        # The old file is shared with another certificate
+        old = await store_blob(
+            db, storage, STORAGE_BUCKET, b"%PDF old", "application/pdf", ".pdf"
+        )
+        await store_blob(
+            db, storage, STORAGE_BUCKET, b"%PDF old", "application/pdf", ".pdf"
+        )
+        db.certification = FakeRowModel(
+            id=1,
+            user_id="test-uid",
+            title="Title",
+            issuer="Issuer",
+            issued_date=date(2024, 1, 15),
+            link=old,
+        )
+
+        with patch_db_and_storage(db, storage), patch(
+            "src.certificate.service.signed_url_cache", SignedUrlCache(10)
+        ):
+            await asyncio.gather(
+                *(
+                    update_user_certificate(
+                        "test-uid", 1, None, None, None, pdf_upload("c.pdf", content)
+                    )
+                    for content in (b"%PDF first", b"%PDF second")
+                )
+            )
+
+        link = db.certification.row.link
+        assert db.ref_count(STORAGE_BUCKET, old) == 1
+        assert db.ref_count(STORAGE_BUCKET, link) == 1
+        # The old file and the final one are left; the overtaken one is gone
+        assert {path for _, path in storage.objects} == {old, link}
+
     @pytest.mark.asyncio
     async def test_validate_file_case_insensitive_extension(self):
         """Test file validation with uppercase extension."""
@@ -1059,66 +1148,86 @@ class TestCertificateService:
         mock_file.filename = None
         mock_file.read = AsyncMock(return_value=b"%PDF-1.4 content")
 
-        mock_supabase = Mock()
-        mock_supabase.storage.from_().upload.return_value = None
+        mock_storage = AsyncMock()
+        mock_storage.upload.return_value = None
 
         with patch("src.certificate.service.validate_file") as mock_validate:
             mock_validate.return_value = None
 
             result = await upload_file_to_supabase(
-                mock_supabase, "test-uid", mock_file, "test-bucket"
+                FakeBlobDb(), mock_storage, mock_file, "test-bucket"
             )
 
             # Should still generate a path even without filename
-            assert result.startswith("test-uid/")
+            assert result.startswith("blobs/")
 
     @pytest.mark.asyncio
     async def test_process_certificate_uploads_multiple_certs(
         self, sample_certificate_data
     ):
         """Test processing multiple certificates in one batch."""
-        mock_file1 = Mock()
-        mock_file1.filename = "cert1.pdf"
-        mock_file2 = Mock()
-        mock_file2.filename = "cert2.pdf"
-
-        cert_data1 = {**sample_certificate_data, "file": mock_file1}
-        cert_data2 = {
-            "title": "Google Cloud Certified",
-            "issuer": "Google Cloud",
-            "issued_date": "2024-02-20",
-            "file": mock_file2,
-        }
+        certs = [
+            {**sample_certificate_data, "file": pdf_upload(f"cert{i}.pdf")}
+            for i in range(6)
+        ]
+        storage = LocalStorage()
+        mock_db, mock_tx = mock_transactional_db()
 
-        mock_db = Mock()
-        mock_supabase = Mock()
-        mock_db.certification.create = AsyncMock()
+        with patch_db_and_storage(mock_db, storage):
+            await process_certificate_uploads("test-uid", certs)
 
-        @asynccontextmanager
-        async def mock_get_db():
-            yield mock_db
+        # All rows are inserted with a single call
+        mock_tx.certification.create_many.assert_awaited_once()
+        rows = mock_tx.certification.create_many.await_args.kwargs["data"]
+        assert len(rows) == 6
+        # The files are identical, so they share one object
+        assert len(storage.objects) == 1
+        assert mock_db.ref_count(STORAGE_BUCKET, rows[0]["link"]) == 6
 
-        @asynccontextmanager
-        async def mock_get_supabase():
-            yield mock_supabase
+    @pytest.mark.asyncio
+    async def test_process_certificate_uploads_validates_before_upload(
+        self, sample_certificate_data
+    ):
+        """Test that an invalid file in a batch prevents any upload."""
+        certs = [
+            {**sample_certificate_data, "file": pdf_upload("cert.pdf")},
+            {**sample_certificate_data, "file": pdf_upload("cert.docx")},
+        ]
+        storage = LocalStorage()
+        mock_db, mock_tx = mock_transactional_db()
 
-        with patch("src.certificate.service.get_db", mock_get_db), patch(
-            "src.certificate.service.get_supabase", mock_get_supabase
-        ), patch("src.certificate.service.upload_file_to_supabase") as mock_upload:
+        with patch_db_and_storage(mock_db, storage), pytest.raises(
+            CertificateUploadException
+        ):
+            await process_certificate_uploads("test-uid", certs)
 
-            mock_upload.side_effect = ["test-uid/cert1.pdf", "test-uid/cert2.pdf"]
+        assert storage.objects == {}
+        mock_tx.certification.create_many.assert_not_awaited()
 
-            await process_certificate_uploads("test-uid", [cert_data1, cert_data2])
+    @pytest.mark.asyncio
+    async def test_process_certificate_uploads_cleans_up_on_insert_failure(
+        self, sample_certificate_data
+    ):
+        """Test that uploaded files are removed when the insert fails."""
+        certs = [
+            {**sample_certificate_data, "file": pdf_upload(f"cert{i}.pdf")}
+            for i in range(3)
+        ]
+        storage = LocalStorage()
+        mock_db, mock_tx = mock_transactional_db()
+        mock_tx.certification.create_many.side_effect = Exception("insert failed")
+
+        with patch_db_and_storage(mock_db, storage), pytest.raises(Exception):
+            await process_certificate_uploads("test-uid", certs)
 
-            # Should create two database entries
-            assert mock_db.certification.create.call_count == 2
-            assert mock_upload.call_count == 2
+        assert storage.objects == {}
+        assert mock_db.rows == {}
 
     @pytest.mark.asyncio
     async def test_get_user_certificates_empty_result(self):
         """Test get user certificates when no certificates exist."""
         mock_db = Mock()
-        mock_supabase = Mock()
+        mock_storage = AsyncMock()
         mock_db.certification.find_many = AsyncMock(return_value=[])
 
         @asynccontextmanager
@@ -1126,11 +1235,11 @@ class TestCertificateService:
             yield mock_db
 
         @asynccontextmanager
-        async def mock_get_supabase():
-            yield mock_supabase
+        async def mock_get_storage():
+            yield mock_storage
 
         with patch("src.certificate.service.get_db", mock_get_db), patch(
-            "src.certificate.service.get_supabase", mock_get_supabase
+            "src.certificate.service.get_storage", mock_get_storage
         ):
 
             result = await get_user_certificates("test-uid")
@@ -1140,20 +1249,27 @@ class TestCertificateService:
                 where={"user_id": "test-uid"}
             )
 
-    def test_generate_signed_url_with_custom_expiry(self):
+    @pytest.mark.asyncio
+    async def test_generate_signed_url_with_custom_expiry(self):
         """Test signed URL generation with custom expiry time."""
-        mock_supabase = Mock()
-        mock_supabase.storage.from_().create_signed_url.return_value = {
-            "signedURL": "https://example.com/signed-url-custom"
-        }
+        mock_storage = AsyncMock()
+        mock_storage.create_signed_urls.return_value = [
+            {
+                "path": "path/to/file",
+                "signedURL": "https://example.com/signed-url-custom",
+                "error": None,
+            }
+        ]
 
-        result = generate_signed_url(
-            mock_supabase, "path/to/file", "bucket", expires=7200
-        )
+        with patch("src.certificate.service.signed_url_cache", SignedUrlCache(10)):
+            result = await generate_signed_url(
+                mock_storage, "path/to/file", "bucket", expires=7200
+            )
 
         assert result == "https://example.com/signed-url-custom"
-        mock_supabase.storage.from_().create_signed_url.assert_called_with(
-            "path/to/file", expires_in=7200
+        # Expiries are rounded up to the next expiry class
+        mock_storage.create_signed_urls.assert_awaited_with(
+            "bucket", ["path/to/file"], 36000
         )
 
     @pytest.mark.asyncio
@@ -1168,22 +1284,20 @@ class TestCertificateService:
         )
 
         mock_db = Mock()
-        mock_supabase = Mock()
+        mock_storage = AsyncMock()
         mock_db.certification.delete = AsyncMock()
-        mock_supabase.storage.from_().remove.side_effect = Exception(
-            "File removal failed"
-        )
+        mock_storage.remove.side_effect = Exception("File removal failed")
 
         @asynccontextmanager
         async def mock_get_db():
             yield mock_db
 
         @asynccontextmanager
-        async def mock_get_supabase():
-            yield mock_supabase
+        async def mock_get_storage():
+            yield mock_storage
 
         with patch("src.certificate.service.get_db", mock_get_db), patch(
-            "src.certificate.service.get_supabase", mock_get_supabase
+            "src.certificate.service.get_storage", mock_get_storage
         ), patch("src.certificate.service.get_certificate_or_404") as mock_get_cert:
 
             mock_get_cert.return_value = mock_cert
@@ -0,0 +1,48 @@
+from src.cv.generator import TEMPLATE_HTML_FILE, TEMPLATE_TEX_FILE, TemplateRegistry
+
+
+def test_templates_are_compiled_once():
+    registry = TemplateRegistry()
+    assert registry.load_all() == registry.template_ids()
+
+    first = registry.get_template(1, TEMPLATE_TEX_FILE)
+    assert registry.get_template(1, TEMPLATE_TEX_FILE) is first
+    assert registry.environment(1) is registry.environment(1)
+
+
+def test_reload_recompiles_templates(tmp_path):
+    registry = TemplateRegistry(str(tmp_path))
+    registry.load_all()
+    before = registry.get_template(1, TEMPLATE_HTML_FILE)
+    assert any(tmp_path.iterdir())
+
+    registry.reload()
+    assert registry.get_template(1, TEMPLATE_HTML_FILE) is not before
+
+
+def test_render_reuses_unchanged_fragments():
+    registry = TemplateRegistry(fragment_cache_size=64)
+    uncached = TemplateRegistry()
+    variables = {
+        "user": None,
+        "educations": [],
+        "experiences": [],
+        "projects": [],
+        "technical_skills": [],
+        "publications": [],
+        "certificates": [],
+    }
+    blocks = registry.block_variables(1, TEMPLATE_HTML_FILE)
+    assert blocks["experience"] == {"experiences"}
+
+    html = registry.render(1, TEMPLATE_HTML_FILE, variables)
+    assert html == uncached.render(1, TEMPLATE_HTML_FILE, variables)
+    fragments = len(registry._fragments)
+    assert fragments == len(blocks)
+
+    variables["technical_skills"] = [{"name": "Python", "category": "Languages"}]
+    html = registry.render(1, TEMPLATE_HTML_FILE, variables)
+    assert "Python" in html
+    assert html == uncached.render(1, TEMPLATE_HTML_FILE, variables)
+    # Only the technical skills section was rendered again
+    assert len(registry._fragments) == fragments + 1
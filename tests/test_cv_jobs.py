@@ -0,0 +1,168 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from test_util import FakeRedis
+
+from src.cv import jobs
+from src.cv.exceptions import CVGenerationLimitException, CVNotFoundException
+from src.cv.jobs import STUB_PDF, CompileJobQueue, LocalCompileBackend
+from src.cv.schemas import CVCompileJobStatus
+
+
+def make_queue(backend=None, store=None, max_jobs_per_user=2, max_attempts=3):
+    return CompileJobQueue(
+        FakeRedis(),
+        backend=backend or LocalCompileBackend(),
+        store=store or AsyncMock(return_value="uid/cv.pdf"),
+        workers=1,
+        max_jobs_per_user=max_jobs_per_user,
+        max_attempts=max_attempts,
+    )
+
+
+class TestCompileJobQueue:
+    """Unit tests for the CV compile job queue."""
+
+    @pytest.mark.asyncio
+    async def test_enqueue_and_run(self):
+        queue = make_queue()
+
+        job = await queue.enqueue("uid", 1, "\\documentclass{article}")
+        assert job.status == CVCompileJobStatus.queued
+        assert queue.redis.lists[jobs.REDIS_QUEUE_KEY] == [job.id]
+
+        await queue.run(job.id)
+
+        done = await queue.get(job.id)
+        assert done.status == CVCompileJobStatus.done
+        assert done.path == "uid/cv.pdf"
+        queue.store.assert_awaited_once()
+        assert queue.store.await_args.args[1] == STUB_PDF
+
+    @pytest.mark.asyncio
+    async def test_identical_in_flight_jobs_are_deduplicated(self):
+        queue = make_queue()
+
+        first = await queue.enqueue("uid", 1, "same source")
+        second = await queue.enqueue("uid", 1, "same source")
+        other = await queue.enqueue("uid", 2, "same source")
+
+        assert first.id == second.id
+        assert other.id != first.id
+
+    @pytest.mark.asyncio
+    async def test_per_user_limit(self):
+        queue = make_queue(max_jobs_per_user=1)
+
+        await queue.enqueue("uid", 1, "first")
+        with pytest.raises(CVGenerationLimitException):
+            await queue.enqueue("uid", 1, "second")
+        # Other users are unaffected
+        await queue.enqueue("other", 1, "second")
+
+    @pytest.mark.asyncio
+    async def test_failed_compile_is_retried(self, monkeypatch):
+        monkeypatch.setattr(jobs, "RETRY_BACKOFF_SECONDS", 0)
+        backend = AsyncMock()
+        backend.compile.side_effect = [RuntimeError("LaTeX API error: 500"), STUB_PDF]
+        queue = make_queue(backend=backend)
+
+        job = await queue.enqueue("uid", 1, "source")
+        await queue.run(job.id)
+
+        done = await queue.get(job.id)
+        assert done.status == CVCompileJobStatus.done
+        assert done.attempts == 2
+
+    @pytest.mark.asyncio
+    async def test_job_fails_after_max_attempts(self, monkeypatch):
+        monkeypatch.setattr(jobs, "RETRY_BACKOFF_SECONDS", 0)
+        backend = AsyncMock()
+        backend.compile.side_effect = RuntimeError("LaTeX API error: 500")
+        queue = make_queue(backend=backend, max_attempts=2)
+
+        job = await queue.enqueue("uid", 1, "source")
+        await queue.run(job.id)
+
+        failed = await queue.get(job.id)
+        assert failed.status == CVCompileJobStatus.failed
+        assert failed.error == "LaTeX API error: 500"
+        assert await queue.redis.zcard(f"{jobs.REDIS_ACTIVE_PREFIX}uid") == 0
+
+    @pytest.mark.asyncio
+    async def test_missing_cv_is_not_retried(self):
+        queue = make_queue(store=AsyncMock(side_effect=CVNotFoundException()))
+
+        job = await queue.enqueue("uid", 1, "source")
+        await queue.run(job.id)
+
+        failed = await queue.get(job.id)
+        assert failed.status == CVCompileJobStatus.failed
+        assert failed.attempts == 1
+        queue.store.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_enqueues_share_one_job(self):
+        queue = make_queue()
+
+        first, second = await asyncio.gather(
+            queue.enqueue("uid", 1, "same source"),
+            queue.enqueue("uid", 1, "same source"),
+        )
+
+        assert first.id == second.id
+        assert queue.redis.lists[jobs.REDIS_QUEUE_KEY] == [first.id]
+
+    @pytest.mark.asyncio
+    async def test_jobs_with_expired_leases_are_requeued(self):
+        queue = make_queue()
+        job = await queue.enqueue("uid", 1, "source")
+        redis = queue.redis
+        await redis.blmove(
+            jobs.REDIS_QUEUE_KEY, jobs.REDIS_PROCESSING_KEY, 5, "LEFT", "RIGHT"
+        )
+
+        # A job taken but not yet leased gets a lease rather than being requeued
+        assert await queue.reap() == []
+        assert await redis.zscore(jobs.REDIS_LEASES_KEY, job.id) is not None
+
+        # Its worker stopped renewing the lease
+        await redis.zadd(jobs.REDIS_LEASES_KEY, {job.id: 0})
+        assert await queue.reap() == [job.id]
+        assert redis.lists[jobs.REDIS_QUEUE_KEY] == [job.id]
+        assert redis.lists[jobs.REDIS_PROCESSING_KEY] == []
+
+        await queue.run(job.id)
+        assert (await queue.get(job.id)).status == CVCompileJobStatus.done
+
+    @pytest.mark.asyncio
+    async def test_requeued_job_without_attempts_left_fails(self):
+        queue = make_queue(max_attempts=1)
+        job = await queue.enqueue("uid", 1, "source")
+        # Its only attempt was cut short by a lost worker
+        job.attempts = 1
+        await queue._save(job)
+
+        await queue.run(job.id)
+
+        failed = await queue.get(job.id)
+        assert failed.status == CVCompileJobStatus.failed
+        assert failed.error == jobs.WORKER_LOST_ERROR
+        queue.store.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_lapsed_active_jobs_do_not_count_towards_the_limit(self):
+        queue = make_queue(max_jobs_per_user=1)
+        active_key = f"{jobs.REDIS_ACTIVE_PREFIX}uid"
+        first = await queue.enqueue("uid", 1, "first")
+        queue.redis.expirations.clear()
+
+        with pytest.raises(CVGenerationLimitException):
+            await queue.enqueue("uid", 1, "second")
+        # Rejections leave the set's expiry alone
+        assert active_key not in queue.redis.expirations
+
+        # The first job was lost with its worker
+        await queue.redis.zadd(active_key, {first.id: 0})
+        await queue.enqueue("uid", 1, "second")
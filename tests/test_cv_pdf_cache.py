@@ -0,0 +1,134 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from test_util import FakeBlobDb, FakeRowModel
+
+from src.blobs import is_blob_path, release_blobs, store_blob
+from src.cv.exceptions import CVAdminOnlyException
+from src.cv.pdf_cache import CACHED_PDF_WINDOW_SECONDS, cached_pdf_path, content_hash
+from src.cv.service import (
+    STORAGE_BUCKET,
+    _replace_cv_pdf,
+    _reuse_cached_pdf,
+    get_pdf_cache_stats,
+    upload_pdf_bytes_to_supabase,
+)
+from src.database import LocalStorage
+from src.signed_urls import SignedUrlCache
+
+SIGNED = "https://x.supabase.co/storage/v1/object/sign/certificates/u/a.pdf?token={}"
+
+
+def test_content_hash_ignores_signed_url_tokens():
+    first = f"\\href{{{SIGNED.format('aaa.bbb.ccc')}}}{{Cert}}"
+    second = f"\\href{{{SIGNED.format('ddd.eee.fff')}}}{{Cert}}"
+    assert content_hash(first, 1) == content_hash(second, 1)
+
+
+def test_content_hash_depends_on_source_and_template():
+    assert content_hash("a", 1) != content_hash("b", 1)
+    assert content_hash("a", 1) != content_hash("a", 2)
+
+
+def test_sources_with_signed_links_are_only_reused_within_a_window():
+    source = f"\\href{{{SIGNED.format('aaa.bbb.ccc')}}}{{Cert}}"
+    later = CACHED_PDF_WINDOW_SECONDS
+
+    assert content_hash(source, 1, now=0) == content_hash(source, 1, now=later - 1)
+    assert content_hash(source, 1, now=0) != content_hash(source, 1, now=later)
+    # Sources without links don't expire
+    assert content_hash("a", 1, now=0) == content_hash("a", 1, now=later)
+
+
+def test_cached_pdfs_are_reference_counted():
+    assert is_blob_path(cached_pdf_path(content_hash("a", 1)))
+    assert not is_blob_path("uid/0b1c.pdf")
+
+
+async def store_pdf(db, storage, content):
+    return await store_blob(
+        db, storage, STORAGE_BUCKET, content, "application/pdf", ".pdf"
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_pdf_replacements_release_each_replaced_pdf():
+    db, storage = FakeBlobDb(), LocalStorage()
+    # The old PDF is shared with another CV
+    old = await store_pdf(db, storage, b"%PDF old")
+    await store_pdf(db, storage, b"%PDF old")
+    first = await store_pdf(db, storage, b"%PDF first")
+    second = await store_pdf(db, storage, b"%PDF second")
+    db.cv = FakeRowModel(id=1, pdf_url=old)
+    cv = await db.cv.find_unique(where={"id": 1})
+
+    with patch("src.blobs.signed_url_cache", SignedUrlCache(10)):
+        await asyncio.gather(
+            _replace_cv_pdf(db, storage, cv, first),
+            _replace_cv_pdf(db, storage, cv, second),
+        )
+
+    assert db.ref_count(STORAGE_BUCKET, old) == 1
+    assert db.ref_count(STORAGE_BUCKET, db.cv.row.pdf_url) == 1
+    assert {path for _, path in storage.objects} == {old, db.cv.row.pdf_url}
+
+
+@pytest.mark.asyncio
+async def test_replacing_with_the_same_pdf_keeps_one_reference():
+    db, storage = FakeBlobDb(), LocalStorage()
+    path = await store_pdf(db, storage, b"%PDF same")
+    db.cv = FakeRowModel(id=1, pdf_url=path)
+    cv = await db.cv.find_unique(where={"id": 1})
+
+    await store_pdf(db, storage, b"%PDF same")
+    await _replace_cv_pdf(db, storage, cv, path)
+
+    assert db.ref_count(STORAGE_BUCKET, path) == 1
+    assert storage.exists(STORAGE_BUCKET, path)
+
+
+@pytest.mark.asyncio
+async def test_cached_pdf_is_shared_and_collected_with_its_last_cv():
+    db, storage = FakeBlobDb(), LocalStorage()
+    digest = content_hash("source", 1)
+    path = cached_pdf_path(digest)
+    # FakeRowModel holds a single CV, so each CV gets its own
+    first, second = FakeRowModel(id=1, pdf_url=None), FakeRowModel(id=2, pdf_url=None)
+
+    with patch("src.blobs.signed_url_cache", SignedUrlCache(10)), patch(
+        "src.cv.service.signed_url_cache", SignedUrlCache(10)
+    ):
+        db.cv = first
+        await upload_pdf_bytes_to_supabase(db, storage, b"%PDF", STORAGE_BUCKET, path)
+        cv = await first.find_unique(where={"id": 1})
+        await _replace_cv_pdf(db, storage, cv, path)
+
+        # A second CV with the same source reuses it
+        db.cv = second
+        cv = await second.find_unique(where={"id": 2})
+        assert await _reuse_cached_pdf(db, storage, cv, digest)
+        assert db.ref_count(STORAGE_BUCKET, path) == 2
+
+        await release_blobs(db, storage, STORAGE_BUCKET, [first.row.pdf_url])
+        assert storage.exists(STORAGE_BUCKET, path)
+        await release_blobs(db, storage, STORAGE_BUCKET, [second.row.pdf_url])
+        assert not storage.exists(STORAGE_BUCKET, path)
+
+        # Collected, so the next render compiles again
+        cv = await second.find_unique(where={"id": 2})
+        assert await _reuse_cached_pdf(db, storage, cv, digest) is None
+        assert db.ref_count(STORAGE_BUCKET, path) is None
+
+
+@pytest.mark.asyncio
+async def test_pdf_cache_stats_are_restricted_to_admins():
+    stats = AsyncMock(return_value={"hits": 1, "misses": 0})
+    with (
+        patch("src.cv.service.settings.ADMIN_UIDS", ["admin_uid"]),
+        patch("src.cv.service.pdf_cache_stats.stats", stats),
+    ):
+        with pytest.raises(CVAdminOnlyException):
+            await get_pdf_cache_stats("uid")
+        assert await get_pdf_cache_stats("admin_uid") == {"hits": 1, "misses": 0}
+    stats.assert_awaited_once()
@@ -0,0 +1,184 @@
+import asyncio
+from datetime import datetime
+from itertools import count
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.cv.schemas import CVSaveContent
+from src.cv.service import _build_cv_from_db, process_content
+
+EXPERIENCE = {
+    "job_title": "Engineer",
+    "position": "Senior",
+    "company": "Acme",
+    "company_url": "https://acme.test",
+    "company_logo": "",
+    "location": "Remote",
+    "employment_type": "Full-time",
+    "location_type": "Remote",
+    "industry": "Software",
+    "start_date": "2024-01-01",
+    "end_date": "2025-01-01",
+    "description": "Built things",
+}
+
+
+def serial_tx_db():
+    """
+    A mock client standing in for an interactive transaction.
+
+    A transaction runs one query at a time; `overlaps` counts queries
+    started while another was still running.
+    """
+    db = Mock()
+    db.active = db.overlaps = 0
+    ids = count(100)
+
+    def query(result=None):
+        async def run(*args, **kwargs):
+            db.active += 1
+            db.overlaps += db.active > 1
+            await asyncio.sleep(0)
+            db.active -= 1
+            return result() if result else None
+
+        return AsyncMock(side_effect=run)
+
+    for table in (
+        "experience",
+        "publication",
+        "technicalskill",
+        "project",
+        "cv_experience",
+        "cv_publication",
+        "cv_technicalskill",
+        "cv_project",
+        "projecttechnology",
+        "resourceurl",
+    ):
+        actions = getattr(db, table)
+        actions.create = query(lambda: SimpleNamespace(id=next(ids)))
+        actions.create_many = query()
+        actions.delete_many = query()
+    return db
+
+
+def save_content():
+    return CVSaveContent.model_validate(
+        {
+            "title": "CV",
+            "experiences": [{"id": 10, **EXPERIENCE}, EXPERIENCE, EXPERIENCE],
+            "publications": [
+                {
+                    "id": 30,
+                    "title": "t",
+                    "journal": "j",
+                    "year": 2024,
+                    "urls": [
+                        {"label": "DOI", "url": "d", "source_type": "publication"}
+                    ],
+                }
+            ],
+            "technical_skills": [{"name": "Python", "category": "Language"}],
+            "projects": [
+                {
+                    "name": "p",
+                    "description": "d",
+                    "technologies": [{"technology": "Python"}, {"technology": "SQL"}],
+                    "urls": [{"label": "Repo", "url": "u", "source_type": "project"}],
+                }
+            ],
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_content_is_written_one_batch_per_table_and_one_query_at_a_time():
+    db = serial_tx_db()
+
+    await process_content(db, 1, save_content())
+
+    assert db.overlaps == 0
+    assert db.experience.create.await_count == 2
+    assert db.technicalskill.create.await_count == 1
+    db.publication.create.assert_not_awaited()
+    for table in ("cv_experience", "cv_publication", "cv_technicalskill", "cv_project"):
+        getattr(db, table).create_many.assert_awaited_once()
+    links = db.cv_experience.create_many.await_args.kwargs
+    assert [row["experience_id"] for row in links["data"]] == [10, 100, 101]
+    # Duplicate links raise as they did with one create per row
+    assert "skip_duplicates" not in links
+    technologies = db.projecttechnology.create_many.await_args.kwargs["data"]
+    assert [row["technology"] for row in technologies] == ["Python", "SQL"]
+    assert db.resourceurl.create_many.await_count == 2
+
+
+def hydration_db(project_count):
+    """A mock client holding a CV with `project_count` projects."""
+    db = Mock()
+    db.cv_experience.find_many = AsyncMock(return_value=[])
+    db.cv_technicalskill.find_many = AsyncMock(return_value=[])
+    db.cv_publication.find_many = AsyncMock(
+        return_value=[
+            SimpleNamespace(
+                publication=SimpleNamespace(id=30, title="t", journal="j", year=2024)
+            )
+        ]
+    )
+    db.cv_project.find_many = AsyncMock(
+        return_value=[
+            SimpleNamespace(
+                project=SimpleNamespace(id=i, name=f"p{i}", description="d")
+            )
+            for i in range(project_count)
+        ]
+    )
+    db.projecttechnology.find_many = AsyncMock(
+        return_value=[
+            SimpleNamespace(id=i, project_id=i, technology="Python")
+            for i in range(project_count)
+        ]
+    )
+    db.resourceurl.find_many = AsyncMock(
+        return_value=[
+            SimpleNamespace(
+                id=1, source_id=30, source_type="publication", label="DOI", url="d"
+            ),
+            *(
+                SimpleNamespace(
+                    id=2 + i, source_id=i, source_type="project", label="Repo", url="u"
+                )
+                for i in range(project_count)
+            ),
+        ]
+    )
+    return db
+
+
+@pytest.mark.asyncio
+async def test_cv_is_hydrated_in_constant_round_trips():
+    db = hydration_db(project_count=20)
+    cv = SimpleNamespace(
+        id=1,
+        type="Professional",
+        title="CV",
+        template=1,
+        is_draft=False,
+        bookmark=False,
+        pdf_url=None,
+        latest_saved_version_id=None,
+        created_at=datetime(2026, 1, 1),
+        updated_at=datetime(2026, 1, 1),
+    )
+
+    full = await _build_cv_from_db(db, cv)
+
+    assert len(full.projects) == 20
+    project = full.projects[7]
+    assert [t.technology for t in project.technologies] == ["Python"]
+    assert [u.label for u in project.urls] == ["Repo"]
+    assert [u.label for u in full.publications[0].urls] == ["DOI"]
+    db.projecttechnology.find_many.assert_awaited_once()
+    db.resourceurl.find_many.assert_awaited_once()
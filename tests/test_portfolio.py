@@ -0,0 +1,337 @@
+from contextlib import ExitStack, asynccontextmanager
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from src.cv.schemas import ProjectTechnologyIn
+from src.portfolio.schemas import PortfolioSaveContent
+from src.portfolio.service import get_portfolio_details, write_portfolio_content
+
+NOW = datetime(2026, 1, 1)
+
+
+def mock_portfolio_db(project_count):
+    """A mock Prisma client holding one portfolio with `project_count` projects."""
+    db = Mock()
+    db.portfolio.find_unique = AsyncMock(
+        return_value=SimpleNamespace(
+            id=1,
+            user_id="uid",
+            theme="modern",
+            title="Portfolio",
+            is_public=False,
+            bio="",
+            created_at=NOW,
+            updated_at=NOW,
+            published_url=None,
+            published_at=None,
+        )
+    )
+    db.portfolio_experience.find_many = AsyncMock(return_value=[])
+    db.portfolio_publication.find_many = AsyncMock(return_value=[])
+    db.portfolio_technicalskill.find_many = AsyncMock(return_value=[])
+    db.portfoliofeedback.find_many = AsyncMock(return_value=[])
+    db.portfolio_project.find_many = AsyncMock(
+        return_value=[
+            SimpleNamespace(
+                project=SimpleNamespace(id=i, name=f"p{i}", description="d"),
+                thumbnail_url=f"uid/project-{i}/thumb.png",
+            )
+            for i in range(project_count)
+        ]
+    )
+    db.projecttechnology.find_many = AsyncMock(
+        return_value=[
+            SimpleNamespace(id=i, project_id=i, technology="Python")
+            for i in range(project_count)
+        ]
+    )
+    db.resourceurl.find_many = AsyncMock(
+        return_value=[
+            SimpleNamespace(
+                id=i, source_id=i, source_type="project", label="Repo", url="u"
+            )
+            for i in range(project_count)
+        ]
+    )
+    return db
+
+
+def patch_db_and_storage(mock_db, storage):
+    @asynccontextmanager
+    async def mock_get_db():
+        yield mock_db
+
+    @asynccontextmanager
+    async def mock_get_storage():
+        yield storage
+
+    stack = ExitStack()
+    stack.enter_context(patch("src.portfolio.service.get_db", mock_get_db))
+    stack.enter_context(patch("src.portfolio.service.get_storage", mock_get_storage))
+    return stack
+
+
+@pytest.mark.asyncio
+async def test_portfolio_details_load_in_constant_round_trips():
+    db = mock_portfolio_db(project_count=20)
+    sign = AsyncMock(
+        side_effect=lambda storage, paths, bucket: {p: f"s:{p}" for p in paths}
+    )
+
+    with patch_db_and_storage(db, Mock()), patch(
+        "src.portfolio.service.generate_signed_urls", sign
+    ):
+        details = await get_portfolio_details("uid", 1)
+
+    assert len(details.projects) == 20
+    project = details.projects[7]
+    assert [t.technology for t in project.technologies] == ["Python"]
+    assert [u.label for u in project.urls] == ["Repo"]
+    assert project.thumbnail_url == "s:uid/project-7/thumb.png"
+    db.projecttechnology.find_many.assert_awaited_once()
+    db.resourceurl.find_many.assert_awaited_once()
+    sign.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_portfolio_details_of_another_user_are_not_found():
+    db = mock_portfolio_db(project_count=1)
+
+    with patch_db_and_storage(db, Mock()), pytest.raises(Exception) as exc:
+        await get_portfolio_details("someone-else", 1)
+
+    assert type(exc.value).__name__ == "PortfolioNotFoundException"
+    db.portfolio_project.find_many.assert_not_awaited()
+
+
+def stored_portfolio():
+    """A portfolio linking one of each entity, as read by the writer."""
+    return SimpleNamespace(
+        id=1,
+        user_id="uid",
+        title="Portfolio",
+        bio="Old bio",
+        is_public=False,
+        published_url=None,
+        experience=[SimpleNamespace(exp_id=10)],
+        projects=[SimpleNamespace(project_id=20, thumbnail_url="thumb")],
+        publications=[SimpleNamespace(publication_id=30)],
+        technical_skills=[SimpleNamespace(tech_skill_id=40)],
+    )
+
+
+def saved_content(**changes):
+    content = {
+        "title": "Portfolio",
+        "bio": "Old bio",
+        "experiences": [
+            {
+                "id": 10,
+                "job_title": "Engineer",
+                "position": "Senior",
+                "company": "Acme",
+                "company_url": "https://acme.test",
+                "company_logo": "",
+                "location": "Remote",
+                "employment_type": "Full-time",
+                "location_type": "Remote",
+                "industry": "Software",
+                "start_date": "2024-01-01",
+                "end_date": "2025-01-01",
+                "description": "Built things",
+            }
+        ],
+        "projects": [
+            {
+                "id": 20,
+                "name": "p",
+                "description": "d",
+                "technologies": [{"technology": "Python"}],
+                "urls": [{"label": "Repo", "url": "u", "source_type": "project"}],
+            }
+        ],
+        "publications": [
+            {"id": 30, "title": "t", "journal": "j", "year": 2024, "urls": []}
+        ],
+        "technical_skills": [{"id": 40, "name": "Python", "category": "Language"}],
+    }
+    content.update(changes)
+    return PortfolioSaveContent.model_validate(content)
+
+
+def mock_writer_db():
+    db = AsyncMock()
+    db.portfolio.find_unique = AsyncMock(return_value=stored_portfolio())
+    db.portfolio.update = AsyncMock(return_value=stored_portfolio())
+    db.experience.find_many = AsyncMock(
+        return_value=[SimpleNamespace(id=10, company_logo=None)]
+    )
+    db.project.find_many = AsyncMock(
+        return_value=[
+            SimpleNamespace(id=20, technologies=[SimpleNamespace(technology="Python")])
+        ]
+    )
+    db.resourceurl.find_many = AsyncMock(
+        return_value=[
+            SimpleNamespace(
+                id=1, source_id=20, source_type="project", label="Repo", url="u"
+            )
+        ]
+    )
+    return db
+
+
+def writes(db):
+    """Names of the write calls made on the mock client."""
+    return {
+        f"{table}.{method}"
+        for table in (
+            "portfolio",
+            "experience",
+            "project",
+            "publication",
+            "technicalskill",
+            "projecttechnology",
+            "resourceurl",
+            "portfolio_experience",
+            "portfolio_project",
+            "portfolio_publication",
+            "portfolio_technicalskill",
+        )
+        for method in ("create", "create_many", "update", "delete_many")
+        if getattr(getattr(db, table), method).called
+    }
+
+
+@pytest.mark.asyncio
+async def test_bio_only_update_writes_one_row():
+    db = mock_writer_db()
+
+    result = await write_portfolio_content(
+        db, "uid", 1, saved_content(bio="New bio"), {}, {}
+    )
+
+    assert result.changed
+    assert writes(db) == {"portfolio.update"}
+    assert db.portfolio.update.await_args.kwargs["data"]["bio"] == "New bio"
+
+
+@pytest.mark.asyncio
+async def test_unchanged_content_writes_nothing():
+    db = mock_writer_db()
+
+    result = await write_portfolio_content(db, "uid", 1, saved_content(), {}, {})
+
+    assert not result.changed
+    assert writes(db) == set()
+
+
+@pytest.mark.asyncio
+async def test_only_changed_children_are_rewritten():
+    db = mock_writer_db()
+    content = saved_content(technical_skills=[])
+    content.projects[0].technologies.append(ProjectTechnologyIn(technology="SQL"))
+
+    await write_portfolio_content(db, "uid", 1, content, {}, {})
+
+    assert writes(db) == {
+        "portfolio.update",
+        "portfolio_technicalskill.delete_many",
+        "projecttechnology.delete_many",
+        "projecttechnology.create_many",
+    }
+    rows = db.projecttechnology.create_many.await_args.kwargs["data"]
+    assert [row["technology"] for row in rows] == ["Python", "SQL"]
+
+
+@pytest.mark.asyncio
+async def test_new_thumbnail_replaces_the_linked_one():
+    db = mock_writer_db()
+
+    result = await write_portfolio_content(
+        db, "uid", 1, saved_content(), {}, {0: "new-thumb"}
+    )
+
+    assert result.replaced_images == ["thumb"]
+    assert writes(db) == {"portfolio.update", "portfolio_project.update"}
+
+
+@pytest.mark.asyncio
+async def test_public_layout_signs_the_fitting_variant():
+    db = mock_portfolio_db(project_count=2)
+    links = db.portfolio_project.find_many.return_value
+    links[0].thumbnail_url = "uid/project-0/abc-1280.webp"
+    # Uploaded before variants were stored
+    links[1].thumbnail_url = "https://x.supabase.co/storage/v1/object/public/p.png"
+    sign = AsyncMock(
+        side_effect=lambda storage, paths, bucket: {p: f"s:{p}" for p in paths}
+    )
+
+    with patch_db_and_storage(db, Mock()), patch(
+        "src.portfolio.service.generate_signed_urls", sign
+    ):
+        details = await get_portfolio_details("uid", 1, thumbnail_width=640)
+
+    assert sign.await_args.args[1] == ["uid/project-0/abc-640.webp"]
+    assert details.projects[0].thumbnail_url == "s:uid/project-0/abc-640.webp"
+    assert details.projects[1].thumbnail_url == links[1].thumbnail_url
+
+
+@pytest.mark.asyncio
+async def test_unlinked_project_thumbnail_is_released():
+    db = mock_writer_db()
+
+    result = await write_portfolio_content(
+        db, "uid", 1, saved_content(projects=[]), {}, {}
+    )
+
+    assert result.replaced_images == ["thumb"]
+    assert "portfolio_project.delete_many" in writes(db)
+
+
+@pytest.mark.asyncio
+async def test_copied_images_take_a_reference():
+    db = mock_writer_db()
+    db.query_raw = AsyncMock(return_value=[{"stored": True}])
+    db.experience.create = AsyncMock(return_value=SimpleNamespace(id=11))
+    db.project.create = AsyncMock(
+        side_effect=[SimpleNamespace(id=21), SimpleNamespace(id=22)]
+    )
+    content = saved_content()
+    new_exp = content.experiences[0].model_copy(
+        update={"id": None, "company_logo": "blobs/ab/logo-1280.webp"}
+    )
+    new_proj = content.projects[0].model_copy(
+        update={"id": None, "thumbnail_url": "blobs/cd/thumb-1280.webp"}
+    )
+    legacy_proj = content.projects[0].model_copy(
+        update={"id": None, "thumbnail_url": "https://cdn.test/thumb.png"}
+    )
+    content.experiences.append(new_exp)
+    content.projects.extend([new_proj, legacy_proj])
+
+    await write_portfolio_content(db, "uid", 1, content, {}, {})
+
+    acquired = [call.args[1:] for call in db.query_raw.await_args_list]
+    assert acquired == [
+        ("portfolio-images", "blobs/ab/logo-1280.webp"),
+        ("portfolio-images", "blobs/cd/thumb-1280.webp"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_duplicate_links_are_not_dropped():
+    db = mock_writer_db()
+    skill = {"id": 41, "name": "SQL", "category": "Language"}
+
+    await write_portfolio_content(
+        db, "uid", 1, saved_content(technical_skills=[skill, skill]), {}, {}
+    )
+
+    # Left to the unique constraint, as with one create per link
+    kwargs = db.portfolio_technicalskill.create_many.await_args.kwargs
+    assert [row["tech_skill_id"] for row in kwargs["data"]] == [41, 41]
+    assert "skip_duplicates" not in kwargs
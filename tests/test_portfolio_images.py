@@ -0,0 +1,123 @@
+import asyncio
+import time
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from src.portfolio.exceptions import PortfolioInvalidImageException
+from src.portfolio.images import (
+    IMAGE_WIDTHS,
+    ImageOptimizer,
+    encode_variants,
+    image_variant,
+    image_variants,
+)
+
+
+def png(width, height):
+    out = BytesIO()
+    Image.new("RGBA", (width, height), (200, 40, 40, 255)).save(out, "PNG")
+    return out.getvalue()
+
+
+def test_variants_are_webp_and_never_upscaled():
+    variants = encode_variants(png(800, 400), IMAGE_WIDTHS, quality=80)
+
+    assert sorted(variants) == sorted(IMAGE_WIDTHS)
+    sizes = {}
+    for width, data in variants.items():
+        with Image.open(BytesIO(data)) as image:
+            assert image.format == "WEBP"
+            sizes[width] = image.size
+    assert sizes == {320: (320, 160), 640: (640, 320), 1280: (800, 400)}
+
+
+def test_images_over_the_pixel_limit_are_rejected():
+    with pytest.raises(Image.DecompressionBombWarning):
+        encode_variants(png(100, 100), IMAGE_WIDTHS, quality=80, max_pixels=5000)
+    # Far over it, Pillow refuses them itself
+    with pytest.raises(Image.DecompressionBombError):
+        encode_variants(png(100, 100), IMAGE_WIDTHS, quality=80, max_pixels=4000)
+
+
+def test_variant_paths():
+    path = "uid/project-1/abc-1280.webp"
+
+    assert image_variant(path, 320) == "uid/project-1/abc-320.webp"
+    assert image_variants(path) == [
+        f"uid/project-1/abc-{width}.webp" for width in IMAGE_WIDTHS
+    ]
+    # Images stored before variants existed are served as they are
+    assert image_variant("uid/project-1/abc.png", 320) == "uid/project-1/abc.png"
+    assert image_variants("uid/project-1/abc.png") == ["uid/project-1/abc.png"]
+
+
+@pytest.mark.asyncio
+async def test_optimizer_runs_in_worker_process_and_rejects_non_images():
+    optimizer = ImageOptimizer(workers=1, timeout=60)
+    try:
+        variants = await optimizer.optimize(png(100, 100))
+        assert set(variants) == set(IMAGE_WIDTHS)
+
+        with pytest.raises(PortfolioInvalidImageException):
+            await optimizer.optimize(b"%PDF-1.4 not an image")
+    finally:
+        optimizer.shutdown()
+
+
+def hang(*args):
+    time.sleep(60)
+
+
+@pytest.mark.asyncio
+async def test_stuck_worker_is_killed_and_the_pool_replaced(monkeypatch):
+    optimizer = ImageOptimizer(workers=1, timeout=3)
+    try:
+        with monkeypatch.context() as patched:
+            patched.setattr("src.portfolio.images.encode_variants", hang)
+            with pytest.raises(PortfolioInvalidImageException):
+                await optimizer.optimize(png(100, 100))
+        assert optimizer._pool is None
+
+        optimizer.timeout = 60
+        assert set(await optimizer.optimize(png(100, 100))) == set(IMAGE_WIDTHS)
+    finally:
+        optimizer.shutdown()
+
+
+def encode_slowly(data, *args):
+    time.sleep(60 if data == b"stuck" else 2)
+    return {}
+
+
+@pytest.mark.asyncio
+async def test_time_waiting_for_a_worker_does_not_count(monkeypatch):
+    optimizer = ImageOptimizer(workers=1, timeout=3)
+    monkeypatch.setattr("src.portfolio.images.encode_variants", encode_slowly)
+    try:
+        # Two run back to back for longer than the timeout
+        assert await asyncio.gather(
+            optimizer.optimize(b"valid"), optimizer.optimize(b"valid")
+        ) == [{}, {}]
+    finally:
+        optimizer.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_image_in_a_pool_killed_over_another_timeout_is_retried(monkeypatch):
+    optimizer = ImageOptimizer(workers=2, timeout=3)
+    monkeypatch.setattr("src.portfolio.images.encode_variants", encode_slowly)
+
+    async def started_later():
+        await asyncio.sleep(1.5)
+        return await optimizer.optimize(b"valid")
+
+    try:
+        stuck, valid = await asyncio.gather(
+            optimizer.optimize(b"stuck"), started_later(), return_exceptions=True
+        )
+        assert isinstance(stuck, PortfolioInvalidImageException)
+        assert valid == {}
+    finally:
+        optimizer.shutdown()
@@ -0,0 +1,124 @@
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from starlette.requests import Request
+from test_util import FakeRedis
+
+from src.portfolio.public_cache import (
+    CACHE_IF_CURRENT_SCRIPT,
+    PublicGeneration,
+    cache_public_portfolio,
+    etag_matches,
+    get_cached_public_portfolio,
+    invalidate_public_portfolio,
+    invalidate_public_portfolios,
+    public_etag,
+)
+from src.portfolio.router import view_public_portfolio
+from src.portfolio.service import get_public_portfolio_snapshot
+
+FIRST_GENERATION = PublicGeneration(page="0", owner="0")
+
+
+async def cache_if_current(redis, keys, args):
+    """Runs the conditional cache write in Python."""
+    page, owner, page_generation, owner_generation = keys
+    expected_page, expected_owner, body, etag, url, ttl = args
+    if (
+        redis.values.get(page_generation, "0") != expected_page
+        or redis.values.get(owner_generation, "0") != expected_owner
+    ):
+        return 0
+    await redis.hset(page, mapping={"body": body, "etag": etag})
+    await redis.expire(page, ttl)
+    await redis.sadd(owner, url)
+    await redis.expire(owner, ttl)
+    return 1
+
+
+def public_redis():
+    return FakeRedis({CACHE_IF_CURRENT_SCRIPT: cache_if_current})
+
+
+def request_with(headers):
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        }
+    )
+
+
+def test_etag_matches():
+    etag = public_etag('{"title": "a"}')
+    assert etag != public_etag('{"title": "b"}')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+
+@pytest.mark.asyncio
+async def test_owner_writes_drop_all_their_pages():
+    with patch("src.portfolio.public_cache.redis_client", public_redis()):
+        for uid, url in (("uid", "a"), ("uid", "b"), ("other", "c")):
+            body = f'{{"title": "{url}"}}'
+            await cache_public_portfolio(uid, f"url-{url}", body, FIRST_GENERATION)
+        assert (await get_cached_public_portfolio("url-a")).body == '{"title": "a"}'
+
+        await invalidate_public_portfolios("uid")
+
+        assert await get_cached_public_portfolio("url-a") is None
+        assert await get_cached_public_portfolio("url-b") is None
+        assert await get_cached_public_portfolio("url-c") is not None
+
+
+@pytest.mark.asyncio
+async def test_public_page_is_built_once_and_revalidated_by_etag():
+    body = '{"title": "Portfolio"}'
+    page = Mock(model_dump_json=lambda: body)
+    build = AsyncMock(return_value=("uid", page, FIRST_GENERATION))
+
+    with patch("src.portfolio.public_cache.redis_client", public_redis()), patch(
+        "src.portfolio.service.build_public_portfolio", build
+    ):
+        first = await view_public_portfolio(request_with({}), "url")
+        assert first.status_code == 200
+        assert first.body == body.encode()
+        assert first.headers["cache-control"].startswith("public")
+
+        etag = first.headers["etag"]
+        again = await view_public_portfolio(
+            request_with({"If-None-Match": etag}), "url"
+        )
+        assert again.status_code == 304
+
+    build.assert_awaited_once()
+
+
+@pytest.mark.parametrize(
+    "invalidate",
+    [
+        lambda: invalidate_public_portfolio("url"),
+        lambda: invalidate_public_portfolios("uid"),
+    ],
+)
+@pytest.mark.asyncio
+async def test_page_invalidated_while_built_is_not_cached(invalidate):
+    page = Mock(model_dump_json=lambda: '{"title": "stale"}')
+
+    async def build(published_url):
+        # E.g. the portfolio is unpublished after its row was read
+        await invalidate()
+        return "uid", page, FIRST_GENERATION
+
+    with patch("src.portfolio.public_cache.redis_client", public_redis()), patch(
+        "src.portfolio.service.build_public_portfolio", build
+    ):
+        snapshot = await get_public_portfolio_snapshot("url")
+
+        assert snapshot.body == '{"title": "stale"}'
+        assert await get_cached_public_portfolio("url") is None
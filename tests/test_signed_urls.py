@@ -0,0 +1,60 @@
+import pytest
+
+from src.database import LocalStorage
+from src.signed_urls import SignedUrlCache
+
+
+async def make_storage(bucket, paths):
+    storage = LocalStorage()
+    for path in paths:
+        await storage.upload(bucket, path, b"%PDF-1.4")
+    return storage
+
+
+class TestSignedUrlCache:
+    """Unit tests for the signed URL cache."""
+
+    @pytest.mark.asyncio
+    async def test_misses_are_signed_in_one_call(self):
+        paths = [f"uid/cert{i}.pdf" for i in range(20)]
+        storage = await make_storage("certificates", paths)
+        cache = SignedUrlCache(max_size=100)
+
+        urls = await cache.sign_many(storage, "certificates", paths, 3600)
+
+        assert set(urls) == set(paths)
+        assert cache.stats()["storage_calls"] == 1
+
+    @pytest.mark.asyncio
+    async def test_hits_skip_storage(self):
+        storage = await make_storage("certificates", ["a.pdf", "b.pdf"])
+        cache = SignedUrlCache(max_size=100)
+        await cache.sign_many(storage, "certificates", ["a.pdf"], 3600)
+
+        urls = await cache.sign_many(storage, "certificates", ["a.pdf", "b.pdf"], 3600)
+
+        assert set(urls) == {"a.pdf", "b.pdf"}
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["storage_calls"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_paths_are_not_cached(self):
+        storage = LocalStorage()
+        cache = SignedUrlCache(max_size=100)
+
+        assert await cache.sign_many(storage, "cvs", ["missing.pdf"], 3600) == {}
+        await storage.upload("cvs", "missing.pdf", b"%PDF-1.4")
+        assert "missing.pdf" in await cache.sign_many(
+            storage, "cvs", ["missing.pdf"], 3600
+        )
+
+    @pytest.mark.asyncio
+    async def test_invalidate(self):
+        storage = await make_storage("cvs", ["a.pdf"])
+        cache = SignedUrlCache(max_size=100)
+        await cache.sign_many(storage, "cvs", ["a.pdf"], 3600)
+
+        await storage.remove("cvs", ["a.pdf"])
+        await cache.invalidate("cvs", ["a.pdf"])
+
+        assert await cache.sign_many(storage, "cvs", ["a.pdf"], 3600) == {}
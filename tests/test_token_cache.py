@@ -0,0 +1,87 @@
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.auth.token_cache import VerifiedTokenCache
+
+
+def make_claims(uid: str = "uid_1", ttl: int = 3600) -> dict:
+    return {"uid": uid, "exp": int(time.time()) + ttl}
+
+
+class TestVerifiedTokenCache:
+    """Unit tests for the verified-token cache."""
+
+    @pytest.mark.asyncio
+    async def test_second_lookup_is_a_hit(self):
+        cache = VerifiedTokenCache(max_size=10)
+        verifier = MagicMock(return_value=make_claims())
+
+        first = await cache.verify("token", verifier)
+        second = await cache.verify("token", verifier)
+
+        assert first == second
+        verifier.assert_called_once_with("token")
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_token_is_not_cached(self):
+        cache = VerifiedTokenCache(max_size=10)
+        verifier = MagicMock(return_value=make_claims(ttl=1))
+
+        await cache.verify("token", verifier)
+        await cache.verify("token", verifier)
+
+        assert verifier.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_claims_without_exp_are_not_cached(self):
+        cache = VerifiedTokenCache(max_size=10)
+        verifier = MagicMock(return_value={"uid": "uid_1"})
+
+        await cache.verify("token", verifier)
+        await cache.verify("token", verifier)
+
+        assert verifier.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        cache = VerifiedTokenCache(max_size=2)
+        verifier = MagicMock(side_effect=lambda t: make_claims(uid=t))
+
+        await cache.verify("a", verifier)
+        await cache.verify("b", verifier)
+        await cache.verify("a", verifier)  # refresh "a"
+        await cache.verify("c", verifier)  # evicts "b"
+        await cache.verify("a", verifier)
+        await cache.verify("b", verifier)
+
+        assert verifier.call_count == 4
+        assert cache.stats()["evictions"] == 2
+
+    @pytest.mark.asyncio
+    async def test_verification_error_propagates(self):
+        cache = VerifiedTokenCache(max_size=10)
+        verifier = MagicMock(side_effect=ValueError("bad token"))
+
+        with pytest.raises(ValueError):
+            await cache.verify("token", verifier)
+        assert cache.stats()["size"] == 0
+
+    @pytest.mark.asyncio
+    async def test_redis_tier_is_shared(self):
+        claims = make_claims()
+        redis = MagicMock()
+        redis.get = AsyncMock(return_value=json.dumps(claims))
+        redis.set = AsyncMock()
+        cache = VerifiedTokenCache(max_size=10, redis=redis)
+        verifier = MagicMock()
+
+        result = await cache.verify("token", verifier)
+
+        assert result == claims
+        verifier.assert_not_called()
+        assert cache.stats()["redis_hits"] == 1
@@ -8,9 +8,14 @@ from test_util import api_prefix, get_firebase_token
 from src.app import create_app
 from src.auth.exceptions import UserNotFoundException
 from src.users.constants import USER_NOT_FOUND
-from src.users.exceptions import UsernameUnavailableException
+from src.users.exceptions import InvalidCursorException, UsernameUnavailableException
 from src.users.schemas import UserProfileUpdate
-from src.users.service import get_user_profile_by_uid, update_user_profile
+from src.users.service import (
+    decode_cursor,
+    get_user_profile_by_uid,
+    other_user_profiles,
+    update_user_profile,
+)
 
 
 @pytest.fixture
@@ -135,3 +140,58 @@ async def test_get_user_profile_by_uid_user_not_found(mocker):
 
     with pytest.raises(UserNotFoundException):
         await update_user_profile("nonexistent_uid", UserProfileUpdate())
+
+
+@pytest.mark.asyncio
+async def test_other_user_profiles_paginates_with_cursor(mocker):
+    rows = [
+        {
+            "username": f"user{i}",
+            "job_title": "Engineer",
+            "company_name": "Acme",
+            "start_date": "2023-01-01T00:00:00+00:00",
+            "end_date": "2024-01-01T00:00:00+00:00",
+        }
+        for i in range(3)
+    ]
+    fake_db = MagicMock()
+    fake_db.query_raw = AsyncMock(return_value=rows)
+
+    @asynccontextmanager
+    async def mock_get_db():
+        yield fake_db
+
+    mocker.patch("src.users.service.get_db", mock_get_db)
+    mocker.patch("src.users.service._get_cached_page", AsyncMock(return_value=None))
+    cache_page = mocker.patch("src.users.service._cache_page", AsyncMock())
+
+    page = await other_user_profiles("me", limit=2, company="acme")
+
+    assert [item.username for item in page.items] == ["user0", "user1"]
+    assert page.items[0].start_date == "2023-01-01"
+    assert decode_cursor(page.next_cursor) == [
+        "user1",
+        "Engineer",
+        "Acme",
+        "2023-01-01",
+        "2024-01-01",
+    ]
+    query, *params = fake_db.query_raw.await_args.args
+    assert "DISTINCT" in query
+    assert params == ["me", "%acme%", 3]
+    cache_page.assert_awaited_once()
+
+    # Later pages continue after the cursor and are not cached
+    fake_db.query_raw.return_value = rows[2:]
+    page = await other_user_profiles("me", cursor=page.next_cursor, limit=2)
+
+    assert [item.username for item in page.items] == ["user2"]
+    assert page.next_cursor is None
+    _, *params = fake_db.query_raw.await_args.args
+    assert params[1:6] == ["user1", "Engineer", "Acme", "2023-01-01", "2024-01-01"]
+    cache_page.assert_awaited_once()
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(InvalidCursorException):
+        decode_cursor("not a cursor")
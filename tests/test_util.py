@@ -1,5 +1,9 @@
+import asyncio
 import json
+from contextlib import asynccontextmanager
 from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
 
 api_prefix = "/api/v1"
 
@@ -8,3 +12,258 @@ def get_firebase_token():
     path = Path(__file__).parent / "setup_data.json"
     with open(path) as f:
         return json.load(f)["USER_1_TOKEN"]
+
+
+class FakeBlobDb:
+    """
+    The Blob table in memory, answering the queries src.blobs runs.
+
+    `tx()` yields the fake itself, so other models can be attached to it as
+    mocks and used inside transactions too.
+    """
+
+    def __init__(self):
+        self.rows = {}
+        self.blob = Mock()
+        self.blob.update_many = AsyncMock(side_effect=self._update_many)
+        self.blob.delete_many = AsyncMock(side_effect=self._delete_many)
+
+    def ref_count(self, bucket, path):
+        row = self.rows.get((bucket, path))
+        return row["ref_count"] if row else None
+
+    @asynccontextmanager
+    async def tx(self, **kwargs):
+        yield self
+
+    async def query_raw(self, query, bucket, *params):
+        if query.lstrip().startswith("INSERT"):
+            # Acquiring a reference to the blob at params[0]
+            row = self.rows.setdefault(
+                (bucket, params[0]), {"ref_count": 0, "stored": False}
+            )
+            row["ref_count"] += 1
+            return [{"stored": row["stored"]}]
+        # Locking the unreferenced blobs among `params`
+        return [
+            {"path": path}
+            for path in params
+            if (bucket, path) in self.rows
+            and self.rows[(bucket, path)]["ref_count"] <= 0
+        ]
+
+    def _matching(self, where):
+        paths = (
+            where["path"]["in"] if isinstance(where["path"], dict) else [where["path"]]
+        )
+        max_refs = where.get("ref_count", {}).get("lte")
+        return [
+            row
+            for (bucket, path), row in self.rows.items()
+            if bucket == where["bucket"]
+            and path in paths
+            and (max_refs is None or row["ref_count"] <= max_refs)
+        ]
+
+    async def _update_many(self, where, data):
+        rows = self._matching(where)
+        for row in rows:
+            if "stored" in data:
+                row["stored"] = data["stored"]
+            if "ref_count" in data:
+                row["ref_count"] -= data["ref_count"]["decrement"]
+        return len(rows)
+
+    async def _delete_many(self, where):
+        keys = [
+            (where["bucket"], path)
+            for path in where["path"]["in"]
+            if (where["bucket"], path) in self.rows
+        ]
+        for key in keys:
+            del self.rows[key]
+        return len(keys)
+
+
+class FakeRowModel:
+    """
+    A Prisma model holding a single row.
+
+    Every query yields to the event loop first, so concurrent callers
+    interleave between their reads and writes.
+    """
+
+    def __init__(self, **row):
+        self.row = SimpleNamespace(**row)
+
+    async def find_unique(self, where):
+        await asyncio.sleep(0)
+        if where["id"] != self.row.id:
+            return None
+        return SimpleNamespace(**vars(self.row))
+
+    async def update_many(self, where, data):
+        await asyncio.sleep(0)
+        if any(getattr(self.row, key) != value for key, value in where.items()):
+            return 0
+        for key, value in data.items():
+            setattr(self.row, key, value)
+        return 1
+
+
+class FakePipeline:
+    """Queues commands and runs them against the FakeRedis on `execute()`."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+
+        return queue
+
+    async def execute(self):
+        calls, self.calls = self.calls, []
+        return [
+            await getattr(self.redis, name)(*args, **kwargs)
+            for name, args, kwargs in calls
+        ]
+
+
+class FakeRedis:
+    """
+    The Redis commands the caches, quotas and job queue use, in memory.
+
+    Strings, hashes and sets live in `values`, lists in `lists` and sorted
+    sets in `zsets`. Expiry times are recorded in `expirations` but never
+    applied. Lua scripts run as the Python functions stored in `scripts`
+    under their source; each is called with the fake, the keys and the
+    arguments.
+    """
+
+    def __init__(self, scripts=None):
+        self.values = {}
+        self.lists = {}
+        self.zsets = {}
+        self.expirations = {}
+        self.scripts = dict(scripts or {})
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        async def run(keys, args=()):
+            return await self.scripts[script](self, keys, args)
+
+        return run
+
+    async def eval(self, script, numkeys, *keys_and_args):
+        keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        return await self.scripts[script](self, keys, args)
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None, nx=False, exat=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        if ex is not None:
+            self.expirations[key] = ex
+        return True
+
+    async def incr(self, key):
+        value = int(self.values.get(key, 0)) + 1
+        self.values[key] = str(value)
+        return value
+
+    async def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            for space in (self.values, self.lists, self.zsets):
+                if space.pop(key, None) is not None:
+                    removed += 1
+        return removed
+
+    async def expire(self, key, seconds):
+        self.expirations[key] = seconds
+
+    async def hset(self, key, mapping):
+        self.values.setdefault(key, {}).update(mapping)
+
+    async def hgetall(self, key):
+        return self.values.get(key, {})
+
+    async def sadd(self, key, *members):
+        self.values.setdefault(key, set()).update(members)
+
+    async def smembers(self, key):
+        return self.values.get(key, set())
+
+    async def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+    async def blmove(self, source, destination, timeout, src="LEFT", dest="RIGHT"):
+        if not self.lists.get(source):
+            return None
+        value = self.lists[source].pop(0)
+        self.lists.setdefault(destination, []).append(value)
+        return value
+
+    async def lrange(self, key, start, end):
+        values = self.lists.get(key, [])
+        return values[start : None if end == -1 else end + 1]
+
+    async def lrem(self, key, count, value):
+        values = self.lists.get(key, [])
+        removed = 0
+        while value in values and (count == 0 or removed < count):
+            values.remove(value)
+            removed += 1
+        return removed
+
+    async def zadd(self, key, mapping, nx=False, xx=False):
+        zset = self.zsets.setdefault(key, {})
+        added = 0
+        for member, score in mapping.items():
+            if (nx and member in zset) or (xx and member not in zset):
+                continue
+            added += member not in zset
+            zset[member] = score
+        return added
+
+    async def zscore(self, key, member):
+        return self.zsets.get(key, {}).get(member)
+
+    async def zrem(self, key, *members):
+        zset = self.zsets.get(key, {})
+        return sum(zset.pop(member, None) is not None for member in members)
+
+    async def zremrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        removed = [
+            member
+            for member, score in zset.items()
+            if float(low) <= score <= float(high)
+        ]
+        for member in removed:
+            del zset[member]
+        return len(removed)
+
+    async def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    async def zpopmin(self, key, count=1):
+        zset = self.zsets.get(key, {})
+        oldest = sorted(zset.items(), key=lambda item: item[1])[:count]
+        for member, _ in oldest:
+            del zset[member]
+        return oldest